@@ -7,6 +7,7 @@
 @description  配置文件
 """
 
+import json
 import os
 from datetime import timedelta
 
@@ -25,6 +26,54 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)  # Token 过期时间
     JWT_ALGORITHM = 'HS256'
 
+    # 配置版本轮询间隔（秒）：其它工作进程对 Mock、项目、环境的修改最多在该间隔后生效，0 为不同步
+    CONFIG_VERSION_POLL_INTERVAL = float(os.getenv('CONFIG_VERSION_POLL_INTERVAL', 0.5))
+
+    # Mock 路由表快照：路由表变化后写入 MOCK_SNAPSHOT_PATH，新进程启动时先加载快照再与数据库同步
+    MOCK_SNAPSHOT_PATH = os.getenv('MOCK_SNAPSHOT_PATH')  # 为空时不写入快照
+    MOCK_SNAPSHOT_INTERVAL = float(os.getenv('MOCK_SNAPSHOT_INTERVAL', 1))  # 写入快照的间隔（秒）
+    MOCK_SNAPSHOT_ONLY = os.getenv('MOCK_SNAPSHOT_ONLY', 'false').lower() == 'true'  # 只从快照提供服务，不访问数据库
+
+    # 按 (Mock 版本, 种子) 缓存渲染结果的条数
+    MOCK_RENDER_CACHE_SIZE = int(os.getenv('MOCK_RENDER_CACHE_SIZE', 1024))
+
+    # 模拟数据生成进程数：大于 1 时大批量生成（流式输出、写入数据库）按块分发到进程池，0 或 1 为在当前进程中生成
+    MOCK_DATA_PROCESSES = int(os.getenv('MOCK_DATA_PROCESSES', 0))
+
+    # 模拟数据文本字段的值池大小：每个 (语言环境, 字段类型, 选项) 最多生成这么多个不同的值，字段 options.pool_size 可单独指定
+    MOCK_DATA_POOL_SIZE = int(os.getenv('MOCK_DATA_POOL_SIZE', 10000))
+
+    # 随机值池配置：每个随机标记预生成 VALUE_POOL_SIZE 个值，剩余低于 VALUE_POOL_LOW_WATERMARK 时后台补充
+    VALUE_POOL_ENABLED = os.getenv('VALUE_POOL_ENABLED', 'true').lower() == 'true'
+    VALUE_POOL_SIZE = int(os.getenv('VALUE_POOL_SIZE', 1000))
+    VALUE_POOL_LOW_WATERMARK = int(os.getenv('VALUE_POOL_LOW_WATERMARK', 200))
+
+    # 场景状态配置（有状态 Mock）
+    SCENARIO_STATE_BACKEND = os.getenv('SCENARIO_STATE_BACKEND', 'database')  # database 各工作进程共享；memory 只能单进程运行
+    SCENARIO_STATE_TTL = int(os.getenv('SCENARIO_STATE_TTL', 3600))  # 键与集合最后一次写入后的存活时间（秒），0 为不过期
+    SCENARIO_STATE_MAX_SCENARIOS = int(os.getenv('SCENARIO_STATE_MAX_SCENARIOS', 100))  # 场景数上限
+    SCENARIO_STATE_MAX_KEYS = int(os.getenv('SCENARIO_STATE_MAX_KEYS', 1000))  # 每个场景的键与集合数上限
+    SCENARIO_STATE_MAX_ITEMS = int(os.getenv('SCENARIO_STATE_MAX_ITEMS', 10000))  # 每个集合的资源数上限
+    SCENARIO_STATE_PERSIST_PATH = os.getenv('SCENARIO_STATE_PERSIST_PATH')  # memory 存储的持久化文件，为空时只保存在内存中；写入 <路径>.<pid>，启动时合并
+    SCENARIO_STATE_FLUSH_INTERVAL = float(os.getenv('SCENARIO_STATE_FLUSH_INTERVAL', 1))  # 写入持久化文件的间隔（秒）
+
+    # 代理模式配置（未匹配到 Mock 的请求转发到项目配置的上游）
+    PROXY_TIMEOUT = float(os.getenv('PROXY_TIMEOUT', 10))  # 上游请求超时（秒）
+    PROXY_POOL_SIZE = int(os.getenv('PROXY_POOL_SIZE', 20))  # 每个上游主机的 keep-alive 连接数
+    PROXY_CACHE_SIZE = int(os.getenv('PROXY_CACHE_SIZE', 1024))  # 响应缓存条数
+    PROXY_CACHE_TTL = float(os.getenv('PROXY_CACHE_TTL', 300))  # 响应缓存有效期（秒）
+
+    # Mock 执行指标配置
+    MOCK_METRICS_DIR = os.getenv('MOCK_METRICS_DIR')  # 多进程指标汇总目录，默认系统临时目录下按部署区分的 mock_metrics-<摘要>
+    MOCK_METRICS_FLUSH_INTERVAL = float(os.getenv('MOCK_METRICS_FLUSH_INTERVAL', 1))  # 写入汇总目录的间隔（秒）
+    MOCK_METRICS_STALE_SECONDS = int(os.getenv('MOCK_METRICS_STALE_SECONDS', 300))  # 超过该时间未更新的进程指标文件视为已退出并删除，0 为不删除
+
+    # 请求/响应日志配置（后台线程异步输出）
+    RESPONSE_LOG_SAMPLE_RATE = float(os.getenv('RESPONSE_LOG_SAMPLE_RATE', 1))  # 默认采样率 0 ~ 1
+    RESPONSE_LOG_SAMPLE_RATES = json.loads(os.getenv('RESPONSE_LOG_SAMPLE_RATES', '{}'))  # 按蓝图名覆盖，如 {"mock_execute": 0.01}
+    RESPONSE_LOG_BODY_LIMIT = int(os.getenv('RESPONSE_LOG_BODY_LIMIT', 4096))  # 请求体/响应体最多记录的字节数
+    RESPONSE_LOG_QUEUE_SIZE = int(os.getenv('RESPONSE_LOG_QUEUE_SIZE', 10000))  # 日志队列长度，满时丢弃
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 21:50
+@description  配置版本 - 跨工作进程、跨节点的进程内缓存失效通知（只依赖共享数据库）
+"""
+
+import os
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .database import db, datetime, tz_beijing
+from ..models.config_version_model import ConfigVersion
+from ..models.environment_model import Environment
+from ..models.mock_model import Mock
+from ..models.project_model import Project
+
+# 需要跟踪的实体 -> 配置类型
+TRACKED_MODELS = {Mock: 'mock', Project: 'project', Environment: 'environment'}
+
+
+class ConfigVersions:
+    """
+    配置版本计数器
+
+    - 写入：任意会话刷新 Mock / 项目 / 环境的增删改时，在同一事务内把 config_versions 中对应类型的版本号加一，
+      事务回滚时版本号一起回滚；新增、修改的 Mock 行同时记录该版本号（config_version）；
+      绕过 ORM 的批量语句需调用 bump 并写入返回的版本号
+    - 读取：每个工作进程一个后台线程，每 CONFIG_VERSION_POLL_INTERVAL 秒读取一次 config_versions（按主键的几行数据），
+      只通知版本号变化的类型的订阅者，订阅者在应用上下文中增量刷新自己的缓存
+    - 其它进程、其它节点的修改最多在一个轮询间隔后生效，不需要 Redis 等外部服务
+    """
+
+    def __init__(self):
+        self.poll_interval = 0.5
+        self._app = None
+        self._versions = {}  # 最近一次读取的 {配置类型: 版本号}
+        self._subscribers = {}  # {配置类型: [回调]}
+        self._listening = False
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self.poll_interval = app.config.get('CONFIG_VERSION_POLL_INTERVAL', self.poll_interval)
+        if not self._listening:
+            event.listen(Session, 'after_flush', self._after_flush)
+            self._listening = True
+
+    def subscribe(self, entity, callback):
+        """
+        订阅配置类型的变化
+
+        Args:
+            entity: 配置类型
+            callback: 无参回调，在轮询线程的应用上下文中调用
+        """
+        self._subscribers.setdefault(entity, []).append(callback)
+
+    def start(self, known=None):
+        """
+        启动本进程的轮询线程（重复调用无副作用）
+
+        订阅者应在首次整体加载缓存之前调用，先记录基线版本，加载期间发生的修改会在下一次轮询时被发现
+
+        Args:
+            known: 订阅者缓存实际对应的版本 {配置类型: 版本号}（如从快照加载），
+                与数据库中的版本不一致时下一次轮询即通知订阅者
+        """
+        if self.poll_interval <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                self._versions.update(known or {})
+                return
+            # gunicorn fork 之后子进程不继承父进程的轮询线程，重新启动
+            if self._app is None:
+                self._app = current_app._get_current_object()
+            try:
+                self._versions = self.fetch()
+            except Exception as e:
+                print(f"读取配置版本失败: {str(e)}")
+                self._versions = {}
+            self._versions.update(known or {})
+            threading.Thread(target=self._poll_loop, name='config-version-poller', daemon=True).start()
+            self._pid = os.getpid()
+
+    def version(self, entity):
+        """本进程已同步的版本号，轮询未启动时为 0"""
+        return self._versions.get(entity, 0)
+
+    @staticmethod
+    def fetch():
+        """读取所有配置类型的版本号"""
+        return dict(db.session.query(ConfigVersion.entity, ConfigVersion.version).all())
+
+    @staticmethod
+    def bump(session, *entities):
+        """
+        在会话当前事务内把配置类型的版本号加一
+
+        计数行的行锁持有到事务提交，并发事务按提交顺序依次拿到递增的版本号
+
+        Args:
+            session: SQLAlchemy 会话
+            entities: 配置类型
+
+        Returns:
+            dict: 加一后的版本号 {配置类型: 版本号}
+        """
+        if not entities:
+            return {}
+        table = ConfigVersion.__table__
+        now = datetime.now(tz_beijing)
+        connection = session.connection()
+        result = connection.execute(update(table).where(table.c.entity.in_(entities)).values(
+            version=table.c.version + 1, updated_at=now))
+        if result.rowcount < len(entities):
+            # 首次修改该类型配置时插入计数行
+            existing = set(connection.execute(select(table.c.entity).where(table.c.entity.in_(entities))).scalars())
+            missing = [entity for entity in entities if entity not in existing]
+            for entity in missing:
+                # 两个进程同时首次修改同一类型时都会插入，后插入的一方唯一约束冲突：
+                # 只回滚到保存点（不影响本事务其它写入），改为在对方插入的行上加一
+                try:
+                    with connection.begin_nested():
+                        connection.execute(insert(table).values(entity=entity, version=1, updated_at=now))
+                except IntegrityError:
+                    connection.execute(update(table).where(table.c.entity == entity).values(
+                        version=table.c.version + 1, updated_at=now))
+        return dict(connection.execute(select(table.c.entity, table.c.version).where(
+            table.c.entity.in_(entities))).all())
+
+    @staticmethod
+    def stamp(session, model, ids, version):
+        """
+        把行的 config_version 标记为本事务的版本号（只对有该列的实体），订阅者按版本号而不是更新时间增量加载
+
+        更新时间在刷新时取值，先刷新、后提交的事务会晚于水位线可见；版本号随事务提交，不受时钟偏差影响
+        """
+        table = model.__table__
+        if not ids or 'config_version' not in table.c:
+            return
+        values = {'config_version': version}
+        if 'updated_at' in table.c:
+            # 不触发 onupdate，保持 ORM 写入的更新时间
+            values['updated_at'] = table.c.updated_at
+        session.connection().execute(update(table).where(table.c.id.in_(ids)).values(**values))
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        # after_flush 时 new / dirty / deleted 仍是刷新前的状态
+        entities = set()
+        changed = {}  # 新增或修改的对象 {实体类: [对象]}
+        for obj in session.new:
+            entity = TRACKED_MODELS.get(type(obj))
+            if entity is not None:
+                entities.add(entity)
+                changed.setdefault(type(obj), []).append(obj)
+        for obj in session.deleted:
+            entity = TRACKED_MODELS.get(type(obj))
+            if entity is not None:
+                entities.add(entity)
+        for obj in session.dirty:
+            entity = TRACKED_MODELS.get(type(obj))
+            if entity is not None and session.is_modified(obj, include_collections=False):
+                entities.add(entity)
+                changed.setdefault(type(obj), []).append(obj)
+        if not entities:
+            return
+        versions = ConfigVersions.bump(session, *sorted(entities))
+        for model, objects in changed.items():
+            version = versions[TRACKED_MODELS[model]]
+            ConfigVersions.stamp(session, model, [obj.id for obj in objects], version)
+            if 'config_version' in model.__table__.c:
+                for obj in objects:
+                    set_committed_value(obj, 'config_version', version)
+
+    def _poll_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self._app.app_context():
+                    for entity, version in self.fetch().items():
+                        if self._versions.get(entity) == version:
+                            continue
+                        for callback in self._subscribers.get(entity, []):
+                            callback()
+                        # 回调全部成功后才记录新版本，失败时下一次轮询重试
+                        self._versions[entity] = version
+            except Exception as e:
+                print(f"配置版本同步失败: {str(e)}")
+
+
+config_versions = ConfigVersions()
@@ -7,11 +7,19 @@
 @description  数据库模块
 """
 
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timezone, timedelta
 
 tz_beijing = timezone(timedelta(hours=8))
 
 db = SQLAlchemy()
-migrate = Migrate()
+
+
+def __getattr__(name):
+    # flask_migrate 会连带导入 alembic，只有管理端需要，按需创建（Mock 执行入口不加载）
+    if name == 'migrate':
+        from flask_migrate import Migrate
+
+        globals()['migrate'] = Migrate()
+        return globals()['migrate']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
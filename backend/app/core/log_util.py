@@ -13,6 +13,19 @@ import urllib.parse
 import logging
 
 
+class ColorFormatter(logging.Formatter):
+    """按日志级别着色的格式化器，格式化器只创建一次"""
+
+    COLORS = {logging.DEBUG: '\033[0;32m%s\033[0m', logging.INFO: '\033[0;34m%s\033[0m',
+        logging.WARNING: '\033[0;37m%s\033[0m', logging.ERROR: '\033[0;31m%s\033[0m',
+        logging.CRITICAL: '\033[0;35m%s\033[0m'}
+
+    def format(self, record):
+        message = super().format(record)
+        color = self.COLORS.get(record.levelno)
+        return color % message if color else message
+
+
 class Logger(object):
     """
     终端打印不同颜色的日志，在pycharm中如果强行规定了日志的颜色，这个方法不会起作用，但是对于终端，这个方法是可以打印不同颜色的日志的。
@@ -20,6 +33,7 @@ class Logger(object):
 
     # 在这里定义StreamHandler，可以实现单例， 所有的logger()共用一个StreamHandler
     ch = logging.StreamHandler()
+    ch.setFormatter(ColorFormatter('[%(asctime)s] - [%(levelname)s] - %(message)s'))
 
     def __init__(self):
         self.logger = logging.getLogger()
@@ -60,35 +74,28 @@ class Logger(object):
             requests_logger = logging.getLogger("requests")
             requests_logger.addHandler(null_handler)
 
+        # 每个进程只挂一次终端 handler
+        if self.ch not in self.logger.handlers:
+            self.logger.addHandler(self.ch)
+
     def debug(self, message):
         message = urllib.parse.unquote(str(message))
         if not isinstance(message, str):
             message = str(message)
-        self.fontColor('\033[0;32m%s\033[0m')
         self.logger.debug(message)
 
     def info(self, message):
-        self.fontColor('\033[0;34m%s\033[0m')
         self.logger.info(message)
 
     def warning(self, message):
-        self.fontColor('\033[0;37m%s\033[0m')
         self.logger.warning(message)
 
     def error(self, message):
-        self.fontColor('\033[0;31m%s\033[0m')
         self.logger.error(message)
 
     def critical(self, message):
-        self.fontColor('\033[0;35m%s\033[0m')
         self.logger.critical(message)
 
-    def fontColor(self, color):
-        # 不同的日志输出不同的颜色
-        formatter = logging.Formatter(color % '[%(asctime)s] - [%(levelname)s] - %(message)s')
-        self.ch.setFormatter(formatter)
-        self.logger.addHandler(self.ch)
-
 
 if __name__ == "__main__":
     logger = Logger()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 16:20
+@description  Mock 执行指标 - 按 Mock 统计命中次数、各阶段耗时与响应大小，输出 Prometheus 文本格式
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+# 耗时分桶（秒）与响应大小分桶（字节）
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# 直方图名称 -> 分桶
+HISTOGRAMS = {'lookup_seconds': LATENCY_BUCKETS, 'render_seconds': LATENCY_BUCKETS,
+    'serialize_seconds': LATENCY_BUCKETS, 'response_size_bytes': SIZE_BUCKETS}
+
+
+class MockMetrics:
+    """
+    Mock 执行指标
+
+    - 记录：每个线程写自己的分片，请求路径上没有锁
+    - 汇总：后台线程每 MOCK_METRICS_FLUSH_INTERVAL 秒把本进程累计值写入 MOCK_METRICS_DIR 下的独立文件，
+      /api/metrics 读取目录内所有文件求和，从而汇总所有 gunicorn 工作进程
+    - 默认目录按部署区分（应用目录 + 数据库地址），同一台机器上的多个部署互不混入
+    - 超过 MOCK_METRICS_STALE_SECONDS 秒未更新的文件属于已退出的进程（存活进程每个间隔都会重写），汇总时删除
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # 后台线程与 collect() 的写入串行，后写入的总是更新的快照
+        self._pid = None
+        self._flusher = None
+        self._file_name = None
+        self.spool_dir = os.path.join(tempfile.gettempdir(), 'mock_metrics')
+        self.flush_interval = 1.0
+        self.stale_seconds = 300
+        self._collectors = {}  # {指标名: (说明, 标签名, collect() -> {标签值: 数值})}
+
+    def init_app(self, app):
+        deployment = f'{app.root_path}|{app.config.get("SQLALCHEMY_DATABASE_URI")}'
+        self.spool_dir = app.config.get('MOCK_METRICS_DIR') or os.path.join(tempfile.gettempdir(),
+            f'mock_metrics-{hashlib.sha1(deployment.encode("utf-8")).hexdigest()[:12]}')
+        self.flush_interval = app.config.get('MOCK_METRICS_FLUSH_INTERVAL', self.flush_interval)
+        self.stale_seconds = app.config.get('MOCK_METRICS_STALE_SECONDS', self.stale_seconds)
+
+    def register_collector(self, name, help_text, label, collect):
+        """
+        注册额外的计数器，随 Mock 执行指标一起按进程汇总
+
+        Args:
+            name: 指标名
+            help_text: 指标说明
+            label: 标签名
+            collect: 返回 {标签值: 累计值} 的函数
+        """
+        self._collectors[name] = (help_text, label, collect)
+
+    def observe(self, result, method, serialize_seconds, size, status_code=None):
+        """
+        记录一次 Mock 执行
+
+        Args:
+            result: MockResponse
+            method: HTTP 方法
+            serialize_seconds: 序列化耗时，静态响应为 0
+            size: 响应体字节数
+            status_code: 实际返回的状态码（协商缓存命中时为 304），默认取 Mock 配置的状态码
+        """
+        series = self._series((str(result.mock_id or ''), method, result.mock_path or '<unmatched>',
+            str(status_code or result.status_code)))
+        series['requests_total'] += 1
+        self._histogram(series, 'lookup_seconds', result.lookup_seconds)
+        self._histogram(series, 'render_seconds', result.render_seconds)
+        self._histogram(series, 'serialize_seconds', serialize_seconds)
+        self._histogram(series, 'response_size_bytes', size)
+
+    def observe_stream(self, result, method):
+        """
+        包装流式响应，输出完毕后记录一次执行（序列化耗时包含逐块渲染的时间）
+
+        Yields:
+            bytes: result.stream 产出的数据块
+        """
+        started = time.perf_counter()
+        size = 0
+        for chunk in result.stream:
+            size += len(chunk)
+            yield chunk
+        self.observe(result, method, time.perf_counter() - started, size)
+
+    def observe_miss(self, method, lookup_seconds):
+        """记录未匹配到 Mock 的请求"""
+        series = self._series(('', method, '<unmatched>', '404'))
+        series['requests_total'] += 1
+        self._histogram(series, 'lookup_seconds', lookup_seconds)
+
+    @staticmethod
+    def _histogram(series, name, value):
+        buckets = HISTOGRAMS[name]
+        counts = series[name]
+        counts[bisect_left(buckets, value)] += 1
+        counts[-2] += value  # sum
+        counts[-1] += 1  # count
+
+    def _series(self, labels):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None or self._pid != os.getpid():
+            shard = self._new_shard()
+        series = shard.get(labels)
+        if series is None:
+            series = {'requests_total': 0}
+            for name, buckets in HISTOGRAMS.items():
+                # len(buckets) + 1 个分桶（含 +Inf），再加 sum、count
+                series[name] = [0] * (len(buckets) + 3)
+            shard[labels] = series
+        return series
+
+    def _new_shard(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # gunicorn fork 之后丢弃父进程的数据，使用新的文件名
+                self._shards = []
+                self._pid = os.getpid()
+                self._file_name = f'{self._pid}-{int(time.time() * 1000)}.json'
+                self._flusher = None
+                # fork 时父进程的写入线程可能正持有锁
+                self._flush_lock = threading.Lock()
+            shard = {}
+            self._shards.append(shard)
+            self._local.shard = shard
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='mock-metrics-flusher', daemon=True)
+                self._flusher.start()
+            return shard
+
+    def snapshot(self):
+        """合并本进程所有线程分片"""
+        merged = {}
+        for shard in list(self._shards):
+            for _ in range(3):
+                try:
+                    items = list(shard.items())
+                    break
+                except RuntimeError:
+                    # 其它线程正在插入新序列，重试
+                    continue
+            else:
+                items = []
+            for labels, series in items:
+                self._merge(merged, labels, series)
+        return merged
+
+    @staticmethod
+    def _merge(merged, labels, series):
+        target = merged.get(labels)
+        if target is None:
+            merged[labels] = {name: (list(value) if isinstance(value, list) else value)
+                for name, value in series.items()}
+            return
+        for name, value in series.items():
+            if isinstance(value, list):
+                target[name] = [a + b for a, b in zip(target[name], value)]
+            else:
+                target[name] += value
+
+    def flush(self):
+        """
+        把本进程累计值写入汇总目录
+
+        先写唯一命名的临时文件再改名，读取方不会读到半个文件；后台线程与 collect() 同时写入时按锁串行，
+        互不覆盖对方的临时文件
+        """
+        if self._file_name is None:
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with self._flush_lock:
+            data = {'series': [[list(labels), series] for labels, series in self.snapshot().items()],
+                'counters': {name: collect() for name, (_, _, collect) in self._collectors.items()}}
+            path = os.path.join(self.spool_dir, self._file_name)
+            fd, tmp_path = tempfile.mkstemp(dir=self.spool_dir, prefix=f'{self._file_name}.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Mock 指标写入失败: {str(e)}")
+
+    def collect(self):
+        """
+        汇总所有工作进程的指标
+
+        Returns:
+            tuple: ({标签: 序列}, {计数器名: {标签值: 数值}})
+        """
+        self.flush()
+        merged = {}
+        counters = {}
+        if not os.path.isdir(self.spool_dir):
+            return merged, counters
+        now = time.time()
+        for file_name in os.listdir(self.spool_dir):
+            if not file_name.endswith('.json'):
+                continue
+            path = os.path.join(self.spool_dir, file_name)
+            try:
+                if self.stale_seconds and now - os.path.getmtime(path) > self.stale_seconds:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for labels, series in data.get('series', []):
+                self._merge(merged, tuple(labels), series)
+            for name, values in data.get('counters', {}).items():
+                target = counters.setdefault(name, {})
+                for label_value, value in values.items():
+                    target[label_value] = target.get(label_value, 0) + value
+        return merged, counters
+
+    def render_prometheus(self):
+        """输出 Prometheus 文本格式"""
+        merged, counters = self.collect()
+        lines = ['# HELP mock_requests_total Mock 执行次数', '# TYPE mock_requests_total counter']
+        for labels, series in merged.items():
+            lines.append(f'mock_requests_total{{{self._labels(labels)}}} {series["requests_total"]}')
+
+        for name, buckets in HISTOGRAMS.items():
+            metric = f'mock_{name}'
+            lines.append(f'# TYPE {metric} histogram')
+            for labels, series in merged.items():
+                label_text = self._labels(labels)
+                counts = series[name]
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label_text}}} {counts[-2]}')
+                lines.append(f'{metric}_count{{{label_text}}} {counts[-1]}')
+
+        for name, values in counters.items():
+            help_text, label, _ = self._collectors.get(name, ('', 'key', None))
+            lines.append(f'# HELP mock_{name} {help_text}')
+            lines.append(f'# TYPE mock_{name} counter')
+            for label_value, value in values.items():
+                label_value = label_value.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'mock_{name}{{{label}="{label_value}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _labels(labels):
+        mock_id, method, path, status = labels
+        path = path.replace('\\', '\\\\').replace('"', '\\"')
+        return f'mock_id="{mock_id}",method="{method}",path="{path}",status="{status}"'
+
+
+mock_metrics = MockMetrics()
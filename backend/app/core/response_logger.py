@@ -8,22 +8,41 @@
 """
 
 import json
+import os
+import queue
+import random
+import threading
 import time
-from flask import request
+from flask import request, current_app
 from ..core.log_util import Logger
 
 logger = Logger()
 
 
 class ResponseLogger:
-    """响应日志记录器"""
+    """
+    响应日志记录器
+
+    请求线程只做采样判断并把原始数据放入队列，解析、截断和 JSON 格式化都在后台线程完成。
+    相关配置（见 Config）：
+        RESPONSE_LOG_SAMPLE_RATE: 默认采样率，0 ~ 1
+        RESPONSE_LOG_SAMPLE_RATES: 按蓝图名覆盖采样率，如 {"mock_execute": 0.01}
+        RESPONSE_LOG_BODY_LIMIT: 请求体/响应体最多记录的字节数
+        RESPONSE_LOG_QUEUE_SIZE: 队列长度，队列满时丢弃并计数
+    """
+
+    _queue = None
+    _worker = None
+    _pid = None
+    _lock = threading.Lock()
+    dropped = 0
 
     @staticmethod
     def init_app(blueprint):
         """初始化响应日志记录"""
         @blueprint.after_request
         def after_request(response):
-            ResponseLogger.log_request_response(request, response)
+            ResponseLogger.log_request_response(request, response, blueprint.name)
             return response
 
         @blueprint.before_request
@@ -31,53 +50,102 @@ class ResponseLogger:
             request.start_time = time.time()
 
     @staticmethod
-    def log_request_response(request, response):
-        """记录请求和响应信息"""
+    def log_request_response(request, response, blueprint_name=None):
+        """采样并把请求和响应信息放入日志队列"""
+        config = current_app.config
+        sample_rate = config.get('RESPONSE_LOG_SAMPLE_RATES', {}).get(blueprint_name,
+            config.get('RESPONSE_LOG_SAMPLE_RATE', 1))
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return
+
         # 计算请求处理时间
         duration = time.time() - getattr(request, 'start_time', time.time())
+        limit = config.get('RESPONSE_LOG_BODY_LIMIT', 4096)
 
-        # 构建日志信息
-        log_data = {'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'), 'method': request.method, 'path': request.path,
-            'endpoint': request.endpoint or '', 'status_code': response.status_code, 'duration': f"{duration:.3f}s",
-            'ip': request.remote_addr, 'user_agent': request.headers.get('User-Agent', '')}
+        # 只取已经存在的原始字节，不在请求线程里解析 JSON
+        request_body = None
+        if request.method in ['POST', 'PUT', 'PATCH']:
+            request_body = ResponseLogger._head(request.get_data(cache=True), limit)
 
-        # 记录请求参数
-        if request.args:
-            log_data['query_params'] = request.args.to_dict()
+        response_body = None
+        if response.content_type == 'application/json' and not response.is_streamed:
+            response_body = ResponseLogger._head(response.get_data(), limit)
 
-        # 记录请求体（仅对 POST/PUT 方法）
-        if request.method in ['POST', 'PUT', 'PATCH']:
-            request_json = request.get_json(silent=True)
-            if request_json:
-                log_data['request_body'] = request_json
+        item = (time.time(), request.method, request.path, request.endpoint or '', response.status_code, duration,
+            request.remote_addr, request.headers.get('User-Agent', ''), request.query_string, request_body,
+            response_body)
+        ResponseLogger._enqueue(item, config.get('RESPONSE_LOG_QUEUE_SIZE', 10000))
 
-        # 记录响应数据
-        if response.content_type == 'application/json':
-            try:
-                response_data = response.get_json()
-                log_data['response_body'] = response_data
-            except:
-                log_data['response_body'] = 'Non-JSON response'
+    @staticmethod
+    def _head(data, limit):
+        """截断原始字节，返回 (字节, 原始长度)"""
+        if not data:
+            return None
+        return data[:limit], len(data)
 
-        # 格式化输出日志
-        ResponseLogger._print_log(log_data)
+    @staticmethod
+    def _enqueue(item, queue_size):
+        if ResponseLogger._pid != os.getpid():
+            ResponseLogger._start_worker(queue_size)
+        try:
+            ResponseLogger._queue.put_nowait(item)
+        except queue.Full:
+            ResponseLogger.dropped += 1
 
     @staticmethod
-    def _print_log(log_data):
-        """格式化打印日志"""
-        logger.info(f"{'=' * 90}")
-        logger.info(f"时间: {log_data['timestamp']} 状态码: {log_data['status_code']} 耗时: {log_data['duration']} 客户端: {log_data['ip']}")
-        logger.info(f"方法: {log_data['method']} 路径: {log_data['path']} 端点: {log_data['endpoint']}")
+    def _start_worker(queue_size):
+        # gunicorn fork 之后子进程需要自己的队列和后台线程
+        with ResponseLogger._lock:
+            if ResponseLogger._pid == os.getpid():
+                return
+            ResponseLogger._queue = queue.Queue(maxsize=queue_size)
+            ResponseLogger._worker = threading.Thread(target=ResponseLogger._consume, args=(ResponseLogger._queue,),
+                name='response-logger', daemon=True)
+            ResponseLogger._worker.start()
+            ResponseLogger._pid = os.getpid()
+
+    @staticmethod
+    def _consume(log_queue):
+        while True:
+            item = log_queue.get()
+            try:
+                ResponseLogger._print_log(ResponseLogger._build_log_data(item))
+            except Exception as e:
+                print(f"响应日志记录失败: {str(e)}")
+
+    @staticmethod
+    def _build_log_data(item):
+        """在后台线程中构建结构化日志"""
+        (timestamp, method, path, endpoint, status_code, duration, ip, user_agent, query_string, request_body,
+            response_body) = item
+
+        log_data = {'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)), 'method': method,
+            'path': path, 'endpoint': endpoint, 'status_code': status_code, 'duration': f"{duration:.3f}s", 'ip': ip,
+            'user_agent': user_agent}
+
+        # 记录请求参数
+        if query_string:
+            log_data['query_string'] = query_string.decode('utf-8', 'replace')
 
-        if 'query_params' in log_data and log_data['query_params']:
-            logger.info(f"查询参数: {json.dumps(log_data['query_params'], ensure_ascii=False)}")
+        # 记录请求体和响应体
+        if request_body:
+            log_data['request_body'] = ResponseLogger._decode_body(*request_body)
+        if response_body:
+            log_data['response_body'] = ResponseLogger._decode_body(*response_body)
 
-        if 'request_body' in log_data:
-            # logger.info(f"请求体: {json.dumps(log_data['request_body'], ensure_ascii=False, indent=2)}")  # indent=2 表示格式化
-            logger.info(f"请求体: {json.dumps(log_data['request_body'], ensure_ascii=False)}")
+        return log_data
 
-        if 'response_body' in log_data:
-            # logger.info(f"响应体: {json.dumps(log_data['response_body'], ensure_ascii=False, indent=2)}")  # indent=2 表示格式化
-            logger.info(f"响应体: {json.dumps(log_data['response_body'], ensure_ascii=False)}")
+    @staticmethod
+    def _decode_body(data, size):
+        """完整的 JSON 按对象输出，被截断的按文本输出并标注原始大小"""
+        if len(data) == size:
+            try:
+                return json.loads(data)
+            except ValueError:
+                return data.decode('utf-8', 'replace')
+        return f"{data.decode('utf-8', 'ignore')}...(truncated, {size} bytes)"
 
-        logger.info(f"{'=' * 90}\n")
\ No newline at end of file
+    @staticmethod
+    def _print_log(log_data):
+        """输出单行结构化 JSON 日志"""
+        logger.info(json.dumps(log_data, ensure_ascii=False))
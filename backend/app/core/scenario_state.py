@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 20:40
+@description  场景状态存储 - 有状态 Mock 的键值与集合存储（数据库共享或单进程内存），支持过期与容量上限
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows 本地调试时不检查单进程占用
+    fcntl = None
+
+from .exceptions import APIException
+from .scenario_state_db import COLLECTION, VALUE, DatabaseScenarioStore
+
+
+class ScenarioNamespace:
+    """
+    单个场景的状态
+
+    - values: 键值，{键: 值}
+    - collections: 资源集合，{集合名: OrderedDict(资源ID: 资源)}
+    - expires: 键或集合的过期时间戳（最后一次写入 + TTL），{(VALUE / COLLECTION, 名称): 时间戳}，
+      同名的键与集合各自过期、各自淘汰
+    """
+
+    __slots__ = ('name', 'values', 'collections', 'expires', 'next_ids', 'lock')
+
+    def __init__(self, name):
+        self.name = name
+        self.values = OrderedDict()
+        self.collections = OrderedDict()
+        self.expires = {}
+        self.next_ids = {}  # {集合名: 下一个自增ID}
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {'values': dict(self.values),
+            'collections': {name: list(items.items()) for name, items in self.collections.items()},
+            'expires': {kind: {name: deadline for (item_kind, name), deadline in self.expires.items()
+                if item_kind == kind} for kind in (VALUE, COLLECTION)},
+            'next_ids': dict(self.next_ids)}
+
+    @classmethod
+    def from_dict(cls, name, data):
+        namespace = cls(name)
+        namespace.values.update(data.get('values', {}))
+        for collection, items in data.get('collections', {}).items():
+            namespace.collections[collection] = OrderedDict((str(item_id), item) for item_id, item in items)
+        for kind, deadlines in data.get('expires', {}).items():
+            namespace.expires.update(((kind, name), deadline) for name, deadline in deadlines.items())
+        namespace.next_ids.update(data.get('next_ids', {}))
+        return namespace
+
+
+class ScenarioStateStore:
+    """
+    场景状态内存存储（SCENARIO_STATE_BACKEND=memory）
+
+    - 读写都在内存中完成，执行 Mock 时不访问数据库
+    - 状态只在一个进程中：首次访问时以排他锁占用锁文件，同一部署的其它工作进程访问场景状态时返回 503，
+      避免请求落到不同工作进程时读到各自不同的状态；需要多进程时使用数据库存储（DatabaseScenarioStore）
+    - 每个场景一把锁，不同场景之间互不阻塞
+    - 键与集合在最后一次写入 ttl 秒后过期（读取时惰性清理），ttl 为 0 时不过期
+    - 容量上限：场景数 max_scenarios、每个场景的键与集合数 max_keys、每个集合的资源数 max_items，
+      超出时淘汰最早创建的场景 / 最久未写入的键或集合 / 最早创建的资源
+    - 配置 persist_path 时后台线程每 flush_interval 秒把有变化的状态写入本进程的文件 <persist_path>.<pid>；
+      启动时合并 persist_path 与各进程的文件（同名的键或集合以最后写入的为准），合并结果写回 persist_path，
+      并删除已退出进程的文件，工作进程重启后状态不丢失
+    """
+
+    def __init__(self):
+        self.ttl = 3600
+        self.max_scenarios = 100
+        self.max_keys = 1000
+        self.max_items = 10000
+        self.persist_path = None
+        self.flush_interval = 1.0
+        self._namespaces = OrderedDict()  # {场景名: ScenarioNamespace}，按创建顺序排列
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._pid = None
+        self.lock_path = os.path.join(tempfile.gettempdir(), 'scenario_state.lock')
+        self._owner_pid = None
+        self._owner_file = None
+
+    def init_app(self, app):
+        self.ttl = app.config.get('SCENARIO_STATE_TTL', self.ttl)
+        self.max_scenarios = app.config.get('SCENARIO_STATE_MAX_SCENARIOS', self.max_scenarios)
+        self.max_keys = app.config.get('SCENARIO_STATE_MAX_KEYS', self.max_keys)
+        self.max_items = app.config.get('SCENARIO_STATE_MAX_ITEMS', self.max_items)
+        self.persist_path = app.config.get('SCENARIO_STATE_PERSIST_PATH') or self.persist_path
+        self.flush_interval = app.config.get('SCENARIO_STATE_FLUSH_INTERVAL', self.flush_interval)
+        if self.persist_path:
+            self.lock_path = f'{self.persist_path}.lock'
+        else:
+            # 按部署区分，同一台机器上的多个部署各自占用
+            deployment = f'{app.root_path}|{app.config.get("SQLALCHEMY_DATABASE_URI")}'
+            self.lock_path = os.path.join(tempfile.gettempdir(),
+                f'scenario_state-{hashlib.sha1(deployment.encode("utf-8")).hexdigest()[:12]}.lock')
+        if self.persist_path:
+            self.load()
+
+    # ---- 键值 ----
+
+    def get(self, scenario, key, default=None):
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            if self._expired(namespace, VALUE, key):
+                return default
+            return namespace.values.get(key, default)
+
+    def set(self, scenario, key, value):
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            namespace.values[key] = value
+            namespace.values.move_to_end(key)
+            self._touch(namespace, VALUE, key)
+        self._mark_dirty()
+        return value
+
+    def delete(self, scenario, key):
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            namespace.expires.pop((VALUE, key), None)
+            value = namespace.values.pop(key, None)
+        self._mark_dirty()
+        return value
+
+    # ---- 资源集合 ----
+
+    def list_items(self, scenario, collection, default=None):
+        """集合中的全部资源，集合不存在时返回 default（默认空列表）"""
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            expired = self._expired(namespace, COLLECTION, collection)
+            items = None if expired else namespace.collections.get(collection)
+            if items is None:
+                return [] if default is None else default
+            return list(items.values())
+
+    def get_item(self, scenario, collection, item_id):
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            if self._expired(namespace, COLLECTION, collection):
+                return None
+            return namespace.collections.get(collection, {}).get(str(item_id))
+
+    def create_item(self, scenario, collection, item, id_field='id'):
+        """
+        新增资源，资源中没有 id_field 时分配自增ID
+
+        Returns:
+            dict: 保存后的资源
+        """
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            self._expired(namespace, COLLECTION, collection)
+            items = namespace.collections.get(collection)
+            if items is None:
+                items = namespace.collections[collection] = OrderedDict()
+            item = dict(item)
+            if item.get(id_field) in (None, ''):
+                next_id = namespace.next_ids.get(collection, 1)
+                while str(next_id) in items:
+                    next_id += 1
+                namespace.next_ids[collection] = next_id + 1
+                item[id_field] = next_id
+            items[str(item[id_field])] = item
+            while len(items) > self.max_items:
+                items.popitem(last=False)
+            namespace.collections.move_to_end(collection)
+            self._touch(namespace, COLLECTION, collection)
+        self._mark_dirty()
+        return item
+
+    def update_item(self, scenario, collection, item_id, changes, replace=False, id_field='id'):
+        """
+        修改资源：默认合并字段，replace 为 True 时整体替换（资源ID不变）
+
+        Returns:
+            dict: 修改后的资源，不存在时返回 None
+        """
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            if self._expired(namespace, COLLECTION, collection):
+                return None
+            items = namespace.collections.get(collection, {})
+            current = items.get(str(item_id))
+            if current is None:
+                return None
+            # 整体替换而不是原地修改，已取出的资源不会被并发请求改动
+            item = dict(changes) if replace else {**current, **changes}
+            item[id_field] = current[id_field] if id_field in current else item_id
+            items[str(item_id)] = item
+            self._touch(namespace, COLLECTION, collection)
+        self._mark_dirty()
+        return item
+
+    def delete_item(self, scenario, collection, item_id):
+        """
+        删除资源
+
+        Returns:
+            dict: 被删除的资源，不存在时返回 None
+        """
+        namespace = self._namespace(scenario)
+        with namespace.lock:
+            if self._expired(namespace, COLLECTION, collection):
+                return None
+            item = namespace.collections.get(collection, {}).pop(str(item_id), None)
+        if item is not None:
+            self._mark_dirty()
+        return item
+
+    # ---- 场景 ----
+
+    def reset(self, scenario=None):
+        """
+        清空场景状态，scenario 为空时清空所有场景
+
+        Returns:
+            int: 被清空的场景数
+        """
+        self._claim()
+        with self._lock:
+            if scenario is None:
+                count = len(self._namespaces)
+                self._namespaces.clear()
+            else:
+                count = 1 if self._namespaces.pop(scenario, None) is not None else 0
+        self._mark_dirty()
+        return count
+
+    def snapshot(self, scenario):
+        """场景当前状态（已过期的键与集合不包含在内）"""
+        self._claim()
+        with self._lock:
+            namespace = self._namespaces.get(scenario)
+        if namespace is None:
+            return {'values': {}, 'collections': {}}
+        with namespace.lock:
+            for kind, key in list(namespace.expires):
+                self._expired(namespace, kind, key)
+            return {'values': dict(namespace.values),
+                'collections': {name: list(items.values()) for name, items in namespace.collections.items()}}
+
+    def scenarios(self):
+        self._claim()
+        with self._lock:
+            return list(self._namespaces)
+
+    def _claim(self):
+        """占用内存状态：同一时刻只有一个进程持有锁文件的排他锁，进程退出时自动释放"""
+        if self._owner_pid == os.getpid() or fcntl is None:
+            return
+        with self._lock:
+            if self._owner_pid == os.getpid():
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise APIException('Scenario state is held by another worker', 503, {
+                    'details': '内存场景状态只能在一个工作进程中使用：以单个工作进程运行（如 gunicorn -w 1 --threads 16），'
+                               '或设置 SCENARIO_STATE_BACKEND=database 由各工作进程共享', 'lock': self.lock_path})
+            self._owner_file = lock_file
+            self._owner_pid = os.getpid()
+
+    def _namespace(self, scenario):
+        self._claim()
+        namespace = self._namespaces.get(scenario)
+        if namespace is not None:
+            return namespace
+        with self._lock:
+            namespace = self._namespaces.get(scenario)
+            if namespace is None:
+                namespace = self._namespaces[scenario] = ScenarioNamespace(scenario)
+                while len(self._namespaces) > self.max_scenarios:
+                    self._namespaces.popitem(last=False)
+            return namespace
+
+    def _touch(self, namespace, kind, key):
+        """记录写入时间并执行键数量上限（调用方持有场景锁）"""
+        if self.ttl:
+            namespace.expires[(kind, key)] = time.time() + self.ttl
+        while len(namespace.values) + len(namespace.collections) > self.max_keys:
+            # 淘汰最久未写入的键或集合
+            if namespace.expires:
+                oldest = min(namespace.expires, key=namespace.expires.get)
+            elif namespace.values:
+                oldest = (VALUE, next(iter(namespace.values)))
+            else:
+                oldest = (COLLECTION, next(iter(namespace.collections)))
+            self._drop(namespace, *oldest)
+
+    def _expired(self, namespace, kind, key):
+        """键或集合已过期时清理并返回 True（调用方持有场景锁）"""
+        deadline = namespace.expires.get((kind, key))
+        if deadline is None or deadline > time.time():
+            return False
+        self._drop(namespace, kind, key)
+        return True
+
+    @staticmethod
+    def _drop(namespace, kind, key):
+        """删除键或集合，同名的另一种不受影响"""
+        namespace.expires.pop((kind, key), None)
+        if kind == VALUE:
+            namespace.values.pop(key, None)
+        else:
+            namespace.collections.pop(key, None)
+            namespace.next_ids.pop(key, None)
+
+    # ---- 持久化 ----
+
+    def _mark_dirty(self):
+        if not self.persist_path:
+            return
+        self._dirty = True
+        if self._pid != os.getpid():
+            self._start_flusher()
+
+    def _start_flusher(self):
+        # gunicorn fork 之后子进程需要自己的后台线程
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._flush_loop, name='scenario-state-flusher', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                if self._dirty:
+                    self.flush()
+            except Exception as e:
+                print(f"场景状态写入失败: {str(e)}")
+
+    def flush(self):
+        """把所有场景写入本进程的持久化文件"""
+        self._dirty = False
+        with self._lock:
+            namespaces = list(self._namespaces.values())
+        data = {}
+        for namespace in namespaces:
+            with namespace.lock:
+                # 只复制容器，资源本身在修改时整体替换，序列化可以放到锁外
+                data[namespace.name] = namespace.to_dict()
+        self._write(f'{self.persist_path}.{os.getpid()}', data)
+
+    def load(self):
+        """从持久化文件加载场景状态（按修改时间从旧到新合并 persist_path 与各进程的文件）"""
+        paths = [self.persist_path] if os.path.isfile(self.persist_path) else []
+        paths += [path for path in glob.glob(f'{glob.escape(self.persist_path)}.*')
+            if path.rsplit('.', 1)[-1].isdigit()]
+        if not paths:
+            return
+        data = {}
+        for path in sorted(paths, key=self._mtime):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    content = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"场景状态加载失败: {path}: {str(e)}")
+                continue
+            for name, item in content.items():
+                self._merge(data.setdefault(name, {}), item)
+        with self._lock:
+            self._namespaces = OrderedDict((name, ScenarioNamespace.from_dict(name, item))
+                for name, item in data.items())
+
+        # 合并结果写回 persist_path 之后，已退出进程的文件不再需要
+        try:
+            self._write(self.persist_path, data)
+        except OSError as e:
+            print(f"场景状态写入失败: {str(e)}")
+            return
+        for path in paths:
+            if path != self.persist_path and not self._alive(int(path.rsplit('.', 1)[-1])):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _merge(target, item):
+        """
+        把一个文件中的场景合并到 target：同名的键与集合取最后写入的（按过期时间比较，
+        ttl 为 0 时没有过期时间，以较新的文件为准），自增ID取较大值
+        """
+        for section, kind in (('values', VALUE), ('collections', COLLECTION)):
+            current = target.setdefault(section, {})
+            expires = target.setdefault('expires', {}).setdefault(kind, {})
+            item_expires = item.get('expires', {}).get(kind, {})
+            for key, value in item.get(section, {}).items():
+                deadline = item_expires.get(key)
+                if key in current and deadline is not None and deadline < expires.get(key, deadline):
+                    continue
+                current[key] = value
+                if deadline is not None:
+                    expires[key] = deadline
+        next_ids = target.setdefault('next_ids', {})
+        for collection, next_id in item.get('next_ids', {}).items():
+            next_ids[collection] = max(next_ids.get(collection, 0), next_id)
+
+    @staticmethod
+    def _write(path, data):
+        # 先写临时文件再改名，读取方不会读到写了一半的文件
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _alive(pid):
+        """进程是否仍在运行（本进程的旧文件来自复用了同一 pid 的已退出进程）"""
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+
+class ScenarioStates:
+    """
+    场景状态存储入口，按 SCENARIO_STATE_BACKEND 选择实现，接口相同
+
+    - database（默认）：DatabaseScenarioStore，多个工作进程、多个节点共享，gunicorn -w 16 时
+      创建、查询、删除请求落到不同工作进程也能读到同一份状态，重置对所有工作进程生效
+    - memory：ScenarioStateStore，只能在单个工作进程中使用；无数据库的只读部署（MOCK_SNAPSHOT_ONLY）固定使用
+    """
+
+    BACKENDS = ('database', 'memory')
+
+    def __init__(self):
+        self.backend = 'memory'
+        self._stores = {'database': DatabaseScenarioStore(), 'memory': ScenarioStateStore()}
+
+    def init_app(self, app):
+        backend = app.config.get('SCENARIO_STATE_BACKEND', 'database')
+        if backend not in self.BACKENDS:
+            raise ValueError(f'不支持的场景状态存储: {backend}，可选 {", ".join(self.BACKENDS)}')
+        self.backend = 'memory' if app.config.get('MOCK_SNAPSHOT_ONLY') else backend
+        self._stores[self.backend].init_app(app)
+
+    def __getattr__(self, name):
+        return getattr(self._stores[self.backend], name)
+
+
+scenario_state = ScenarioStates()
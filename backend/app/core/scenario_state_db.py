@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/19 02:10
+@description  场景状态数据库存储 - 多个工作进程、多个节点共享同一份场景状态
+"""
+
+import json
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import db, datetime, tz_beijing
+from ..models.scenario_state_model import ScenarioState
+
+# 键值与资源集合
+VALUE, COLLECTION = 'value', 'collection'
+
+# mutate 返回的标记：不修改 / 删除该行
+_UNCHANGED = object()
+_DELETE = object()
+
+
+class DatabaseScenarioStore:
+    """
+    场景状态数据库存储，接口与 ScenarioStateStore 相同
+
+    - 每个键、每个集合一行（scenario_states），集合的资源与自增ID保存在同一行的 JSON 中
+    - 修改在独立事务中 SELECT ... FOR UPDATE 锁定该行后读改写，并发请求按行串行；
+      首次写入时两个进程同时插入，后插入的一方唯一约束冲突后重试
+    - 过期、容量上限与内存存储一致：ttl 秒未写入的键与集合视为不存在（写入时删除），
+      超出 max_keys / max_scenarios 时淘汰最久未写入的键或集合 / 最早创建的场景
+    - 不在 ORM 会话中执行，不影响 Mock 执行所在请求的会话
+    """
+
+    def __init__(self):
+        self.ttl = 3600
+        self.max_scenarios = 100
+        self.max_keys = 1000
+        self.max_items = 10000
+
+    def init_app(self, app):
+        self.ttl = app.config.get('SCENARIO_STATE_TTL', self.ttl)
+        self.max_scenarios = app.config.get('SCENARIO_STATE_MAX_SCENARIOS', self.max_scenarios)
+        self.max_keys = app.config.get('SCENARIO_STATE_MAX_KEYS', self.max_keys)
+        self.max_items = app.config.get('SCENARIO_STATE_MAX_ITEMS', self.max_items)
+
+    # ---- 键值 ----
+
+    def get(self, scenario, key, default=None):
+        data = self._read(scenario, VALUE, key)
+        return default if data is None else data['value']
+
+    def set(self, scenario, key, value):
+        self._write(scenario, VALUE, key, lambda current: ({'value': value}, value))
+        return value
+
+    def delete(self, scenario, key):
+        return self._write(scenario, VALUE, key,
+            lambda current: (_UNCHANGED, None) if current is None else (_DELETE, current['value']))
+
+    # ---- 资源集合 ----
+
+    def list_items(self, scenario, collection, default=None):
+        """集合中的全部资源，集合不存在时返回 default（默认空列表）"""
+        data = self._read(scenario, COLLECTION, collection)
+        if data is None:
+            return [] if default is None else default
+        return [item for _, item in data['items']]
+
+    def get_item(self, scenario, collection, item_id):
+        data = self._read(scenario, COLLECTION, collection)
+        if data is None:
+            return None
+        return dict(data['items']).get(str(item_id))
+
+    def create_item(self, scenario, collection, item, id_field='id'):
+        """
+        新增资源，资源中没有 id_field 时分配自增ID
+
+        Returns:
+            dict: 保存后的资源
+        """
+
+        def mutate(current):
+            data = current or {'items': [], 'next_id': 1}
+            items = dict(data['items'])
+            saved = dict(item)
+            if saved.get(id_field) in (None, ''):
+                next_id = data['next_id']
+                while str(next_id) in items:
+                    next_id += 1
+                data['next_id'] = next_id + 1
+                saved[id_field] = next_id
+            items[str(saved[id_field])] = saved
+            data['items'] = list(items.items())[-self.max_items:]
+            return data, saved
+
+        return self._write(scenario, COLLECTION, collection, mutate)
+
+    def update_item(self, scenario, collection, item_id, changes, replace=False, id_field='id'):
+        """
+        修改资源：默认合并字段，replace 为 True 时整体替换（资源ID不变）
+
+        Returns:
+            dict: 修改后的资源，不存在时返回 None
+        """
+
+        def mutate(current):
+            items = dict(current['items']) if current is not None else {}
+            existing = items.get(str(item_id))
+            if existing is None:
+                return _UNCHANGED, None
+            saved = dict(changes) if replace else {**existing, **changes}
+            saved[id_field] = existing[id_field] if id_field in existing else item_id
+            items[str(item_id)] = saved
+            return dict(current, items=list(items.items())), saved
+
+        return self._write(scenario, COLLECTION, collection, mutate)
+
+    def delete_item(self, scenario, collection, item_id):
+        """
+        删除资源
+
+        Returns:
+            dict: 被删除的资源，不存在时返回 None
+        """
+
+        def mutate(current):
+            items = dict(current['items']) if current is not None else {}
+            removed = items.pop(str(item_id), None)
+            if removed is None:
+                return _UNCHANGED, None
+            return dict(current, items=list(items.items())), removed
+
+        return self._write(scenario, COLLECTION, collection, mutate)
+
+    # ---- 场景 ----
+
+    def reset(self, scenario=None):
+        """
+        清空场景状态，scenario 为空时清空所有场景
+
+        Returns:
+            int: 被清空的场景数
+        """
+        table = ScenarioState.__table__
+        with db.engine.begin() as connection:
+            query = select(func.count(table.c.scenario.distinct()))
+            statement = delete(table)
+            if scenario is not None:
+                query = query.where(table.c.scenario == scenario)
+                statement = statement.where(table.c.scenario == scenario)
+            count = connection.execute(query).scalar()
+            connection.execute(statement)
+        return count
+
+    def snapshot(self, scenario):
+        """场景当前状态（已过期的键与集合不包含在内）"""
+        table = ScenarioState.__table__
+        values, collections = {}, {}
+        with db.engine.connect() as connection:
+            rows = connection.execute(select(table.c.kind, table.c.name, table.c.data).where(
+                table.c.scenario == scenario, self._alive(table)).order_by(table.c.updated_at, table.c.id))
+            for kind, name, data in rows:
+                data = json.loads(data)
+                if kind == VALUE:
+                    values[name] = data['value']
+                else:
+                    collections[name] = [item for _, item in data['items']]
+        return {'values': values, 'collections': collections}
+
+    def scenarios(self):
+        table = ScenarioState.__table__
+        with db.engine.connect() as connection:
+            return list(connection.execute(select(table.c.scenario).where(self._alive(table)).group_by(
+                table.c.scenario).order_by(func.min(table.c.created_at))).scalars())
+
+    # ---- 读写 ----
+
+    def _read(self, scenario, kind, name):
+        table = ScenarioState.__table__
+        with db.engine.connect() as connection:
+            data = connection.execute(select(table.c.data).where(table.c.scenario == scenario,
+                table.c.kind == kind, table.c.name == name, self._alive(table))).scalar()
+        return None if data is None else json.loads(data)
+
+    def _write(self, scenario, kind, name, mutate, retries=3):
+        """
+        锁定 (scenario, kind, name) 行后读改写
+
+        Args:
+            mutate: (当前数据或 None) -> (新数据 / _UNCHANGED / _DELETE, 返回值)
+
+        Returns:
+            mutate 的返回值
+        """
+        table = ScenarioState.__table__
+        for attempt in range(retries):
+            try:
+                with db.engine.begin() as connection:
+                    row = connection.execute(select(table.c.id, table.c.data, table.c.expires_at).where(
+                        table.c.scenario == scenario, table.c.kind == kind, table.c.name == name).with_for_update()
+                    ).first()
+                    now = datetime.now(tz_beijing)
+                    expired = row is not None and row.expires_at is not None and self._naive(row.expires_at) <= \
+                        self._naive(now)
+                    current = None if row is None or expired else json.loads(row.data)
+                    data, result = mutate(current)
+                    if data is _UNCHANGED:
+                        if expired:
+                            connection.execute(delete(table).where(table.c.id == row.id))
+                        return result
+                    if data is _DELETE:
+                        connection.execute(delete(table).where(table.c.id == row.id))
+                        return result
+
+                    values = {'data': json.dumps(data, ensure_ascii=False, default=str), 'updated_at': now,
+                        'expires_at': now + timedelta(seconds=self.ttl) if self.ttl else None}
+                    if row is not None:
+                        connection.execute(update(table).where(table.c.id == row.id).values(**values))
+                        return result
+                    is_new_scenario = connection.execute(select(table.c.id).where(
+                        table.c.scenario == scenario).limit(1)).first() is None
+                    connection.execute(insert(table).values(scenario=scenario, kind=kind, name=name, created_at=now,
+                        **values))
+                    self._evict(connection, scenario, is_new_scenario)
+                    return result
+            except IntegrityError:
+                # 另一个进程同时插入了同一行，重新读取后在该行上修改
+                if attempt == retries - 1:
+                    raise
+                time.sleep(0.01 * (attempt + 1))
+
+    def _evict(self, connection, scenario, is_new_scenario):
+        """新增键或集合后执行容量上限：过期行、超出 max_keys 的最久未写入行、超出 max_scenarios 的最早场景"""
+        table = ScenarioState.__table__
+        now = datetime.now(tz_beijing)
+        connection.execute(delete(table).where(table.c.scenario == scenario, table.c.expires_at <= now))
+        overflow = connection.execute(select(func.count()).where(table.c.scenario == scenario)).scalar() - \
+            self.max_keys
+        if overflow > 0:
+            ids = connection.execute(select(table.c.id).where(table.c.scenario == scenario).order_by(
+                table.c.updated_at, table.c.id).limit(overflow)).scalars().all()
+            connection.execute(delete(table).where(table.c.id.in_(ids)))
+        if not is_new_scenario:
+            return
+        scenarios = connection.execute(select(table.c.scenario).group_by(table.c.scenario).order_by(
+            func.min(table.c.created_at), func.min(table.c.id))).scalars().all()
+        stale = scenarios[:max(0, len(scenarios) - self.max_scenarios)]
+        if stale:
+            connection.execute(delete(table).where(table.c.scenario.in_(stale)))
+
+    @staticmethod
+    def _alive(table):
+        return or_(table.c.expires_at.is_(None), table.c.expires_at > datetime.now(tz_beijing))
+
+    @staticmethod
+    def _naive(value):
+        # 数据库读出的时间不带时区（按北京时间写入）
+        return value.replace(tzinfo=None) if value.tzinfo else value
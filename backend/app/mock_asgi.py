@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 14:30
+@description  Mock 执行的 ASGI 入口 - 响应延迟通过 asyncio.sleep 等待，不占用工作线程
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qsl
+
+from .core.exceptions import APIException
+from .core.mock_metrics import mock_metrics
+from .services.mock_route_table import mock_route_table
+from .services.mock_service import MockService
+from .services.scenario_service import ScenarioService
+
+EXECUTE_PREFIX = '/api/mock/execute/'
+METRICS_PATH = '/api/metrics'
+SCENARIOS_PATH = '/api/mock/scenarios'
+ALLOWED_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+
+class MockASGIApp:
+    """
+    只处理 /api/mock/execute/<path>（以及 /api/metrics）的 ASGI 应用
+
+    与 Flask 入口共用路由表和模板引擎；延迟中的请求只是挂起的协程，
+    单个进程即可同时挂起成千上万个慢响应。
+
+    启动：uvicorn asgi:app --host 0.0.0.0 --port 5002 --workers 4
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    # 启动时预热路由表，避免首个请求在事件循环里查库
+                    await asyncio.to_thread(self._warm_up)
+                except Exception as e:
+                    print(f"Mock 路由表预热失败: {str(e)}")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _warm_up(self):
+        with self.flask_app.app_context():
+            mock_route_table.match('GET', '/')
+
+    async def _http(self, scope, receive, send):
+        path = scope['path']
+        method = scope['method']
+        if path == METRICS_PATH and method == 'GET':
+            # 汇总需要读取多进程指标文件，放到线程中执行
+            body = (await asyncio.to_thread(mock_metrics.render_prometheus)).encode('utf-8')
+            await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/plain; version=0.0.4'),
+                    (b'content-length', str(len(body)).encode('latin-1'))]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+        if path == SCENARIOS_PATH or path.startswith(SCENARIOS_PATH + '/'):
+            await self._scenario(send, path[len(SCENARIOS_PATH):].strip('/'), method)
+            return
+        if not path.startswith(EXECUTE_PREFIX):
+            await self._send_json(send, 404, b'{"error": "Resource not found"}')
+            return
+        if method not in ALLOWED_METHODS:
+            await self._send_json(send, 405, b'{"error": "Method not allowed"}')
+            return
+
+        headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope['headers']}
+        body = await self._read_body(receive)
+        request_data = {'headers': headers, 'args': self._parse_qs(scope['query_string'].decode('latin-1')),
+            'json': self._parse_json(headers, body), 'form': self._parse_form(headers, body), 'body': body}
+
+        try:
+            # 匹配、渲染、代理转发与写库都是阻塞调用，放到线程中执行，事件循环只负责等待延迟与收发数据
+            result, response_body, serialize_seconds = await asyncio.to_thread(
+                self._execute, path[len(EXECUTE_PREFIX):], method, request_data)
+        except APIException as e:
+            error = json.dumps({'error': e.message, 'payload': e.payload}, ensure_ascii=False).encode('utf-8')
+            await self._send_json(send, e.status_code, error)
+            return
+        except Exception as e:
+            error = json.dumps({'error': 'Server error', 'payload': {'details': str(e)}}, ensure_ascii=False)
+            await self._send_json(send, 500, error.encode('utf-8'))
+            return
+
+        if result.delay:
+            await asyncio.sleep(result.delay)
+
+        if result.stream is not None:
+            await self._send_stream(send, result.status_code, mock_metrics.observe_stream(result, method))
+            return
+
+        if not result.is_static:
+            mock_metrics.observe(result, method, serialize_seconds, len(response_body))
+            await self._send_json(send, result.status_code, response_body)
+            return
+
+        extra_headers = [(b'etag', f'"{result.etag}"'.encode('latin-1'))]
+        if method == 'GET' and 200 <= result.status_code < 300 and self._etag_matches(
+                headers.get('If-None-Match'), result.etag):
+            mock_metrics.observe(result, method, 0, 0, 304)
+            await send({'type': 'http.response.start', 'status': 304, 'headers': extra_headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        mock_metrics.observe(result, method, 0, len(result.body))
+        await self._send_json(send, result.status_code, result.body, extra_headers, result.content_type)
+
+    def _execute(self, path, method, request_data):
+        """执行 Mock 并序列化响应体（在线程中调用）"""
+        with self.flask_app.app_context():
+            result = MockService.execute_mock(path, method, request_data)
+            if result.stream is not None or result.is_static:
+                return result, None, 0
+            started = time.perf_counter()
+            response_body = MockService._dumps(result.data).encode('utf-8')
+            return result, response_body, time.perf_counter() - started
+
+    async def _scenario(self, send, name, method):
+        """场景状态的查看与清空，与 app.mock_server 中的路由一致"""
+        parts = name.split('/') if name else []
+        if method == 'GET' and not parts:
+            result = ScenarioService.list_scenarios()
+        elif method == 'GET' and len(parts) == 1:
+            result = ScenarioService.get_state(parts[0])
+        elif method == 'POST' and len(parts) == 2 and parts[1] == 'reset':
+            result = ScenarioService.reset(parts[0])
+        else:
+            await self._send_json(send, 404, b'{"error": "Resource not found"}')
+            return
+        await self._send_json(send, 200, json.dumps(result, ensure_ascii=False, default=str).encode('utf-8'))
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status, body, extra_headers=None, content_type='application/json'):
+        headers = [(b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1'))]
+        if extra_headers:
+            headers.extend(extra_headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    async def _send_stream(send, status, chunks):
+        """不带 Content-Length 分块发送；每块在线程中渲染，避免阻塞事件循环"""
+        await send({'type': 'http.response.start', 'status': status,
+            'headers': [(b'content-type', b'application/json')]})
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    def _parse_qs(query_string):
+        """与 MultiDict.to_dict() 一致：同名参数取第一个值"""
+        result = {}
+        for key, value in parse_qsl(query_string, keep_blank_values=True):
+            result.setdefault(key, value)
+        return result
+
+    @staticmethod
+    def _parse_json(headers, body):
+        content_type = headers.get('Content-Type', '')
+        if not body or not (content_type.startswith('application/json') or '+json' in content_type):
+            return {}
+        try:
+            return json.loads(body) or {}
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _parse_form(headers, body):
+        if not body or not headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+            return {}
+        return MockASGIApp._parse_qs(body.decode('utf-8', 'replace'))
+
+    @staticmethod
+    def _etag_matches(if_none_match, etag):
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(','):
+            candidate = candidate.strip()
+            if candidate == '*':
+                return True
+            if candidate.startswith('W/'):
+                candidate = candidate[2:]
+            if candidate.strip('"') == etag:
+                return True
+        return False
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 15:10
+@description  Mock 执行路由与轻量级 Mock 服务
+
+create_mock_app 只加载 Mock 模型、模板引擎和路由表，不导入管理端蓝图
+（pandas、paramiko、APScheduler 等），也不执行默认数据初始化和定时任务，
+用于单独部署、多进程横向扩展的 Mock 执行服务；管理端 create_app 照常独立运行。
+"""
+
+import time
+
+from flask import Flask, Blueprint, request, jsonify, Response
+
+from .core.config import config
+from .core.config_versions import config_versions
+from .core.database import db
+from .core.exceptions import APIException, register_error_handlers
+from .core.mock_metrics import mock_metrics
+from .core.response_logger import ResponseLogger
+from .core.scenario_state import scenario_state
+from .services.mock_proxy import mock_proxy
+from .services.mock_route_table import mock_route_table
+from .services.mock_service import MockService
+from .services.scenario_service import ScenarioService
+from .utils.value_pool import value_pools
+
+mock_execute_bp = Blueprint('mock_execute', __name__)
+register_error_handlers(mock_execute_bp)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@mock_execute_bp.route('/mock/execute/<path:api_path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+def execute_mock(api_path):
+    """执行 Mock API"""
+
+    # 准备请求数据（先读取原始请求体，表单解析复用缓存的字节；代理转发与缓存键使用原始请求体）
+    body = request.get_data()
+    request_json = request.get_json(silent=True) or {}
+    request_data = {'headers': dict(request.headers), 'args': request.args.to_dict(), 'json': request_json,
+        'form': request.form.to_dict(), 'body': body}
+
+    try:
+        result = MockService.execute_mock(api_path, request.method, request_data)
+
+        # 同步入口直接阻塞等待；大量并发的慢响应请使用异步入口 app.mock_asgi
+        if result.delay:
+            time.sleep(result.delay)
+
+        if result.stream is not None:
+            # 分块传输，内存占用与数组长度无关
+            return Response(mock_metrics.observe_stream(result, request.method), status=result.status_code,
+                mimetype='application/json')
+
+        if not result.is_static:
+            started = time.perf_counter()
+            response = jsonify(result.data)
+            response.status_code = result.status_code
+            mock_metrics.observe(result, request.method, time.perf_counter() - started, response.content_length or 0)
+            return response
+
+        # 静态响应：协商缓存命中时返回 304
+        if request.method == 'GET' and 200 <= result.status_code < 300 and request.if_none_match.contains(
+                result.etag):
+            response = Response(status=304)
+        else:
+            response = Response(result.body, status=result.status_code, content_type=result.content_type)
+        response.set_etag(result.etag)
+        mock_metrics.observe(result, request.method, 0, response.content_length or 0, response.status_code)
+        return response
+    except APIException as e:
+        raise e
+    except Exception as e:
+        raise APIException('Server error', 500, {'details': str(e)})
+
+
+@mock_execute_bp.route('/mock/scenarios', methods=['GET'])
+def list_scenarios():
+    """当前进程中有状态的场景（场景状态保存在执行 Mock 的进程内，因此与执行路由放在一起）"""
+    return jsonify(ScenarioService.list_scenarios())
+
+
+@mock_execute_bp.route('/mock/scenarios/<name>', methods=['GET'])
+def get_scenario_state(name):
+    """查看场景状态"""
+    return jsonify(ScenarioService.get_state(name))
+
+
+@mock_execute_bp.route('/mock/scenarios/<name>/reset', methods=['POST'])
+def reset_scenario(name):
+    """清空场景状态"""
+    return jsonify(ScenarioService.reset(name))
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Mock 执行指标（Prometheus 文本格式，汇总所有工作进程）"""
+    return Response(mock_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+def create_mock_app(config_name='default'):
+    """创建只提供 /api/mock/execute 的轻量级 Mock 服务"""
+    app = Flask(__name__)
+    app.config.from_object(config[config_name])
+    app.config['JSON_AS_ASCII'] = False
+
+    db.init_app(app)
+    config_versions.init_app(app)
+    mock_route_table.init_app(app)
+    mock_metrics.init_app(app)
+    value_pools.init_app(app)
+    scenario_state.init_app(app)
+    mock_proxy.init_app(app)
+
+    app.register_blueprint(mock_execute_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+
+    return app
+
+
+# 随机值池统计随 Mock 执行指标一起输出
+for _counter in ('hits', 'misses', 'refills'):
+    mock_metrics.register_collector(f'value_pool_{_counter}_total', f'随机值池 {_counter} 次数', 'tag',
+        lambda counter=_counter: {key: stats[counter] for key, stats in value_pools.stats().items()})
+del _counter
+
+# 日志钩子只能在蓝图注册到应用之前添加，管理端与轻量服务共用同一蓝图，这里统一注册一次
+ResponseLogger.init_app(mock_execute_bp)
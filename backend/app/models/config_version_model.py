@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 21:50
+@description  配置版本实体类
+"""
+
+from ..core.database import db, datetime, tz_beijing
+
+
+class ConfigVersion(db.Model):
+    __tablename__ = 'config_versions'
+
+    entity = db.Column(db.String(50), primary_key=True, comment='配置类型：mock、project、environment')
+    version = db.Column(db.BigInteger, nullable=False, default=0, comment='版本号，该类型配置每次提交修改加一')
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing),
+                           onupdate=lambda: datetime.now(tz_beijing), nullable=False, comment='更新时间')
+
+    def to_dict(self):
+        """
+        将配置版本对象转换为字典
+
+        Returns:
+            dict: 配置版本数据的字典表示
+        """
+        return {
+            'entity': self.entity,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<ConfigVersion {self.entity} {self.version}>'
@@ -24,8 +24,16 @@ class Mock(db.Model):
     response_status = db.Column(db.Integer, nullable=False, comment='响应状态码')
     response_body = db.Column(db.Text, nullable=False, comment='响应体')
     response_delay = db.Column(db.Integer, default=0, comment='响应延迟（毫秒）')
+    delay_config = db.Column(db.Text, comment='延迟分布配置（JSON格式），为空时使用固定延迟 response_delay')
+    seed = db.Column(db.String(64), comment='随机种子，配置后随机标记的输出可复现；请求头 X-Mock-Seed 或参数 _seed 优先')
+    variants = db.Column(db.Text, comment='响应变体配置（JSON数组），按顺序取第一个匹配请求的变体，都不匹配时使用默认响应')
+    scenario = db.Column(db.String(100), comment='场景名，配置后为有状态 Mock，模板可通过 {state.xxx} 读取场景状态')
+    state_config = db.Column(db.Text, comment='状态操作配置（JSON格式），如 {"action": "create", "collection": "users"}')
     description = db.Column(db.Text, comment='描述')
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True, comment='项目ID')
+    source_hash = db.Column(db.String(40), comment='OpenAPI 导入时的操作摘要，重复导入时跳过未变化的接口')
+    config_version = db.Column(db.BigInteger, index=True,
+                               comment='最后一次修改所在事务的配置版本号（config_versions），路由表按它增量加载')
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing), nullable=False, comment='创建时间')
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing),
                            onupdate=lambda: datetime.now(tz_beijing), nullable=False, comment='更新时间')
@@ -45,8 +53,14 @@ class Mock(db.Model):
             'response_status': self.response_status,
             'response_body': self.response_body,
             'response_delay': self.response_delay,
+            'delay_config': self.delay_config,
+            'seed': self.seed,
+            'variants': self.variants,
+            'scenario': self.scenario,
+            'state_config': self.state_config,
             'description': self.description,
             'project_id': self.project_id,
+            'source_hash': self.source_hash,
             'project_name': self.projects.name if self.projects else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
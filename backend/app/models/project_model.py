@@ -16,6 +16,11 @@ class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True, comment='主键ID')
     name = db.Column(db.String(100), nullable=False, unique=True, comment='项目名称')
     description = db.Column(db.Text, comment='项目描述')
+    proxy_enabled = db.Column(db.Boolean, default=False, comment='是否开启代理模式：未匹配到 Mock 的请求转发到上游')
+    proxy_base_url = db.Column(db.String(500), comment='上游地址，为空时使用 proxy_environment_id 对应环境的基础URL')
+    proxy_environment_id = db.Column(db.Integer, db.ForeignKey('environments.id'), nullable=True, comment='上游环境ID')
+    proxy_prefix = db.Column(db.String(200), comment='代理路径前缀，匹配该前缀的请求去掉前缀后转发，为空时匹配所有路径')
+    proxy_record = db.Column(db.String(10), default='cache', comment='录制方式：cache 只缓存响应，mock 同时保存为 Mock')
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing), nullable=False, comment='创建时间')
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing),
                            onupdate=lambda: datetime.now(tz_beijing), nullable=False, comment='更新时间')
@@ -35,6 +40,11 @@ class Project(db.Model):
             'name': self.name,
             'description': self.description,
             'mock_count': len(self.mock),
+            'proxy_enabled': bool(self.proxy_enabled),
+            'proxy_base_url': self.proxy_base_url,
+            'proxy_environment_id': self.proxy_environment_id,
+            'proxy_prefix': self.proxy_prefix,
+            'proxy_record': self.proxy_record,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/19 02:10
+@description  场景状态实体类（多个工作进程共享的场景键值与资源集合）
+"""
+
+from sqlalchemy import UniqueConstraint
+
+from ..core.database import db, datetime, tz_beijing
+
+
+class ScenarioState(db.Model):
+    __tablename__ = 'scenario_states'
+    __table_args__ = (UniqueConstraint('scenario', 'kind', 'name', name='uq_scenario_state'),)
+
+    id = db.Column(db.Integer, primary_key=True, comment='主键ID')
+    scenario = db.Column(db.String(100), nullable=False, index=True, comment='场景名')
+    kind = db.Column(db.String(20), nullable=False, comment='类型：value 键值、collection 资源集合')
+    name = db.Column(db.String(100), nullable=False, comment='键名或集合名')
+    data = db.Column(db.Text(length=4294967295), nullable=False,
+                     comment='JSON：键值为值本身，集合为 {"items": [[资源ID, 资源], ...], "next_id": 下一个自增ID}')
+    expires_at = db.Column(db.DateTime, comment='过期时间（最后一次写入 + TTL），为空时不过期')
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing), nullable=False, comment='创建时间')
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(tz_beijing),
+                           onupdate=lambda: datetime.now(tz_beijing), nullable=False, comment='最后一次写入时间')
+
+    def __repr__(self):
+        return f'<ScenarioState {self.scenario} {self.kind} {self.name}>'
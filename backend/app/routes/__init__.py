@@ -28,14 +28,24 @@ from .script_management_routes import script_management_bp
 from .sql_routes import sql_bp
 from .user_routes import user_bp
 from ..core.config import config
+from ..core.config_versions import config_versions
 from ..core.database import db, migrate
 from ..core.response_logger import ResponseLogger
+from ..core.mock_metrics import mock_metrics
+from ..core.scenario_state import scenario_state
+from ..mock_server import mock_execute_bp, metrics_bp
 from ..services.init_service import InitService
+from ..services.mock_proxy import mock_proxy
+from ..services.mock_data_engine import columnar_engine
+from ..services.mock_data_shards import shard_pool
+from ..services.mock_route_table import mock_route_table
 from ..services.script_management_service import script_management_service
+from ..utils.value_pool import value_pools
 
 # 导出所有蓝图，便于统一管理
-__all__ = ['example_bp', 'api_docs_bp', 'mock_bp', 'mock_data_bp', 'project_bp', 'environment_bp', 'linux_info_bp',
-    'sql_bp', 'role_bp', 'auth_bp', 'user_bp', 'database_conn_bp', 'database_info_bp', 'script_management_bp']
+__all__ = ['example_bp', 'api_docs_bp', 'mock_bp', 'mock_execute_bp', 'mock_data_bp', 'project_bp', 'environment_bp',
+    'metrics_bp', 'linux_info_bp', 'sql_bp', 'role_bp', 'auth_bp', 'user_bp', 'database_conn_bp', 'database_info_bp',
+    'script_management_bp']
 
 
 def create_app(config_name='default'):
@@ -47,6 +57,14 @@ def create_app(config_name='default'):
 
     db.init_app(app)
     migrate.init_app(app, db)
+    config_versions.init_app(app)
+    mock_route_table.init_app(app)
+    mock_metrics.init_app(app)
+    value_pools.init_app(app)
+    scenario_state.init_app(app)
+    mock_proxy.init_app(app)
+    columnar_engine.init_app(app)
+    shard_pool.init_app(app)
 
     with app.app_context():
         # 初始化默认数据
@@ -92,6 +110,8 @@ def create_app(config_name='default'):
 
     app.register_blueprint(example_bp, url_prefix='/api')
     app.register_blueprint(mock_bp, url_prefix='/api')
+    app.register_blueprint(mock_execute_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
     app.register_blueprint(project_bp, url_prefix='/api')
     app.register_blueprint(environment_bp, url_prefix='/api')
     app.register_blueprint(mock_data_bp, url_prefix='/api')
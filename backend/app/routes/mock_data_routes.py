@@ -7,9 +7,11 @@
 @description  模拟数据生成功能路由
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 
+from ..core.exceptions import APIException
 from ..services.mock_data_service import MockDataService
+from ..services.mock_data_sink import mock_data_sink
 
 mock_data_bp = Blueprint('mock_data', __name__)
 
@@ -28,16 +30,134 @@ def generate_mock_data():
 
         fields = data.get('fields', [])
         count = data.get('count', 1)
+        locale = data.get('locale') or request.args.get('locale')
+        seed = data.get('seed')
+
+        # 指定 format 时流式输出：边生成边返回，内存占用与 count 无关
+        fmt = data.get('format') or request.args.get('format')
+        if fmt:
+            compress = str(data.get('gzip', request.args.get('gzip', ''))).lower() in ('1', 'true', 'yes')
+            chunks = MockDataService.stream_mock_data(fields, count, fmt, locale, seed, compress)
+            extension = 'json' if fmt == 'json-array' else fmt
+            headers = {'Content-Disposition': f'attachment; filename="mock_data.{extension}"',
+                'X-Accel-Buffering': 'no'}  # 关闭 nginx 缓冲，客户端立即收到数据
+            if compress:
+                headers['Content-Encoding'] = 'gzip'
+            return Response(chunks, content_type=MockDataService.STREAM_FORMATS[fmt], headers=headers)
 
         # 生成数据
-        result = MockDataService.generate_mock_data(fields, count)
+        result = MockDataService.generate_mock_data(fields, count, locale, seed)
 
         return jsonify({'success': True, 'data': result, 'count': len(result)})
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@mock_data_bp.route('/mock_data/sink', methods=['POST'])
+def start_sink_job():
+    """
+    生成模拟数据并写入数据库连接中的目标表（后台任务，返回任务ID）
+    """
+    try:
+        data = request.get_json()
+
+        # 验证必需参数
+        if not data or not data.get('connection_id') or not data.get('table') or 'fields' not in data:
+            return jsonify({'error': '缺少必需参数: connection_id、table、fields'}), 400
+
+        job = mock_data_sink.start(data['connection_id'], data['table'], data.get('fields', []),
+            mapping=data.get('mapping'), count=data.get('count', 1), database=data.get('database'),
+            locale=data.get('locale'), seed=data.get('seed'), batch_size=data.get('batch_size'))
+        return jsonify({'success': True, 'data': job.to_dict()}), 202
+
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@mock_data_bp.route('/mock_data/sink/schema', methods=['POST'])
+def start_schema_sink_job():
+    """
+    按表结构整库生成模拟数据：字段由列类型推断，按外键依赖顺序写入（后台任务，返回任务ID）
+    """
+    try:
+        data = request.get_json()
+
+        # 验证必需参数
+        if not data or not data.get('connection_id'):
+            return jsonify({'error': '缺少必需参数: connection_id'}), 400
+
+        job = mock_data_sink.start_schema(data['connection_id'], database=data.get('database'),
+            tables=data.get('tables'), count=data.get('count', 100), counts=data.get('counts'),
+            null_ratio=data.get('null_ratio', 0.1), locale=data.get('locale'), seed=data.get('seed'),
+            batch_size=data.get('batch_size'))
+        return jsonify({'success': True, 'data': job.to_dict()}), 202
+
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@mock_data_bp.route('/mock_data/sink/fields', methods=['GET'])
+def infer_sink_fields():
+    """
+    由表结构推断字段配置
+    """
+    try:
+        connection_id = request.args.get('connection_id', type=int)
+        table = request.args.get('table')
+        if not connection_id or not table:
+            return jsonify({'error': '缺少必需参数: connection_id、table'}), 400
+
+        fields = mock_data_sink.infer_fields(connection_id, table, request.args.get('database'),
+            request.args.get('null_ratio', 0.1, type=float))
+        return jsonify({'success': True, 'data': fields})
+
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@mock_data_bp.route('/mock_data/sink', methods=['GET'])
+def list_sink_jobs():
+    """
+    获取写入任务列表（当前进程）
+    """
+    return jsonify({'success': True, 'data': [job.to_dict() for job in mock_data_sink.jobs()]})
+
+
+@mock_data_bp.route('/mock_data/sink/<job_id>', methods=['GET'])
+def get_sink_job(job_id):
+    """
+    获取写入任务进度
+    """
+    try:
+        return jsonify({'success': True, 'data': mock_data_sink.get(job_id).to_dict()})
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+
+@mock_data_bp.route('/mock_data/sink/<job_id>/cancel', methods=['POST'])
+def cancel_sink_job(job_id):
+    """
+    取消写入任务（已写入的数据回滚）
+    """
+    try:
+        return jsonify({'success': True, 'data': mock_data_sink.cancel(job_id).to_dict()})
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+
 @mock_data_bp.route('/mock_data/field-types', methods=['GET'])
 def get_field_types():
     """
@@ -4,15 +4,18 @@
 """
 @author       weimenghua
 @time         2025/10/1 19:15
-@description  Mock API 管理与执行路由
+@description  Mock API 管理路由（执行路由见 app.mock_server）
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 
-from ..core.exceptions import APIException
+from ..core.exceptions import APIException, register_error_handlers
 from ..services.mock_service import MockService
+from ..services.openapi_import_service import OpenAPIImportService
 
 mock_bp = Blueprint('mock', __name__)
+# 校验错误（路径模板冲突、延迟 / 变体 / 状态配置错误）按 APIException 的状态码返回
+register_error_handlers(mock_bp)
 
 
 @mock_bp.route('/mock', methods=['GET'])
@@ -71,6 +74,8 @@ def update_mock(mock_id):
     try:
         result = MockService.update_mock(mock_id, data)
         return jsonify(result)
+    except APIException as e:
+        raise e
     except Exception as e:
         raise APIException('Server error', 500, {'details': str(e)})
 
@@ -86,18 +91,36 @@ def delete_mock(mock_id):
         raise APIException('Server error', 500, {'details': str(e)})
 
 
-@mock_bp.route('/mock/execute/<path:api_path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
-def execute_mock(api_path):
-    """执行 Mock API"""
+@mock_bp.route('/mock/import/openapi', methods=['POST'])
+def import_openapi():
+    """从 OpenAPI / Swagger 规范批量导入 Mock API（上传 file 或直接提交 JSON）"""
+
+    project_id = request.args.get('project_id', type=int) or request.form.get('project_id', type=int)
+    upload = request.files.get('file')
+    spec = upload.read().decode('utf-8') if upload else request.get_json(silent=True)
+    if not spec:
+        raise APIException('OpenAPI spec is required', 400)
+
+    try:
+        result = OpenAPIImportService.import_spec(spec, project_id=project_id)
+        return jsonify(result)
+    except APIException as e:
+        raise e
+    except Exception as e:
+        raise APIException('Server error', 500, {'details': str(e)})
+
+
+@mock_bp.route('/mock/snapshot', methods=['GET'])
+def export_snapshot():
+    """导出 Mock 快照文件（可按 project_id 只导出单个项目），用于 MOCK_SNAPSHOT_ONLY 只读部署"""
 
-    # 准备请求数据
-    request_json = request.get_json(silent=True) or {}
-    request_data = {'headers': dict(request.headers), 'args': request.args.to_dict(), 'json': request_json,
-        'form': request.form.to_dict()}
+    project_id = request.args.get('project_id', type=int)
 
     try:
-        result, status_code = MockService.execute_mock(api_path, request.method, request_data)
-        return jsonify(result), status_code
+        content = MockService.export_snapshot(project_id)
+        filename = f"mocks_{project_id}.snap" if project_id else 'mocks.snap'
+        return Response(content, mimetype='application/octet-stream',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'})
     except APIException as e:
         raise e
     except Exception as e:
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 23:00
+@description  模拟数据列式生成引擎 - 按字段整列批量生成，数值与日期类使用 NumPy 向量化
+"""
+
+import os
+import random
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+from faker.providers.date_time import Provider as DateTimeProvider
+
+from ..utils.faker_registry import faker_registry
+
+# 文本类字段对应的 Faker 方法
+FAKER_METHODS = {'name': 'name', 'id_card': 'ssn', 'phone': 'phone_number', 'email': 'email', 'address': 'address',
+    'company': 'company', 'bank_card': 'credit_card_number', 'province': 'province', 'city': 'city',
+    'postcode': 'postcode', 'job': 'job', 'ssn': 'ssn', 'license_plate': 'license_plate'}
+
+# 从值池取值的字段类型（text 的值池按长度选项区分）
+POOLED_TYPES = frozenset(FAKER_METHODS) | {'text'}
+
+
+class ColumnarEngine:
+    """
+    列式生成引擎
+
+    - number、age、boolean、date、datetime：NumPy 一次生成整列
+    - 文本类字段：按 (语言环境, 字段类型, 选项) 预生成 pool_size 个 Faker 值作为值池，整列按随机下标批量取值；
+      值池由固定种子生成并在进程内复用，生成结果只取决于 seed
+    - 值池限制了文本字段的基数：不同值最多 pool_size 个，N 行中约有 pool_size * (1 - e^(-N / pool_size)) 个不同值
+      （默认 10000，10 万行约 1 万个；Faker 生成的值本身也会重复，email 等字段实际更少），不能用于唯一列（唯一列使用 sequence，见 mock_schema_service）；
+      需要更多不同值时调大 MOCK_DATA_POOL_SIZE，或在字段 options 中设置 pool_size（只对该字段生效）
+    - enum、sequence、reference：从候选值、连续序号或父表主键数组中取值（见 mock_schema_service）
+    - 任意字段可设置 null_ratio，按比例生成 NULL
+    - 结果为 {字段名: numpy 数组}，需要行数据时由 to_rows 最后一次性组装
+    - 分块生成时第 i 块使用由 (seed, i) 派生的随机数生成器，各块互不依赖，可以在不同进程中生成（见 mock_data_shards），
+      结果与块在哪个进程、以什么顺序生成无关
+    """
+
+    def __init__(self, pool_size=10000, max_pools=256):
+        self.pool_size = pool_size
+        self.max_pools = max_pools
+        self._pools = OrderedDict()  # {(语言环境, 字段类型, 选项): numpy 对象数组}
+        self._lock = threading.Lock()
+        # fork 出的进程池工作进程中重建锁，避免继承 fork 时其它线程持有的锁
+        os.register_at_fork(after_in_child=self._reset_lock)
+        # NumPy 向量化生成的字段类型
+        self._vectorized = {'number': self._number_column, 'age': self._age_column,
+            'boolean': self._boolean_column, 'date': self._date_column, 'datetime': self._datetime_column,
+            'time': self._time_column, 'enum': self._enum_column, 'reference': self._reference_column}
+
+    def init_app(self, app):
+        self.pool_size = app.config.get('MOCK_DATA_POOL_SIZE', self.pool_size)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def generate_columns(self, fields, count, seed=None):
+        """
+        按字段整列生成数据（语言环境取当前上下文，见 faker_registry.use）
+
+        Args:
+            fields: 字段配置列表，每个字段包含 name、type 和 options，缺少 name 或 type 的字段忽略
+            count: 生成数据条数
+            seed: 随机种子，相同种子生成相同的数据
+
+        Returns:
+            dict: {字段名: numpy 数组}，同名字段以最后一个为准；count 不超过 chunk_size 时与 iter_columns 的结果相同
+        """
+        return self.chunk(fields, count, self.entropy(seed), 0, 0)
+
+    def iter_columns(self, fields, count, chunk_size, seed=None):
+        """
+        分块生成：每块最多 chunk_size 行，内存占用与 count 无关
+
+        Yields:
+            tuple: (本块的 {字段名: numpy 数组}, 本块行数)
+        """
+        entropy = self.entropy(seed)
+        for index, start in enumerate(range(0, count, chunk_size)):
+            size = min(chunk_size, count - start)
+            yield self.chunk(fields, size, entropy, index, start), size
+
+    @staticmethod
+    def entropy(seed=None):
+        """任务的随机种子熵：seed 为空时随机生成，同一任务的所有块共用"""
+        return np.random.SeedSequence(seed).entropy
+
+    def chunk(self, fields, size, entropy, index, start):
+        """
+        生成第 index 块
+
+        Args:
+            fields: 字段配置列表
+            size: 本块行数
+            entropy: 任务的种子熵（见 entropy）
+            index: 块序号
+            start: 本块第一行的行号
+        """
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+        return self._columns(fields, size, rng, start)
+
+    @staticmethod
+    def field_names(fields):
+        """生成结果中的字段名（顺序与 generate_columns 一致）"""
+        return list(dict.fromkeys(field_config['name'] for field_config in fields
+            if field_config.get('name') and field_config.get('type')))
+
+    def _columns(self, fields, count, rng, offset=0):
+        columns = {}
+        for field_config in fields:
+            field_name = field_config.get('name')
+            field_type = field_config.get('type')
+            if field_name and field_type:
+                options = field_config.get('options') or {}
+                values = self.column(field_type, options, count, rng, offset)
+                null_ratio = _option_number(options, 'null_ratio', 0)
+                if null_ratio > 0:
+                    values = values.astype(object)
+                    values[rng.random(count) < null_ratio] = None
+                columns[field_name] = values
+        return columns
+
+    @staticmethod
+    def to_rows(columns, count):
+        """把列组装为行：[{字段名: 值}]，值为 Python 原生类型"""
+        names = list(columns)
+        values = [column.tolist() for column in columns.values()]
+        if not names:
+            return [{} for _ in range(count)]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def column(self, field_type, options, count, rng, offset=0):
+        """生成单个字段的一整列（offset 为本块第一行的行号，sequence 使用）"""
+        if field_type == 'sequence':
+            return self._sequence_column(options, count, offset)
+        if field_type == 'reference' and options.get('sequential'):
+            # values 已按行排好（不放回抽取的唯一外键），按行号逐行取用
+            return np.asarray(options['values'])[offset:offset + count]
+        generator = self._vectorized.get(field_type)
+        if generator is not None:
+            return generator(options, count, rng)
+        if field_type not in POOLED_TYPES:
+            return np.full(count, f"未知类型: {field_type}", dtype=object)
+        try:
+            pool = self._pool(field_type, options)
+        except AttributeError:
+            # 部分语言环境没有对应的 Faker provider，如 en_US 没有 province
+            return np.full(count, f"当前语言环境不支持: {field_type}", dtype=object)
+        return pool[rng.integers(0, len(pool), size=count)]
+
+    # ---- 向量化字段 ----
+
+    @staticmethod
+    def _number_column(options, count, rng):
+        min_value = _option_number(options, 'min_value', 0)
+        max_value = _option_number(options, 'max_value', 100)
+        decimals = int(_option_number(options, 'decimals', 0))
+        if min_value > max_value:
+            raise ValueError(f'最大值小于最小值: {min_value} ~ {max_value}')
+        if decimals == 0:
+            return rng.integers(min_value, max_value, size=count, endpoint=True)
+        return np.round(rng.uniform(min_value, max_value, size=count), decimals)
+
+    @staticmethod
+    def _age_column(options, count, rng):
+        min_age = _option_number(options, 'min_age', 18)
+        max_age = _option_number(options, 'max_age', 60)
+        if min_age > max_age:
+            raise ValueError(f'最大年龄小于最小年龄: {min_age} ~ {max_age}')
+        return rng.integers(min_age, max_age, size=count, endpoint=True)
+
+    @staticmethod
+    def _boolean_column(options, count, rng):
+        return rng.random(count) < 0.5
+
+    @staticmethod
+    def _date_column(options, count, rng):
+        start, end = ColumnarEngine._date_range(options)
+        days = rng.integers(0, (end - start).days, size=count, endpoint=True)
+        return np.datetime_as_string(np.datetime64(start, 'D') + days, unit='D')
+
+    @staticmethod
+    def _datetime_column(options, count, rng):
+        start, end = ColumnarEngine._date_range(options)
+        # 结束日期当天的任意时刻都可能取到
+        seconds = rng.integers(0, ((end - start).days + 1) * 86400, size=count)
+        values = np.datetime_as_string(np.datetime64(start, 's') + seconds, unit='s')
+        # 'YYYY-MM-DDTHH:MM:SS' 是定长 UCS4 字符串，直接把第 11 个字符改为空格
+        if count:
+            values.view(np.uint32).reshape(count, -1)[:, 10] = ord(' ')
+        return values
+
+    @staticmethod
+    def _time_column(options, count, rng):
+        seconds = rng.integers(0, 86400, size=count)
+        values = np.datetime_as_string(np.datetime64('2000-01-01T00:00:00') + seconds, unit='s').astype('<U19')
+        # 取 'YYYY-MM-DDTHH:MM:SS' 的后 8 个字符
+        return np.ascontiguousarray(values.view(np.uint32).reshape(count, 19)[:, 11:]).view('<U8').ravel()
+
+    @staticmethod
+    def _enum_column(options, count, rng):
+        choices = np.asarray(options.get('choices') or [None], dtype=object)
+        return choices[rng.integers(0, len(choices), size=count)]
+
+    @staticmethod
+    def _reference_column(options, count, rng):
+        # values 为父表已生成的键（NumPy 数组），为空时只能生成 NULL
+        values = np.asarray(options.get('values', ()))
+        if not len(values):
+            return np.full(count, None, dtype=object)
+        return values[rng.integers(0, len(values), size=count)]
+
+    @staticmethod
+    def _sequence_column(options, count, offset):
+        values = np.arange(options.get('start', 1) + offset, options.get('start', 1) + offset + count, dtype=np.int64)
+        width = options.get('width')
+        if width:
+            # 定宽补零（唯一字符串列），超出位数时报错而不是写入超长的值
+            if count and len(str(values[-1])) > width:
+                raise ValueError(f'序号 {values[-1]} 超出 {width} 位')
+            values = np.char.zfill(values.astype(str), width)
+        prefix = options.get('prefix')
+        if prefix:
+            return np.char.add(prefix, values.astype(str))
+        return values
+
+    @staticmethod
+    def _date_range(options):
+        """日期范围：支持 YYYY-MM-DD 与 Faker 的相对日期（如 -30y、today）"""
+        start = ColumnarEngine._parse_date(options.get('start_date', '2000-01-01'))
+        end = ColumnarEngine._parse_date(options.get('end_date', '2023-12-31'))
+        if end < start:
+            raise ValueError(f'结束日期早于开始日期: {start} ~ {end}')
+        return start, end
+
+    @staticmethod
+    def _parse_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.strptime(str(value), '%Y-%m-%d').date()
+        except ValueError:
+            return DateTimeProvider._parse_date(value)
+
+    # ---- 文本值池 ----
+
+    def _pool(self, field_type, options):
+        locale = faker_registry.locale
+        if field_type == 'text':
+            length = (options.get('min_length', 10), options.get('max_length', 50))
+        else:
+            length = options.get('max_length')  # 其它文本类型超长时截断，如 varchar(20) 的地址
+        pool_size = int(_option_number(options, 'pool_size', self.pool_size))
+        if pool_size <= 0:
+            raise ValueError(f'字段选项 pool_size 必须大于 0: {pool_size}')
+        key = (locale, field_type, length, pool_size)
+        pool = self._pools.get(key)
+        if pool is not None:
+            return pool
+
+        # 固定种子生成值池：同一 seed 在不同进程中生成相同的数据；种子与 pool_size 无关，较小的值池是较大值池的前缀
+        fake = faker_registry.get(locale, rng=random.Random(f'{locale}:{field_type}:{key[2]}'))
+        try:
+            if field_type == 'text':
+                values = [self._text(fake, options) for _ in range(pool_size)]
+            else:
+                method = getattr(fake, FAKER_METHODS[field_type])
+                values = [method()[:length] for _ in range(pool_size)]
+        finally:
+            faker_registry.get(locale)
+        pool = np.empty(len(values), dtype=object)
+        pool[:] = values
+
+        with self._lock:
+            self._pools[key] = pool
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        return pool
+
+    @staticmethod
+    def _text(fake, options):
+        min_length = options.get('min_length', 10)
+        max_length = options.get('max_length', 50)
+        text = fake.text(max_nb_chars=max(max_length, 5))
+        if len(text) < min_length:
+            # 生成的文本太短时用多个句子组合
+            sentences = []
+            while len(''.join(sentences)) < min_length:
+                sentences.append(fake.sentence())
+            text = ' '.join(sentences)
+        return text[:max_length]
+
+
+def _option_number(options, name, default):
+    """读取数值型字段选项，类型错误时抛出 ValueError（而不是在生成时抛出 TypeError）"""
+    value = options.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f'字段选项 {name} 必须是数字: {value!r}')
+    return value
+
+
+columnar_engine = ColumnarEngine()
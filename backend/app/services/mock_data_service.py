@@ -4,33 +4,47 @@
 """
 @author       weimenghua
 @time         2025/10/2 15:49
-@description  模拟数据生成服务 - 使用Faker库优化版本
+@description  模拟数据生成服务 - 列式引擎批量生成（见 mock_data_engine）
 """
 
-import random
+import csv
+import io
+import json
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Union
+import zlib
+from typing import List, Dict, Any, Iterator
 
-from faker import Faker
+import numpy as np
+
+from ..utils.faker_registry import faker_registry
+from .mock_data_engine import columnar_engine
+from .mock_data_shards import load_shared, shard_pool
 
 
 class MockDataService:
     """模拟数据生成服务"""
 
-    # 初始化Faker实例
-    _fake = Faker('zh_CN')  # 指定中文环境
+    # 默认语言环境，单次调用可通过 locale 参数覆盖
+    default_locale = 'zh_CN'
 
     # 支持的字段类型
     FIELD_TYPES = {'name': '姓名', 'id_card': '身份证号', 'phone': '手机号', 'email': '邮箱', 'address': '地址',
         'date': '日期', 'datetime': '日期时间', 'text': '文本', 'number': '数字', 'boolean': '布尔值',
         'company': '公司名称', 'bank_card': '银行卡号', 'age': '年龄', 'province': '省份', 'city': '城市',
-        'postcode': '邮编', 'job': '职业', 'ssn': '社保号', 'license_plate': '车牌号'}
+        'postcode': '邮编', 'job': '职业', 'ssn': '社保号', 'license_plate': '车牌号', 'time': '时间',
+        'enum': '枚举', 'sequence': '序号', 'reference': '引用'}
+
+    # 流式输出格式与内容类型
+    STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv; charset=utf-8',
+        'json-array': 'application/json'}
+
+    # 流式输出每块的行数
+    STREAM_CHUNK_ROWS = 5000
 
     @classmethod
     def set_locale(cls, locale: str = 'zh_CN'):
-        """设置Faker语言环境"""
-        cls._fake = Faker(locale)
+        """设置默认语言环境（Faker 实例由注册表按线程维护，不会替换其它请求正在使用的实例）"""
+        cls.default_locale = faker_registry.normalize(locale)
 
     @staticmethod
     def get_supported_field_types() -> Dict[str, str]:
@@ -38,132 +52,151 @@ class MockDataService:
         return MockDataService.FIELD_TYPES
 
     @classmethod
-    def generate_mock_data(cls, fields: List[Dict[str, Any]], count: int = 1) -> List[Dict[str, Any]]:
+    def generate_mock_data(cls, fields: List[Dict[str, Any]], count: int = 1, locale: str = None,
+            seed: int = None) -> List[Dict[str, Any]]:
         """
         生成模拟数据
 
         Args:
             fields: 字段配置列表，每个字段包含name、type和options
             count: 生成数据条数
+            locale: 语言环境，如 zh_CN、en_US，默认使用 default_locale
+            seed: 随机种子，相同种子生成相同的数据
 
         Returns:
             生成的模拟数据列表
+
+        Raises:
+            ValueError: 不支持的语言环境或字段选项错误
         """
-        result = []
+        return columnar_engine.to_rows(cls.generate_columns(fields, count, locale, seed), int(count))
 
-        for _ in range(count):
-            item = {}
-            for field_config in fields:
-                field_name = field_config.get('name')
-                field_type = field_config.get('type')
-                options = field_config.get('options', {})
+    @classmethod
+    def generate_columns(cls, fields: List[Dict[str, Any]], count: int = 1, locale: str = None,
+            seed: int = None) -> Dict[str, np.ndarray]:
+        """
+        按列生成模拟数据（列式引擎，不组装行数据）
 
-                if field_name and field_type:
-                    value = cls._generate_field_value(field_type, options)
-                    item[field_name] = value
+        Returns:
+            {字段名: numpy 数组}
+        """
+        count = int(count)
+        if count < 0:
+            raise ValueError('count 不能小于 0')
+        with faker_registry.use(locale or cls.default_locale):
+            return columnar_engine.generate_columns(fields, count, seed)
 
-            result.append(item)
+    @classmethod
+    def stream_mock_data(cls, fields: List[Dict[str, Any]], count: int, fmt: str = 'ndjson', locale: str = None,
+            seed: int = None, compress: bool = False) -> Iterator[bytes]:
+        """
+        流式生成模拟数据：每 STREAM_CHUNK_ROWS 行编码输出一次，内存占用与 count 无关
 
-        return result
+        Args:
+            fields: 字段配置列表
+            count: 生成数据条数
+            fmt: 输出格式 ndjson / csv / json-array
+            locale: 语言环境
+            seed: 随机种子
+            compress: 是否 gzip 压缩（每块同步刷新，客户端可以边收边解压）
+
+        Returns:
+            逐块产出 bytes 的迭代器
+
+        Raises:
+            ValueError: 参数错误（在开始输出之前校验）
+        """
+        if fmt not in cls.STREAM_FORMATS:
+            raise ValueError(f'不支持的输出格式: {fmt}，可选 {", ".join(cls.STREAM_FORMATS)}')
+        count = int(count)
+        if count < 0:
+            raise ValueError('count 不能小于 0')
+        locale = faker_registry.normalize(locale) or cls.default_locale
+
+        # 先生成第一块：字段选项错误在返回响应头之前抛出，而不是在 200 响应中途中断
+        data = cls.iter_chunks(fields, count, locale, seed, fmt=fmt)
+        first = next(data, None)
+        chunks = cls._encode_stream(fields, fmt, first, data)
+        return cls._gzip_stream(chunks) if compress else chunks
 
     @classmethod
-    def _generate_field_value(cls, field_type: str, options: Dict[str, Any] = None) -> Any:
-        """根据字段类型生成对应的值"""
-        options = options or {}
-
-        # 使用字典映射替代if-else链，提高可读性和可维护性
-        field_generators = {'name': lambda: cls._fake.name(), 'id_card': lambda: cls._fake.ssn(),  # Faker中的ssn方法生成身份证号
-            'phone': lambda: cls._fake.phone_number(), 'email': lambda: cls._fake.email(),
-            'address': lambda: cls._fake.address(), 'date': lambda: cls._generate_date(options),
-            'datetime': lambda: cls._generate_datetime(options), 'text': lambda: cls._generate_text(options),
-            'number': lambda: cls._generate_number(options), 'boolean': lambda: cls._fake.boolean(),
-            'company': lambda: cls._fake.company(), 'bank_card': lambda: cls._fake.credit_card_number(),
-            'age': lambda: cls._generate_age(options), 'province': lambda: cls._fake.province(),
-            'city': lambda: cls._fake.city(), 'postcode': lambda: cls._fake.postcode(), 'job': lambda: cls._fake.job(),
-            'ssn': lambda: cls._fake.ssn(), 'license_plate': lambda: cls._fake.license_plate()}
-
-        generator = field_generators.get(field_type)
-        if generator:
-            return generator()
-        else:
-            return f"未知类型: {field_type}"
+    def _encode_stream(cls, fields, fmt, first, data):
+        # 表头 / 数组起始先输出，客户端立即收到数据
+        if fmt == 'csv':
+            yield cls._csv_rows([columnar_engine.field_names(fields)]).encode('utf-8')
+        elif fmt == 'json-array':
+            yield b'['
 
-    @staticmethod
-    def _generate_date(options: Dict[str, Any]) -> str:
-        """生成日期"""
-        start_date = options.get('start_date', '2000-01-01')
-        end_date = options.get('end_date', '2023-12-31')
+        if first is not None:
+            yield first
+            for chunk in data:
+                yield b',' + chunk if fmt == 'json-array' else chunk
 
-        try:
-            # 使用Faker的date_between方法
-            fake_instance = MockDataService._fake
-            return fake_instance.date_between(start_date=start_date, end_date=end_date).strftime('%Y-%m-%d')
-        except Exception:
-            # 备用方案
-            start = datetime.strptime(start_date, '%Y-%m-%d')
-            end = datetime.strptime(end_date, '%Y-%m-%d')
-            random_date = start + timedelta(days=random.randint(0, (end - start).days))
-            return random_date.strftime('%Y-%m-%d')
+        if fmt == 'json-array':
+            yield b']'
 
-    @staticmethod
-    def _generate_datetime(options: Dict[str, Any]) -> str:
-        """生成日期时间"""
-        start_date = options.get('start_date', '2000-01-01')
-        end_date = options.get('end_date', '2023-12-31')
+    @classmethod
+    def iter_chunks(cls, fields: List[Dict[str, Any]], count: int, locale: str, seed: int = None,
+            chunk_size: int = None, fmt: str = None, key_fields=()) -> Iterator:
+        """
+        分块生成模拟数据，块数多于一块且启用了进程池（MOCK_DATA_PROCESSES）时由各进程并行生成，按块顺序返回
+
+        每块的数据只由 (seed, 块序号) 决定，使用多少个进程生成结果都相同
 
+        Args:
+            fields: 字段配置列表
+            count: 生成数据条数
+            locale: 语言环境（已规范化）
+            seed: 随机种子
+            chunk_size: 每块行数，默认 STREAM_CHUNK_ROWS
+            fmt: 输出格式，指定时每块编码为 bytes（json-array 格式不含块之间的逗号）
+            key_fields: 未指定 fmt 时，需要同时返回整列的字段
+
+        Yields:
+            bytes 或 (行元组列表, {字段名: numpy 数组})
+        """
+        chunk_size = chunk_size or cls.STREAM_CHUNK_ROWS
+        names = columnar_engine.field_names(fields)
+        entropy = columnar_engine.entropy(seed)
+        starts = range(0, count, chunk_size)
+        if not shard_pool.enabled(len(starts)):
+            for index, start in enumerate(starts):
+                yield _build_chunk((fields, names, locale, entropy, index, start, min(chunk_size, count - start), fmt,
+                    key_fields))
+            return
+
+        fields, directory = shard_pool.share(fields)
         try:
-            # 使用Faker的date_time_between方法
-            fake_instance = MockDataService._fake
-            return fake_instance.date_time_between(start_date=start_date, end_date=end_date).strftime(
-                '%Y-%m-%d %H:%M:%S')
-        except Exception:
-            # 备用方案
-            start = datetime.strptime(start_date, '%Y-%m-%d')
-            end = datetime.strptime(end_date, '%Y-%m-%d')
-            random_datetime = start + timedelta(days=random.randint(0, (end - start).days), hours=random.randint(0, 23),
-                minutes=random.randint(0, 59), seconds=random.randint(0, 59))
-            return random_datetime.strftime('%Y-%m-%d %H:%M:%S')
+            yield from shard_pool.imap(_build_chunk, ((fields, names, locale, entropy, index, start,
+                min(chunk_size, count - start), fmt, key_fields) for index, start in enumerate(starts)))
+        finally:
+            shard_pool.cleanup(directory)
 
     @classmethod
-    def _generate_text(cls, options: Dict[str, Any]) -> str:
-        """生成文本"""
-        min_length = options.get('min_length', 10)
-        max_length = options.get('max_length', 50)
-
-        # 使用Faker的text方法生成更真实的文本
-        text = cls._fake.text(max_nb_chars=max_length)
-        if len(text) < min_length:
-            # 如果生成的文本太短，使用多个句子组合
-            sentences = []
-            while len(''.join(sentences)) < min_length:
-                sentences.append(cls._fake.sentence())
-            text = ' '.join(sentences)
-
-        return text[:max_length]
+    def _encode_chunk(cls, columns, size, names, fmt):
+        rows = zip(*[column.tolist() for column in columns.values()]) if names else [()] * size
+        if fmt == 'csv':
+            return cls._csv_rows(rows).encode('utf-8')
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        objects = (encode(dict(zip(names, row))) for row in rows)
+        if fmt == 'ndjson':
+            return ('\n'.join(objects) + '\n').encode('utf-8')
+        return ','.join(objects).encode('utf-8')
 
-    @classmethod
-    def _generate_number(cls, options: Dict[str, Any]) -> Union[int, float]:
-        """生成数字"""
-        min_value = options.get('min_value', 0)
-        max_value = options.get('max_value', 100)
-        decimals = options.get('decimals', 0)
-
-        if decimals == 0:
-            # 整数
-            return cls._fake.random_int(min=min_value, max=max_value)
-        else:
-            # 浮点数
-            number = cls._fake.pyfloat(left_digits=len(str(max_value)) - decimals, right_digits=decimals, positive=True,
-                min_value=min_value, max_value=max_value)
-            return round(number, decimals)
+    @staticmethod
+    def _csv_rows(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        return buffer.getvalue()
 
     @staticmethod
-    def _generate_age(options: Dict[str, Any]) -> int:
-        """生成年龄"""
-        min_age = options.get('min_age', 18)
-        max_age = options.get('max_age', 60)
-        fake_instance = MockDataService._fake
-        return fake_instance.random_int(min=min_age, max=max_age)
+    def _gzip_stream(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip 格式
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
 
     @classmethod
     def generate_bulk_data(cls, field_types: List[str], count: int = 10) -> List[Dict[str, Any]]:
@@ -210,6 +243,17 @@ class MockDataService:
         return validation_result
 
 
+def _build_chunk(task):
+    """生成一块数据（当前线程或进程池的工作进程中执行，模块级函数以便序列化）"""
+    fields, names, locale, entropy, index, start, size, fmt, key_fields = task
+    # 语言环境只在生成本块时生效
+    with faker_registry.use(locale):
+        columns = columnar_engine.chunk(load_shared(fields), size, entropy, index, start)
+    if fmt is not None:
+        return MockDataService._encode_chunk(columns, size, names, fmt)
+    return list(zip(*[column.tolist() for column in columns.values()])), {name: columns[name] for name in key_fields}
+
+
 # 使用示例
 if __name__ == "__main__":
     # 示例字段配置
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/19 01:10
+@description  模拟数据分片生成 - 大任务按块分发到进程池，按块序号顺序合并
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+# 不小于该长度的数组（如外键引用的父表键）写入临时文件，工作进程按路径加载，不随每个块序列化
+SHARE_MIN_SIZE = 1024
+
+# 本进程正在创建进程池（fork 出的池工作进程继承该标记，不再创建自己的进程池）
+_starting = False
+
+# 工作进程中已加载的共享数组 {路径: 数组}，只保留最近的几个
+_shared_arrays = OrderedDict()
+_MAX_SHARED_ARRAYS = 8
+
+
+def load_shared(fields):
+    """把字段配置中的共享数组路径替换回数组（工作进程中调用，同一路径只加载一次）"""
+    resolved = []
+    for field_config in fields:
+        options = field_config.get('options') or {}
+        path = options.get('values_file')
+        if path is None:
+            resolved.append(field_config)
+            continue
+        values = _shared_arrays.get(path)
+        if values is None:
+            try:
+                values = np.load(path, mmap_mode='r')
+            except ValueError:
+                # 对象数组（字符串键等）不能内存映射
+                values = np.load(path, allow_pickle=True)
+            _shared_arrays[path] = values
+            while len(_shared_arrays) > _MAX_SHARED_ARRAYS:
+                _shared_arrays.popitem(last=False)
+        options = {key: value for key, value in options.items() if key != 'values_file'}
+        resolved.append(dict(field_config, options=dict(options, values=values)))
+    return resolved
+
+
+class ShardPool:
+    """
+    模拟数据生成进程池
+
+    - MOCK_DATA_PROCESSES 大于 1 时启用，多于一块的生成任务按块分发到各进程，Faker 与编码不再受单个 GIL 限制
+    - 工作进程以 fork 方式启动（spawn 会在每个工作进程中重新执行 main.py 的 create_app），只做 NumPy / Faker 生成与编码，
+      不使用继承的数据库连接；进程常驻，文本值池每个进程只构建一次
+    - 进程池在 init_app 中创建，此时日志、值池补充、写入任务等后台线程都还没有启动，fork 不会复制持有锁的线程状态；
+      gunicorn --preload 时 init_app 在主进程执行，fork 出的 gunicorn 工作进程在 fork 之后立即（仍是单线程时）重新创建；
+      请求线程不会再临时创建进程池，当前进程没有进程池时在当前线程中生成
+    - 同时在途的块数为进程数的两倍，消费方（HTTP 客户端、数据库写入）慢于生成时不会在内存中堆积结果
+    - 结果按块序号依次返回；每块的随机数只由 (seed, 块序号) 决定，与进程数无关
+    """
+
+    def __init__(self):
+        self.processes = 0
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._inherited = []  # fork 继承的父进程进程池，只保留引用，析构会操作父进程池的队列
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app):
+        self.start(app.config.get('MOCK_DATA_PROCESSES', self.processes))
+
+    def start(self, processes):
+        """
+        按进程数创建（或重建）本进程的进程池，进程数不大于 1 时关闭进程池
+
+        应在任何后台线程启动之前调用
+        """
+        global _starting
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid() and processes == self.processes:
+                return
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.terminate()
+            self._pool = None
+            self.processes = processes
+            if processes > 1:
+                _starting = True
+                try:
+                    self._pool = multiprocessing.get_context('fork').Pool(processes)
+                finally:
+                    _starting = False
+                self._pid = os.getpid()
+
+    def enabled(self, chunks):
+        return self._pool is not None and self._pid == os.getpid() and chunks > 1
+
+    def imap(self, func, tasks):
+        """
+        在进程池中执行 func(task)，按 tasks 的顺序返回结果
+
+        生成器提前关闭时不再提交新的块，已提交的块执行完后丢弃
+        """
+        pool = self._pool
+        window = self.processes * 2
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(func, (task,)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    @staticmethod
+    def share(fields):
+        """
+        把字段配置中的大数组写入临时目录，字段配置中只保留路径
+
+        Returns:
+            tuple: (替换后的字段配置, 临时目录)，没有需要共享的数组时临时目录为 None；任务结束后由调用方删除临时目录
+        """
+        directory = None
+        shared = []
+        for index, field_config in enumerate(fields):
+            options = field_config.get('options') or {}
+            values = options.get('values')
+            if not isinstance(values, np.ndarray) or len(values) < SHARE_MIN_SIZE:
+                shared.append(field_config)
+                continue
+            if directory is None:
+                directory = tempfile.mkdtemp(prefix='mock_data_')
+            path = os.path.join(directory, f'{index}.npy')
+            np.save(path, values, allow_pickle=True)
+            options = {key: value for key, value in options.items() if key != 'values'}
+            shared.append(dict(field_config, options=dict(options, values_file=path)))
+        return shared, directory
+
+    @staticmethod
+    def cleanup(directory):
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _after_fork(self):
+        # fork 之后子进程中只有执行 fork 的线程；父进程持有锁的线程不存在了，锁重新创建
+        self._lock = threading.Lock()
+        if self._pool is None:
+            return
+        self._inherited.append(self._pool)
+        self._pool = None
+        # gunicorn --preload 从主线程 fork 工作进程时重新创建；池工作进程（创建时、或由进程池的后台线程补充）不创建
+        if not _starting and threading.current_thread() is threading.main_thread():
+            self.start(self.processes)
+
+
+shard_pool = ShardPool()
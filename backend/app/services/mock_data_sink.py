@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 23:40
+@description  模拟数据写入目标表 - 生成与插入分线程流水线执行，大批量多行 INSERT，单事务提交；支持按外键顺序整库写入
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import MetaData, Table, table as sql_table
+
+from ..core.database import datetime, tz_beijing
+from ..core.exceptions import APIException
+from ..utils.faker_registry import faker_registry
+from .database_info_service import DatabaseInfoService
+from .mock_data_engine import columnar_engine
+from .mock_data_service import MockDataService
+from .mock_schema_service import MockSchemaService, SchemaStep
+
+# 数据库驱动的参数占位符
+_PLACEHOLDERS = {'format': '%s', 'pyformat': '%s', 'qmark': '?'}
+
+
+class SinkJob:
+    """一次写入任务的状态与进度"""
+
+    def __init__(self, connection_id, steps, batch_size):
+        self.id = uuid.uuid4().hex
+        self.connection_id = connection_id
+        self.steps = steps
+        self.count = sum(step.count for step in steps)
+        self.batch_size = batch_size
+        self.status = 'pending'  # pending / running / success / failed / cancelled
+        self.generated = 0
+        self.inserted = 0
+        self.step_inserted = [0] * len(steps)
+        self.error = None
+        self.created_at = datetime.now(tz_beijing)
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ('success', 'failed', 'cancelled')
+
+    def to_dict(self):
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0
+        return {
+            'id': self.id,
+            'connection_id': self.connection_id,
+            'tables': [{'table': step.fullname, 'columns': step.columns, 'count': step.count, 'inserted': inserted}
+                for step, inserted in zip(self.steps, self.step_inserted)],
+            'count': self.count,
+            'batch_size': self.batch_size,
+            'status': self.status,
+            'generated': self.generated,
+            'inserted': self.inserted,
+            'progress': round(self.inserted / self.count * 100, 2) if self.count else 100.0,
+            'rows_per_second': round(self.inserted / elapsed) if elapsed > 0 else 0,
+            'elapsed': round(elapsed, 3),
+            'error': self.error,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class MockDataSink:
+    """
+    把模拟数据直接写入 DatabaseConnection 指向的数据表
+
+    - 生成线程：列式引擎每次生成 batch_size 行并转为元组列表，放入有界队列（最多 queue_size 批），
+      生成速度快于写入时阻塞等待，内存占用与总行数无关
+    - 插入线程：从队列取批次，按驱动的 executemany 写入（PyMySQL 会改写为一条多行 INSERT ... VALUES），
+      整个任务在一个事务中，失败或取消时整体回滚
+    - 生成下一批与等待数据库写入当前批同时进行，写入速度取决于数据库的写入能力
+    - 整库写入时各表按外键依赖顺序排队进入同一条流水线，子表生成时父表的键已经生成（见 mock_schema_service）
+    - 任务状态保存在当前进程内，查询进度需访问创建任务的工作进程
+    """
+
+    def __init__(self, batch_size=5000, queue_size=4, max_jobs=100):
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # {任务ID: SinkJob}
+        self._lock = threading.Lock()
+        self._info_service = DatabaseInfoService()
+
+    def start(self, connection_id, table_name, fields, mapping=None, count=1, database=None, locale=None,
+            seed=None, batch_size=None):
+        """
+        创建并启动写入任务（连接、表结构与字段映射在返回之前校验）
+
+        Args:
+            connection_id: 数据库连接ID
+            table_name: 目标表名
+            fields: 字段配置列表，同 MockDataService.generate_mock_data
+            mapping: 字段名 -> 列名，只写入映射中的字段；为空时按字段名写入同名列
+            count: 写入行数
+            database: 目标库名，默认为连接配置的库
+            locale: 语言环境
+            seed: 随机种子
+            batch_size: 每条 INSERT 的行数
+
+        Returns:
+            SinkJob: 已启动的任务
+
+        Raises:
+            APIException: 连接不存在、表不存在或参数错误
+        """
+        count = int(count)
+        if count < 0:
+            raise APIException('count 不能小于 0', 400)
+
+        names = columnar_engine.field_names(fields)
+        if not mapping:
+            mapping = {name: name for name in names}
+        unknown = [name for name in mapping if name not in names]
+        if unknown:
+            raise APIException(f'映射中的字段未配置: {", ".join(unknown)}', 400)
+        if not mapping:
+            raise APIException('没有需要写入的字段', 400)
+
+        engine = self._info_service._get_connection_engine(connection_id)
+        try:
+            table = Table(table_name, MetaData(), schema=database or None, autoload_with=engine)
+        except Exception as e:
+            raise APIException(f'读取表结构失败: {str(e)}', 400)
+        missing = [column for column in mapping.values() if column not in table.c]
+        if missing:
+            raise APIException(f'表 {table_name} 中不存在列: {", ".join(missing)}', 400)
+
+        # 只生成映射中的字段，顺序与 INSERT 列顺序一致
+        field_map = {field_config['name']: field_config for field_config in fields
+            if field_config.get('name') in mapping and field_config.get('type')}
+        step = SchemaStep(table.name, [field_map[name] for name in mapping], count, table.schema, seed,
+            columns=list(mapping.values()))
+        return self._run(connection_id, engine, [step], locale, batch_size)
+
+    def start_schema(self, connection_id, database=None, tables=None, count=100, counts=None, null_ratio=0.1,
+            locale=None, seed=None, batch_size=None):
+        """
+        按表结构整库写入：字段配置由列类型推断，表按外键依赖顺序写入，子表只引用父表的键
+
+        Args:
+            connection_id: 数据库连接ID
+            database: 目标库名，默认为连接配置的库
+            tables: 需要写入的表，默认为库中所有表
+            count: 每张表的行数
+            counts: 单独指定行数 {表名: 行数}
+            null_ratio: 可为空列的 NULL 比例
+            locale: 语言环境
+            seed: 随机种子
+            batch_size: 每条 INSERT 的行数
+
+        Returns:
+            SinkJob: 已启动的任务
+        """
+        engine = self._info_service._get_connection_engine(connection_id)
+        steps = MockSchemaService.plan(engine, database or None, tables, int(count), counts, float(null_ratio or 0),
+            seed)
+        return self._run(connection_id, engine, steps, locale, batch_size)
+
+    def infer_fields(self, connection_id, table_name, database=None, null_ratio=0.1):
+        """由表结构推断字段配置（预览，可修改后用于 start 或 /mock_data/generate）"""
+        engine = self._info_service._get_connection_engine(connection_id)
+        return MockSchemaService.infer_fields(engine, table_name, database or None, float(null_ratio or 0))
+
+    def _run(self, connection_id, engine, steps, locale, batch_size):
+        batch_size = int(batch_size or self.batch_size)
+        if batch_size <= 0:
+            raise APIException('batch_size 必须大于 0', 400)
+        locale = faker_registry.normalize(locale) or MockDataService.default_locale
+        for step in steps:
+            step.statement = self._insert_statement(engine, step.table, step.schema, step.columns)
+
+        job = SinkJob(connection_id, steps, batch_size)
+        self._register(job)
+        batches = queue.Queue(maxsize=self.queue_size)
+        threading.Thread(target=self._generate, args=(job, batches, locale),
+            name=f'mock-sink-generator-{job.id[:8]}', daemon=True).start()
+        threading.Thread(target=self._insert, args=(job, batches, engine),
+            name=f'mock-sink-inserter-{job.id[:8]}', daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise APIException('写入任务不存在', 404)
+        return job
+
+    def jobs(self):
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id):
+        """取消任务，已写入的数据随事务回滚"""
+        job = self.get(job_id)
+        job.cancel_event.set()
+        return job
+
+    def _register(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            # 只保留最近的 max_jobs 个已结束任务
+            finished = [job_id for job_id, item in self._jobs.items() if item.done]
+            for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[job_id]
+
+    @staticmethod
+    def _insert_statement(engine, table_name, schema, columns):
+        """按驱动参数风格拼接 INSERT 语句，executemany 直接接收元组，省去逐行构造字典和绑定处理"""
+        preparer = engine.dialect.identifier_preparer
+        paramstyle = engine.dialect.paramstyle
+        if paramstyle == 'numeric':
+            placeholders = [f':{i}' for i in range(1, len(columns) + 1)]
+        elif paramstyle in _PLACEHOLDERS:
+            placeholders = [_PLACEHOLDERS[paramstyle]] * len(columns)
+        else:
+            raise APIException(f'不支持的数据库驱动参数风格: {paramstyle}', 400)
+        return (f'INSERT INTO {preparer.format_table(sql_table(table_name, schema=schema))} '
+                f'({", ".join(preparer.quote(column) for column in columns)}) VALUES ({", ".join(placeholders)})')
+
+    @staticmethod
+    def _put(job, batches, item):
+        # 插入线程已退出时不再阻塞
+        while not job.cancel_event.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _generate(self, job, batches, locale):
+        keys = {}  # 已生成的父表键 {(表名, 列名): NumPy 数组}
+        try:
+            for index, step in enumerate(job.steps):
+                collected = {key: [] for key in step.keys}
+                chunks = MockDataService.iter_chunks(step.resolve(keys), step.count, locale, step.seed,
+                    job.batch_size, key_fields=tuple(step.keys.values()))
+                for rows, columns in chunks:
+                    for key, field_name in step.keys.items():
+                        collected[key].append(columns[field_name])
+                    if not self._put(job, batches, (index, rows)):
+                        chunks.close()
+                        return
+                    job.generated += len(rows)
+                for key, chunks in collected.items():
+                    keys[key] = self._key_array(chunks)
+            self._put(job, batches, None)
+        except Exception as e:
+            self._put(job, batches, e)
+
+    @staticmethod
+    def _key_array(chunks):
+        values = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+        if values.dtype == object:
+            values = values[np.not_equal(values, None)]
+        return values
+
+    def _insert(self, job, batches, engine):
+        job.status = 'running'
+        job.started = time.monotonic()
+        try:
+            with engine.begin() as connection:
+                while True:
+                    if job.cancel_event.is_set():
+                        raise InterruptedError
+                    try:
+                        batch = batches.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    if batch is None:
+                        break
+                    if isinstance(batch, Exception):
+                        raise batch
+                    index, rows = batch
+                    connection.exec_driver_sql(job.steps[index].statement, rows)
+                    job.inserted += len(rows)
+                    job.step_inserted[index] += len(rows)
+            job.status = 'success'
+        except InterruptedError:
+            job.status = 'cancelled'
+            self._rolled_back(job)
+        except Exception as e:
+            print(f"模拟数据写入失败: {str(e)}")
+            job.status = 'failed'
+            job.error = str(e)
+            self._rolled_back(job)
+        finally:
+            job.finished = time.monotonic()
+            # 通知生成线程退出
+            job.cancel_event.set()
+
+
+    @staticmethod
+    def _rolled_back(job):
+        job.inserted = 0
+        job.step_inserted = [0] * len(job.steps)
+
+
+mock_data_sink = MockDataSink()
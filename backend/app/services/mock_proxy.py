@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 21:20
+@description  Mock 代理模式 - 未匹配的请求转发到项目配置的上游，响应缓存或录制为 Mock
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from ..core.config_versions import config_versions
+from ..core.database import db
+from ..core.exceptions import APIException
+from ..models.environment_model import Environment
+from ..models.mock_model import Mock
+from ..models.project_model import Project
+from .mock_route_table import mock_route_table
+
+# 录制方式：cache 只缓存在内存中，mock 同时保存为项目下的 Mock
+PROXY_RECORD_MODES = ('cache', 'mock')
+
+# 不转发的请求头：逐跳头、由 requests 重新计算的头，以及 Mock 自身使用的头
+SKIP_REQUEST_HEADERS = frozenset(['connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+    'trailers', 'transfer-encoding', 'upgrade', 'host', 'content-length', 'accept-encoding', 'x-mock-seed',
+    'x-mock-locale', 'x-mock-project'])
+
+# 不参与缓存键的查询参数
+SKIP_QUERY_ARGS = frozenset(['_seed', '_locale'])
+
+# 指定代理项目的请求头（项目ID），未指定时按路径前缀选择
+PROJECT_HEADER = 'X-Mock-Project'
+
+
+class ProxyTarget:
+    """开启代理模式的项目"""
+
+    __slots__ = ('project_id', 'prefix', 'base_url', 'record')
+
+    def __init__(self, project_id, prefix, base_url, record):
+        self.project_id = project_id
+        self.prefix = '/' + (prefix or '').strip('/') if (prefix or '').strip('/') else ''
+        self.base_url = base_url.rstrip('/')
+        self.record = record if record in PROXY_RECORD_MODES else 'cache'
+
+    def matches(self, path):
+        return not self.prefix or path == self.prefix or path.startswith(self.prefix + '/')
+
+    def upstream_url(self, path):
+        """去掉路径前缀后拼接到上游地址"""
+        return self.base_url + path[len(self.prefix):]
+
+
+class ProxiedResponse:
+    """上游响应（缓存中保存的也是该对象）"""
+
+    __slots__ = ('status_code', 'body', 'content_type', 'etag', 'expires_at')
+
+    def __init__(self, status_code, body, content_type, expires_at):
+        self.status_code = status_code
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.md5(body).hexdigest()
+        self.expires_at = expires_at
+
+
+class MockProxy:
+    """
+    Mock 代理（每个工作进程一份）
+
+    - 上游请求通过进程内共享的 requests.Session 发出，按主机复用 keep-alive 连接
+    - 响应按 (项目, 方法, 路径, 规范化后的查询参数与请求体摘要) 缓存 PROXY_CACHE_TTL 秒，相同请求不再访问上游
+    - 项目的代理配置在首个未匹配到 Mock 的请求时加载，项目或环境的配置版本变化时失效（同时清空响应缓存）
+    """
+
+    def __init__(self):
+        self.timeout = 10.0
+        self.pool_size = 20
+        self.cache_size = 1024
+        self.cache_ttl = 300.0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._targets = None
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._subscribed = False
+        self.offline = False
+
+    def init_app(self, app):
+        # 无数据库的只读模式下不读取项目配置，也就不转发
+        self.offline = app.config.get('MOCK_SNAPSHOT_ONLY', self.offline)
+        self.timeout = app.config.get('PROXY_TIMEOUT', self.timeout)
+        self.pool_size = app.config.get('PROXY_POOL_SIZE', self.pool_size)
+        self.cache_size = app.config.get('PROXY_CACHE_SIZE', self.cache_size)
+        self.cache_ttl = app.config.get('PROXY_CACHE_TTL', self.cache_ttl)
+        if not self._subscribed:
+            config_versions.subscribe('project', lambda: self.invalidate(clear_cache=True))
+            config_versions.subscribe('environment', lambda: self.invalidate(clear_cache=True))
+            self._subscribed = True
+
+    def invalidate(self, clear_cache=False):
+        """项目代理配置变化后调用，下次转发时重新加载"""
+        self._targets = None
+        if clear_cache:
+            with self._cache_lock:
+                self._cache.clear()
+
+    def forward(self, method, path, request_data):
+        """
+        转发未匹配到 Mock 的请求
+
+        Returns:
+            ProxiedResponse: 未开启代理模式时返回 None
+
+        Raises:
+            APIException: 上游请求失败
+        """
+        path = f'/{path.lstrip("/")}'
+        target = self._select_target(path, request_data)
+        if target is None:
+            return None
+
+        key = self._cache_key(target, method, path, request_data)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached.expires_at > time.time():
+                    self._cache.move_to_end(key)
+                    return cached
+                del self._cache[key]
+
+        url = target.upstream_url(path)
+        try:
+            upstream = self._get_session().request(method, url, params=self._query_args(request_data),
+                headers=self._forward_headers(request_data), timeout=self.timeout,
+                allow_redirects=False, **self._request_body(request_data))
+        except requests.RequestException as e:
+            raise APIException('Upstream request failed', 502, {'url': url, 'details': str(e)})
+
+        content_type = upstream.headers.get('Content-Type', 'application/json')
+        response = ProxiedResponse(upstream.status_code, upstream.content, content_type,
+            time.time() + self.cache_ttl)
+        if upstream.status_code < 500:
+            # 上游错误不缓存，下次请求重试
+            with self._cache_lock:
+                self._cache[key] = response
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            if target.record == 'mock':
+                self._record(target, method, path, response, url)
+        return response
+
+    def _select_target(self, path, request_data):
+        """请求头 X-Mock-Project 指定的项目优先，其次为路径前缀最长的项目"""
+        targets = self._load_targets()
+        if not targets:
+            return None
+        project_id = request_data.get('headers', {}).get(PROJECT_HEADER)
+        if project_id:
+            return next((target for target in targets if str(target.project_id) == str(project_id)), None)
+        return next((target for target in targets if target.matches(path)), None)
+
+    def _load_targets(self):
+        targets = self._targets
+        if targets is not None:
+            return targets
+        if self.offline:
+            self._targets = []
+            return self._targets
+
+        try:
+            config_versions.start()
+            rows = db.session.query(Project.id, Project.proxy_prefix, Project.proxy_base_url, Project.proxy_record,
+                Environment.base_url).outerjoin(Environment, Project.proxy_environment_id == Environment.id).filter(
+                Project.proxy_enabled.is_(True)).all()
+        except SQLAlchemyError as e:
+            # 数据库暂时不可用（路由表从快照提供服务）时不转发，下次请求重试
+            db.session.rollback()
+            print(f"加载代理配置失败: {str(e)}")
+            return []
+        targets = [ProxyTarget(project_id, prefix, base_url or env_base_url, record)
+            for project_id, prefix, base_url, record, env_base_url in rows if base_url or env_base_url]
+        # 前缀长的项目优先匹配
+        targets.sort(key=lambda target: len(target.prefix), reverse=True)
+        self._targets = targets
+        return targets
+
+    def _get_session(self):
+        # gunicorn fork 之后子进程不能复用父进程的连接
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                        max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    @staticmethod
+    def _query_args(request_data):
+        return {k: v for k, v in request_data.get('args', {}).items() if k not in SKIP_QUERY_ARGS}
+
+    @staticmethod
+    def _forward_headers(request_data):
+        return {k: v for k, v in request_data.get('headers', {}).items() if k.lower() not in SKIP_REQUEST_HEADERS}
+
+    @staticmethod
+    def _request_body(request_data):
+        """原始请求体原样转发（XML、文本、二进制等与 Content-Type 一致）；只有解析结果时按 JSON / 表单转发"""
+        body = request_data.get('body')
+        if body:
+            return {'data': body}
+        if body is None and request_data.get('json') not in (None, {}):
+            # 没有原始请求体的调用方，json 为 {} 表示没有请求体
+            return {'json': request_data['json']}
+        if request_data.get('form'):
+            return {'data': request_data['form']}
+        return {}
+
+    @staticmethod
+    def _body_key(request_data):
+        """
+        请求体的缓存键部分：JSON 按解析结果（键排序后序列化，[]、{}、0 等也保留），表单按排序后的字段，
+        其他请求体（XML、文本、二进制）按原始字节的摘要
+        """
+        body = request_data.get('body')
+        if body is None:
+            return ['json', request_data.get('json') or None, sorted((request_data.get('form') or {}).items())]
+        if not body:
+            return None
+        content_type = {k.lower(): v for k, v in request_data.get('headers', {}).items()}.get('content-type', '')
+        if content_type.startswith('application/json') or '+json' in content_type:
+            try:
+                return ['json', json.loads(body)]
+            except ValueError:
+                pass
+        if request_data.get('form'):
+            return ['form', sorted(request_data['form'].items())]
+        return ['raw', hashlib.sha1(body).hexdigest()]
+
+    @staticmethod
+    def _cache_key(target, method, path, request_data):
+        """查询参数与请求体规范化（键排序）后计算摘要，参数顺序不同的相同请求命中同一缓存"""
+        normalized = json.dumps([sorted(MockProxy._query_args(request_data).items()),
+            MockProxy._body_key(request_data)], sort_keys=True, ensure_ascii=False, default=str)
+        return target.project_id, method, path, hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _record(target, method, path, response, url):
+        """把 JSON 响应保存为项目下的 Mock，之后由路由表直接命中"""
+        if 'json' not in response.content_type or len(path) > 200 or method not in ('GET', 'POST', 'PUT', 'DELETE'):
+            return
+        try:
+            body = response.body.decode('utf-8')
+            json.loads(body)
+        except ValueError:
+            return
+
+        mock = Mock(name=f'{method} {path}'[:100], path=path, method=method, response_status=response.status_code,
+            response_body=body, response_delay=0, project_id=target.project_id, description=f'代理录制自 {url}')
+        try:
+            db.session.add(mock)
+            db.session.commit()
+        except IntegrityError:
+            # 并发请求已录制过同一接口
+            db.session.rollback()
+            return
+        mock_route_table.upsert(mock)
+
+
+mock_proxy = MockProxy()
@@ -0,0 +1,566 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 10:02
+@description  Mock 路由表 - 进程内缓存 mocks 表，执行 Mock 时不再逐次查库
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from ..core.config_versions import config_versions
+from ..core.database import db, datetime
+from ..core.exceptions import APIException
+from ..models.mock_model import Mock
+from ..utils.delay_util import ResponseDelay
+from ..utils.dynamic_data_util import DynamicDataProcessor
+from .mock_snapshot import MockSnapshot
+from .mock_variants import CompiledResponse, VariantIndex
+from .scenario_service import ScenarioService
+
+# 路径参数段，如 /users/{id} 中的 {id}
+_PATH_PARAM_PATTERN = re.compile(r'^\{(\w+)\}$')
+
+# 响应体尚未解析
+_UNPARSED = object()
+
+
+class MockRoute(CompiledResponse):
+    """路由表中的单条 Mock 配置（与 ORM 会话解耦的只读快照）"""
+
+    __slots__ = ('id', 'name', 'path', 'method', 'response_delay', 'delay_config', 'project_id', 'seed', 'variants',
+        'scenario', 'state_config', 'updated_at', 'is_template', '_variant_index', '_parsed_body')
+
+    # 快照记录的字段顺序（MockSnapshot 中每条路由为该顺序的元组，最后一项为解析后的响应体）
+    RECORD_FIELDS = ('id', 'name', 'path', 'method', 'response_status', 'response_body', 'response_delay',
+        'delay_config', 'project_id', 'seed', 'variants', 'scenario', 'state_config', 'updated_at')
+
+    def __init__(self, mock):
+        self.id = mock.id
+        self.name = mock.name
+        self.path = mock.path
+        self.method = mock.method
+        self.response_status = mock.response_status
+        self.response_body = mock.response_body
+        self.response_delay = mock.response_delay
+        self.delay_config = mock.delay_config
+        self.project_id = mock.project_id
+        self.seed = mock.seed or None
+        self.variants = mock.variants or None
+        self.scenario = mock.scenario or None
+        try:
+            self.state_config = ScenarioService.parse_config(mock.state_config)
+        except (ValueError, TypeError):
+            self.state_config = None
+        self.updated_at = mock.updated_at
+        try:
+            self.delay = ResponseDelay.parse(mock.response_delay, mock.delay_config)
+        except (ValueError, TypeError, KeyError):
+            self.delay = ResponseDelay.parse(mock.response_delay)
+        self.is_template = MockRouteTable.is_template(mock.path)
+        self._template = None
+        self._static_body = None
+        self._variant_index = None
+        self._parsed_body = _UNPARSED
+
+    @classmethod
+    def from_record(cls, record):
+        """由快照记录还原，响应体已解析，编译模板时不再 json.loads"""
+        fields = dict(zip(cls.RECORD_FIELDS, record))
+        if fields['updated_at']:
+            fields['updated_at'] = datetime.fromisoformat(fields['updated_at'])
+        route = cls(SimpleNamespace(**fields))
+        parsed = record[len(cls.RECORD_FIELDS)]
+        if parsed:
+            route._parsed_body = parsed[0]
+        return route
+
+    def to_record(self):
+        """快照记录：只包含可 marshal 的基础类型，解析后的响应体放在单元素元组中（未解析时为空元组）"""
+        values = [getattr(self, field) for field in self.RECORD_FIELDS]
+        values[-1] = self.updated_at.isoformat() if self.updated_at else None
+        if self._template is not None:
+            parsed = (self._template.source,)
+        elif self._parsed_body is not _UNPARSED:
+            parsed = (self._parsed_body,)
+        else:
+            try:
+                parsed = (json.loads(self.response_body),)
+            except (TypeError, ValueError):
+                # 响应体不是合法 JSON 时不预解析，执行时照常报错
+                parsed = ()
+        return tuple(values) + (parsed,)
+
+    @property
+    def template(self):
+        if self._template is not None and not self._template.is_current:
+            # 注册了新的随机标记，按已解析的响应体重新编译
+            self._parsed_body = self._template.source
+            self._template = None
+        if self._template is None and self._parsed_body is not _UNPARSED:
+            self._template = DynamicDataProcessor.compile_template(self._parsed_body)
+            self._parsed_body = _UNPARSED
+            self._static_body = None
+        return CompiledResponse.template.fget(self)
+
+    @property
+    def key(self):
+        return MockRouteTable.normalize(self.method, self.path)
+
+    @property
+    def version(self):
+        """Mock 版本：id + 更新时间，编译后的模板随版本缓存"""
+        return self.id, self.updated_at
+
+    @property
+    def variant_index(self):
+        """
+        首次使用时编译响应变体索引，未配置变体时返回 None
+
+        Raises:
+            ValueError: 变体配置错误
+        """
+        if self.variants is None:
+            return None
+        if self._variant_index is None:
+            self._variant_index = VariantIndex.compile(self.variants, self)
+        return self._variant_index
+
+    def select_response(self, request_data):
+        """
+        选择本次请求的响应：第一个匹配的变体，都不匹配时为 Mock 本身
+
+        Returns:
+            CompiledResponse: ResponseVariant 或 MockRoute
+        """
+        index = self.variant_index
+        if index is None:
+            return self
+        return index.select(request_data) or self
+
+    def __repr__(self):
+        return f'<MockRoute {self.method} {self.path}>'
+
+
+class PathTrie:
+    """
+    路径模板前缀树，按路径段逐级匹配，匹配代价只与路径深度有关
+
+    同一位置的静态段优先于参数段，例如 /users/me 优先于 /users/{id}
+    """
+
+    __slots__ = ('static', 'param', 'routes')
+
+    def __init__(self):
+        self.static = {}  # {段: PathTrie}
+        self.param = None  # 参数段子节点
+        self.routes = {}  # {method: (MockRoute, 参数名列表)}
+
+    @classmethod
+    def build(cls, routes):
+        """由路径模板 Mock 构建前缀树"""
+        root = cls()
+        for route in routes:
+            node = root
+            param_names = []
+            for segment in MockRouteTable.split_path(route.path):
+                matched = _PATH_PARAM_PATTERN.match(segment)
+                if matched:
+                    param_names.append(matched.group(1))
+                    if node.param is None:
+                        node.param = cls()
+                    node = node.param
+                else:
+                    node = node.static.setdefault(segment, cls())
+            node.routes[route.method] = (route, param_names)
+        return root
+
+    def to_data(self, index):
+        """
+        快照中的前缀树：(静态子节点 dict, 参数子节点, {method: (路由序号, 参数名元组)})
+
+        Args:
+            index: {路由键: 快照中的路由序号}
+        """
+        return ({segment: child.to_data(index) for segment, child in self.static.items()},
+            self.param.to_data(index) if self.param is not None else None,
+            {method: (index[route.key], tuple(param_names)) for method, (route, param_names) in self.routes.items()})
+
+    @classmethod
+    def from_data(cls, data, routes):
+        """由快照还原前缀树，routes 为按快照序号排列的 MockRoute 列表"""
+        static, param, node_routes = data
+        node = cls()
+        node.static = {segment: cls.from_data(child, routes) for segment, child in static.items()}
+        node.param = cls.from_data(param, routes) if param is not None else None
+        node.routes = {method: (routes[position], list(param_names))
+            for method, (position, param_names) in node_routes.items()}
+        return node
+
+    def match(self, method, segments):
+        """
+        匹配路径
+
+        Returns:
+            tuple: (MockRoute, {参数名: 值})，未匹配时返回 (None, None)
+        """
+        values = []
+        entry = self._match(method, segments, 0, values)
+        if entry is None:
+            return None, None
+        route, param_names = entry
+        return route, dict(zip(param_names, values))
+
+    def _match(self, method, segments, index, values):
+        if index == len(segments):
+            return self.routes.get(method)
+
+        segment = segments[index]
+        child = self.static.get(segment)
+        if child is not None:
+            entry = child._match(method, segments, index + 1, values)
+            if entry is not None:
+                return entry
+
+        if self.param is not None and segment:
+            values.append(segment)
+            entry = self.param._match(method, segments, index + 1, values)
+            if entry is not None:
+                return entry
+            values.pop()
+
+        return None
+
+
+class MockRouteTable:
+    """
+    每个工作进程一份的 Mock 路由表，以 (method, 规范化路径) 为键
+
+    - 普通路径按键直接查找；含 {参数} 段的路径模板放入前缀树匹配
+    - 首次访问时从 mocks 表整体加载
+    - 本进程内的增删改通过 upsert / remove 直接修补
+    - 其它工作进程、其它节点的修改通过配置版本（见 app.core.config_versions）通知，
+      refresh 只加载配置版本号大于已同步版本的 Mock（行上的 config_version 随事务提交，与提交顺序一致），
+      并移除已删除的 Mock
+    - 配置 MOCK_SNAPSHOT_PATH 时，路由表变化后由后台线程写入快照文件（MockSnapshot）；
+      新进程启动时先内存映射加载快照，再按快照的配置版本与数据库增量同步，数据库暂时不可用时也能提供服务
+    - MOCK_SNAPSHOT_ONLY 为无数据库的只读模式：只从快照（可以是导出的单个项目）加载，不访问数据库
+    """
+
+    def __init__(self):
+        self._routes = {}  # {(method, path): MockRoute}
+        self._keys_by_id = {}  # {mock_id: (method, path)}
+        self._trie = PathTrie()  # 路径模板前缀树，由 _routes 中的模板路由构建
+        self._synced_version = 0  # 已加载到的 Mock 配置版本号
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._pid = None
+        self._subscribed = False
+        self.snapshot_path = None
+        self.snapshot_only = False
+        self.snapshot_interval = 1.0
+        self._source = None  # 数据库标识，只加载同一数据库写入的快照
+        self._snapshot_pid = None  # 已尝试从快照启动的进程
+        self._snapshot_dirty = False
+        self._writer_pid = None
+
+    def init_app(self, app):
+        """订阅 Mock 配置版本的变化，读取快照配置"""
+        self.snapshot_path = app.config.get('MOCK_SNAPSHOT_PATH') or self.snapshot_path
+        self.snapshot_only = app.config.get('MOCK_SNAPSHOT_ONLY', self.snapshot_only)
+        self.snapshot_interval = app.config.get('MOCK_SNAPSHOT_INTERVAL', self.snapshot_interval)
+        self._source = hashlib.sha1(str(app.config.get('SQLALCHEMY_DATABASE_URI')).encode('utf-8')).hexdigest()[:16]
+        if not self._subscribed:
+            config_versions.subscribe('mock', self.refresh)
+            self._subscribed = True
+
+    @staticmethod
+    def normalize(method, path):
+        """规范化路由键"""
+        return method.upper(), f'/{path.lstrip("/")}'
+
+    @staticmethod
+    def split_path(path):
+        return path.lstrip('/').split('/')
+
+    @staticmethod
+    def is_template(path):
+        """路径是否包含 {参数} 段"""
+        return any(_PATH_PARAM_PATTERN.match(segment) for segment in MockRouteTable.split_path(path))
+
+    @staticmethod
+    def path_shape(path):
+        """路径模板去掉参数名后的形状，/users/{id} 与 /users/{uid} 形状相同，视为同一路径"""
+        segments = ['{}' if _PATH_PARAM_PATTERN.match(segment) else segment
+            for segment in MockRouteTable.split_path(path)]
+        return '/' + '/'.join(segments)
+
+    def match(self, method, path):
+        """
+        查找 Mock 配置，路由表已加载时不访问数据库
+
+        Returns:
+            tuple: (MockRoute, 路径参数 dict)，未匹配时返回 (None, None)
+        """
+        self._ensure_loaded()
+        method, path = self.normalize(method, path)
+
+        route = self._routes.get((method, path))
+        if route is not None:
+            return route, {}
+        return self._trie.match(method, self.split_path(path))
+
+    def upsert(self, mock):
+        """新增或更新单条 Mock（在事务提交后调用）"""
+        if not self._loaded:
+            return
+        route = MockRoute(mock)
+        with self._lock:
+            old_key = self._keys_by_id.get(route.id)
+            if old_key is not None and old_key != route.key:
+                self._routes.pop(old_key, None)
+            self._routes[route.key] = route
+            self._keys_by_id[route.id] = route.key
+            if route.is_template or (old_key is not None and self.is_template(old_key[1])):
+                self._rebuild_trie()
+        self._mark_snapshot_dirty()
+
+    def remove(self, mock_id):
+        """删除单条 Mock（在事务提交后调用）"""
+        if not self._loaded:
+            return
+        with self._lock:
+            key = self._keys_by_id.pop(mock_id, None)
+            if key is not None:
+                self._routes.pop(key, None)
+                if self.is_template(key[1]):
+                    self._rebuild_trie()
+        self._mark_snapshot_dirty()
+
+    def invalidate(self):
+        """丢弃路由表，下次访问时重新加载"""
+        with self._lock:
+            self._loaded = False
+            self._routes = {}
+            self._keys_by_id = {}
+            self._trie = PathTrie()
+            self._synced_version = 0
+
+    def reload(self):
+        """从数据库整体加载路由表"""
+        # 先读版本号再加载：加载期间提交的修改版本号更大，下一次 refresh 会重新加载
+        version = config_versions.fetch().get('mock', 0)
+        routes = {}
+        keys_by_id = {}
+        for mock in Mock.query.all():
+            route = MockRoute(mock)
+            # 版本未变的 Mock 沿用旧对象，保留已编译的模板
+            current = self._routes.get(route.key)
+            if current is not None and current.version == route.version:
+                route = current
+            routes[route.key] = route
+            keys_by_id[route.id] = route.key
+
+        trie = PathTrie.build(route for route in routes.values() if route.is_template)
+        with self._lock:
+            self._routes = routes
+            self._keys_by_id = keys_by_id
+            self._trie = trie
+            self._synced_version = version
+            self._loaded = True
+        self._mark_snapshot_dirty()
+
+    def refresh(self):
+        """
+        增量同步其它进程的修改（配置版本变化时由轮询线程调用）
+
+        - config_version 大于已同步版本的 Mock 重新加载；版本号在修改所在事务中分配，计数行的行锁持有到提交，
+          先刷新、后提交的事务也不会被跳过，不依赖各节点的时钟
+        - 只查询 id 列比对已删除的 Mock
+        """
+        if not self._loaded:
+            return
+        version = config_versions.fetch().get('mock', 0)
+        changed = Mock.query.filter(Mock.config_version > self._synced_version).all()
+        ids = {mock_id for (mock_id,) in db.session.query(Mock.id)}
+
+        with self._lock:
+            routes = dict(self._routes)
+            keys_by_id = dict(self._keys_by_id)
+            rebuild_trie = False
+            changed_count = 0
+            for mock_id in [mock_id for mock_id in keys_by_id if mock_id not in ids]:
+                key = keys_by_id.pop(mock_id)
+                routes.pop(key, None)
+                changed_count += 1
+                rebuild_trie = rebuild_trie or self.is_template(key[1])
+            for mock in changed:
+                route = MockRoute(mock)
+                current = routes.get(route.key)
+                if current is not None and current.version == route.version:
+                    continue
+                old_key = keys_by_id.get(route.id)
+                if old_key is not None and old_key != route.key:
+                    routes.pop(old_key, None)
+                    rebuild_trie = rebuild_trie or self.is_template(old_key[1])
+                routes[route.key] = route
+                keys_by_id[route.id] = route.key
+                changed_count += 1
+                rebuild_trie = rebuild_trie or route.is_template
+            self._synced_version = max(self._synced_version, version)
+
+            # 整体替换引用，读线程无需加锁
+            self._routes = routes
+            self._keys_by_id = keys_by_id
+            if rebuild_trie:
+                self._rebuild_trie()
+        if changed_count:
+            self._mark_snapshot_dirty()
+
+    def _rebuild_trie(self):
+        # 整体重建后替换引用，读线程无需加锁
+        self._trie = PathTrie.build(route for route in list(self._routes.values()) if route.is_template)
+
+    def _ensure_loaded(self):
+        # gunicorn fork 之后子进程重新加载
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.invalidate()
+                    self._pid = os.getpid()
+
+        if self._loaded:
+            return
+
+        with self._lock:
+            if self._loaded:
+                return
+            if self.snapshot_only:
+                self._load_snapshot()
+                return
+            # 先记录配置版本基线再加载：加载期间其它进程的修改会在下一次轮询时同步；
+            # 从快照启动时以快照的版本为基线，快照之后的修改由轮询线程增量同步
+            version = self._boot_from_snapshot()
+            config_versions.start({'mock': version} if version is not None else None)
+            if not self._loaded:
+                self.reload()
+
+    # ---- 快照 ----
+
+    def _boot_from_snapshot(self):
+        """
+        进程首次加载时尝试从快照启动（之后 invalidate 的重新加载直接查库）
+
+        Returns:
+            int: 快照的配置版本，未使用快照时返回 None
+        """
+        if not self.snapshot_path or self._snapshot_pid == os.getpid() or config_versions.poll_interval <= 0:
+            return None
+        self._snapshot_pid = os.getpid()
+        if not os.path.isfile(self.snapshot_path):
+            return None
+        try:
+            return self._load_snapshot()
+        except (APIException, ValueError, TypeError, KeyError, IndexError) as e:
+            print(f"Mock 快照加载失败，改为从数据库加载: {str(e)}")
+            return None
+
+    def _load_snapshot(self):
+        """
+        加载快照文件替换路由表
+
+        Returns:
+            int: 快照的配置版本
+
+        Raises:
+            APIException: 快照不存在、无法读取，或不是当前数据库的完整快照
+        """
+        try:
+            version, data = MockSnapshot.load(self.snapshot_path)
+        except (OSError, ValueError) as e:
+            raise APIException('Mock snapshot unavailable', 503, {'path': self.snapshot_path, 'details': str(e)})
+        if not self.snapshot_only and (data['source'] != self._source or data['project_id'] is not None):
+            # 其它数据库或导出的单个项目的快照不能作为增量同步的起点
+            raise APIException('Mock snapshot does not match the database', 503, {'path': self.snapshot_path})
+
+        ordered = [MockRoute.from_record(record) for record in data['routes']]
+        trie = PathTrie.from_data(data['trie'], ordered)
+        routes = {route.key: route for route in ordered}
+        with self._lock:
+            self._routes = routes
+            self._keys_by_id = {route.id: route.key for route in ordered}
+            self._trie = trie
+            self._synced_version = version or 0
+            self._loaded = True
+        return version
+
+    def export_snapshot(self, mocks, project_id=None):
+        """
+        导出快照文件内容，用于无数据库的只读部署
+
+        Args:
+            mocks: Mock 列表
+            project_id: 只导出该项目时为项目ID
+
+        Returns:
+            bytes: 快照文件内容
+        """
+        ordered = [MockRoute(mock) for mock in mocks]
+        return MockSnapshot.dumps(*self._snapshot_data(ordered), project_id=project_id)
+
+    @staticmethod
+    def _snapshot_data(ordered):
+        """路由记录 + 前缀树数据，同一路由键只保留最后一条"""
+        ordered = list({route.key: route for route in ordered}.values())
+        index = {route.key: position for position, route in enumerate(ordered)}
+        trie = PathTrie.build(route for route in ordered if route.is_template)
+        return [route.to_record() for route in ordered], trie.to_data(index)
+
+    def write_snapshot(self):
+        """
+        把当前路由表写入快照文件
+
+        快照文件的配置版本不低于本进程已同步的版本时跳过，多个工作进程不会重复写入同一版本
+        """
+        version = config_versions.version('mock')
+        current = MockSnapshot.read_version(self.snapshot_path)
+        if version and current is not None and current >= version:
+            return
+        with self._lock:
+            ordered = list(self._routes.values())
+        MockSnapshot.dump(self.snapshot_path, *self._snapshot_data(ordered), version=version, source=self._source)
+
+    def _mark_snapshot_dirty(self):
+        if not self.snapshot_path or self.snapshot_only:
+            return
+        self._snapshot_dirty = True
+        if self._writer_pid != os.getpid():
+            self._start_writer()
+
+    def _start_writer(self):
+        # gunicorn fork 之后子进程需要自己的后台线程
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            threading.Thread(target=self._write_loop, name='mock-snapshot-writer', daemon=True).start()
+            self._writer_pid = os.getpid()
+
+    def _write_loop(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            try:
+                if self._snapshot_dirty:
+                    self._snapshot_dirty = False
+                    self.write_snapshot()
+            except Exception as e:
+                print(f"Mock 快照写入失败: {str(e)}")
+
+
+mock_route_table = MockRouteTable()
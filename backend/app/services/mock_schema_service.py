@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/19 00:20
+@description  按表结构生成模拟数据 - 由列类型推断字段配置，按外键依赖顺序规划整库写入
+"""
+
+import random
+import zlib
+from graphlib import CycleError, TopologicalSorter
+
+import numpy as np
+from sqlalchemy import func, inspect, select
+from sqlalchemy import column as sql_column, table as sql_table
+from sqlalchemy.types import (Boolean, Date, DateTime, Enum, Float, Integer, JSON, Numeric, String, Time)
+
+from ..core.exceptions import APIException
+
+# 整数类型位数
+_INT_BITS = {'TINYINT': 8, 'SMALLINT': 16, 'MEDIUMINT': 24, 'INT': 32, 'INTEGER': 32, 'BIGINT': 64}
+
+# 列名 -> 文本类字段类型（整个列名或最后一段匹配，如 user_email、contact_phone）
+_NAME_HINTS = {'email': 'email', 'mail': 'email', 'phone': 'phone', 'mobile': 'phone', 'tel': 'phone',
+    'name': 'name', 'username': 'name', 'nickname': 'name', 'realname': 'name', 'address': 'address',
+    'addr': 'address', 'company': 'company', 'province': 'province', 'city': 'city', 'postcode': 'postcode',
+    'zipcode': 'postcode', 'zip': 'postcode', 'job': 'job', 'idcard': 'id_card', 'id_card': 'id_card',
+    'ssn': 'ssn', 'plate': 'license_plate', 'license_plate': 'license_plate', 'bank_card': 'bank_card'}
+
+# 无长度限制的文本列（TEXT 等）最多生成的字符数
+_TEXT_MAX_LENGTH = 200
+
+# 唯一字符串列的序号位数上限
+_SEQUENCE_DIGITS = 12
+
+
+class SchemaStep:
+    """整库写入中的一张表"""
+
+    def __init__(self, table, fields, count, schema=None, seed=None, columns=None):
+        self.table = table
+        self.schema = schema
+        self.fields = fields
+        self.count = count
+        self.seed = seed
+        # 写入的列，与 fields 顺序一致，默认与字段名相同
+        self.columns = columns or [field_config['name'] for field_config in fields]
+        self.references = []  # [(字段名, 父表键)]，父表键在本次任务中生成
+        self.keys = {}  # {父表键: 字段名}，本表生成后供后续子表引用
+        self.distinct = []  # 取值组合不能重复的外键字段组，如一对一外键 [user_id]、关联表主键 [user_id, role_id]
+        self.statement = None
+
+    @property
+    def fullname(self):
+        return f'{self.schema}.{self.table}' if self.schema else self.table
+
+    def resolve(self, keys):
+        """
+        把父表已生成的键填入引用字段；唯一外键组不放回地抽取键的组合，按行顺序排好后逐行取用
+
+        Raises:
+            ValueError: 父表键的组合数少于行数
+        """
+        references = dict(self.references)
+        fields = [dict(field_config, options=dict(field_config.get('options') or {},
+            values=keys.get(references[field_config['name']], ()))) if field_config['name'] in references
+            else field_config for field_config in self.fields]
+        if not self.distinct:
+            return fields
+
+        rng = np.random.default_rng(self.seed)
+        positions = {field_config['name']: index for index, field_config in enumerate(fields)}
+        for group in self.distinct:
+            arrays = [np.asarray(fields[positions[name]]['options'].get('values', ())) for name in group]
+            sizes = [len(values) for values in arrays]
+            total = int(np.prod(sizes, dtype=object))
+            if total < self.count:
+                raise ValueError(f'表 {self.table} 的唯一外键 {", ".join(group)} 只有 {total} 种取值，少于 {self.count} 行')
+            indices = np.unravel_index(_distinct_sample(rng, total, self.count), sizes)
+            for name, values, index in zip(group, arrays, indices):
+                field_config = fields[positions[name]]
+                fields[positions[name]] = dict(field_config, options=dict(field_config['options'],
+                    values=values[index], sequential=True))
+        return fields
+
+
+def _distinct_sample(rng, total, count):
+    """从 [0, total) 中不放回地随机抽取 count 个整数，内存与 count 成正比（count 接近 total 时为 total）"""
+    if count * 2 > total:
+        return rng.permutation(total)[:count]
+    picked = np.unique(rng.integers(0, total, size=count + count // 8 + 16))
+    while len(picked) < count:
+        picked = np.union1d(picked, rng.integers(0, total, size=count - len(picked) + 16))
+    return rng.permutation(picked)[:count]
+
+
+class MockSchemaService:
+    """
+    按表结构推断字段配置
+
+    - 整数按类型取值范围，DECIMAL 按精度与小数位，varchar 按长度截断，枚举从候选值中取
+    - 可为空的列按 null_ratio 生成 NULL
+    - 主键与唯一列生成连续序号，从已有的最大值之后开始，追加写入（包括同一种子重复写入）时不与已有数据冲突：
+      整数直接取 MAX + 1；字符串为 种子前缀 + 定宽补零的序号，总长度不超过列长度，按同一前缀的最大值续写，
+      序号位数不够容纳要生成的行数时返回 400
+    - 外键列只引用父表的键：父表在本次生成范围内时引用新生成的键，否则引用父表中已有的键；
+      父表的键以 NumPy 数组保存
+    - 唯一外键（一对一）与全部由外键组成的主键/唯一约束（关联表）不放回地抽取父表键的组合，组合数不足时返回 400
+    """
+
+    @classmethod
+    def infer_fields(cls, engine, table_name, database=None, null_ratio=0.1, seed=None):
+        """
+        由表结构推断字段配置（外键字段的 options 为父表 table、schema、column，不含键值）
+
+        Returns:
+            list: 字段配置列表，字段名与列名相同
+        """
+        inspector = inspect(engine)
+        info = cls._table_info(inspector, table_name, database)
+        with engine.connect() as connection:
+            return cls._fields(connection, info, database, null_ratio, seed)
+
+    @classmethod
+    def plan(cls, engine, database=None, tables=None, count=100, counts=None, null_ratio=0.1, seed=None):
+        """
+        规划整库写入：推断每张表的字段，按外键依赖排序，父表先于子表
+
+        Args:
+            engine: 目标数据库引擎
+            database: 库名，默认为连接配置的库
+            tables: 需要生成的表，默认为库中所有表
+            count: 每张表的行数
+            counts: 单独指定行数 {表名: 行数}
+            null_ratio: 可为空列的 NULL 比例
+            seed: 随机种子，每张表使用由 seed 和表名派生的种子
+
+        Returns:
+            list: SchemaStep 列表（依赖顺序）
+
+        Raises:
+            APIException: 表不存在、外键循环依赖或父表没有可引用的键
+        """
+        counts = counts or {}
+        inspector = inspect(engine)
+        tables = list(dict.fromkeys(tables or inspector.get_table_names(schema=database)))
+        infos = {name: cls._table_info(inspector, name, database) for name in tables}
+
+        # 只在本次生成范围内（且会生成数据）的表之间建立依赖，自引用不算依赖
+        generated = {name for name in tables if int(counts.get(name, count)) > 0}
+        graph = {name: {fk['referred_table'] for fk in infos[name]['foreign_keys']
+            if fk['referred_table'] in generated and fk['referred_table'] != name} for name in tables}
+        try:
+            order = list(TopologicalSorter(graph).static_order())
+        except CycleError as e:
+            raise APIException(f'外键存在循环依赖，无法确定生成顺序: {" -> ".join(e.args[1])}', 400)
+
+        steps = {}
+        with engine.connect() as connection:
+            for name in order:
+                step_count = int(counts.get(name, count))
+                if step_count < 0:
+                    raise APIException(f'表 {name} 的行数不能小于 0', 400)
+                fields = cls._fields(connection, infos[name], database, null_ratio, seed)
+                step_seed = None if seed is None else [int(seed), zlib.crc32(name.encode('utf-8'))]
+                step = SchemaStep(name, fields, step_count, database, step_seed)
+                for field_config in fields:
+                    if field_config['type'] == 'reference':
+                        cls._link(connection, step, field_config, steps, generated, database)
+                step.distinct = infos[name]['distinct']
+                cls._check_distinct(step, steps)
+                cls._check_sequences(step)
+                steps[name] = step
+        return list(steps.values())
+
+    @staticmethod
+    def _table_info(inspector, table_name, database):
+        try:
+            columns = inspector.get_columns(table_name, schema=database)
+        except Exception as e:
+            raise APIException(f'读取表 {table_name} 的结构失败: {str(e)}', 400)
+        indexes = inspector.get_indexes(table_name, schema=database)
+        try:
+            constraints = inspector.get_unique_constraints(table_name, schema=database)
+        except NotImplementedError:
+            constraints = []
+        primary_keys = inspector.get_pk_constraint(table_name, schema=database) or {}
+        foreign_keys = inspector.get_foreign_keys(table_name, schema=database)
+        fk_columns = {name for fk in foreign_keys for name in fk['constrained_columns']}
+        single_fk_columns = {fk['constrained_columns'][0] for fk in foreign_keys if len(fk['constrained_columns']) == 1}
+
+        unique_sets = [primary_keys.get('constrained_columns') or []]
+        unique_sets += [index['column_names'] for index in indexes if index.get('unique')]
+        unique_sets += [constraint['column_names'] for constraint in constraints]
+        unique, distinct = set(), []
+        for names in unique_sets:
+            plain = [name for name in names if name not in fk_columns]
+            if plain:
+                # 唯一约束只需保证其中一个非外键列不重复
+                unique.add(plain[0])
+            elif names and set(names) <= single_fk_columns and not any(set(names) & set(group) for group in distinct):
+                distinct.append(list(names))
+        return {'name': table_name, 'columns': columns, 'unique': unique, 'distinct': distinct,
+            'foreign_keys': foreign_keys}
+
+    @classmethod
+    def _fields(cls, connection, info, database, null_ratio, seed):
+        foreign_keys = {}
+        for fk in info['foreign_keys']:
+            for name, referred in zip(fk['constrained_columns'], fk['referred_columns']):
+                foreign_keys[name] = (fk, referred)
+
+        fields = []
+        for column in info['columns']:
+            if column.get('computed'):
+                continue
+            name = column['name']
+            if name in foreign_keys:
+                fk, referred = foreign_keys[name]
+                if len(fk['constrained_columns']) > 1:
+                    if not column['nullable']:
+                        raise APIException(f'表 {info["name"]} 的列 {name} 属于复合外键，暂不支持', 400)
+                    field_config = {'name': name, 'type': 'enum', 'options': {'choices': [None]}}
+                else:
+                    field_config = {'name': name, 'type': 'reference', 'options': {
+                        'table': fk['referred_table'], 'schema': fk.get('referred_schema'), 'column': referred}}
+            elif name in info['unique']:
+                field_config = cls._unique_field(connection, info['name'], column, database, seed)
+            else:
+                field_config = cls._column_field(column)
+            if column['nullable'] and null_ratio and name not in info['unique']:
+                field_config.setdefault('options', {})['null_ratio'] = null_ratio
+            fields.append(field_config)
+        return fields
+
+    @staticmethod
+    def _unique_field(connection, table_name, column, database, seed):
+        name = column['name']
+        column_type = column['type']
+        if isinstance(column_type, Integer):
+            # 从已有的最大值之后开始，追加写入时不冲突
+            current = connection.execute(select(func.max(sql_column(name))).select_from(
+                sql_table(table_name, schema=database))).scalar()
+            return {'name': name, 'type': 'sequence', 'options': {'start': int(current or 0) + 1}}
+        if isinstance(column_type, String):
+            token = zlib.crc32(str(seed).encode('utf-8')) if seed is not None else random.getrandbits(32)
+            # 序号最多 12 位，剩余长度放前缀；列较短时缩短前缀，varchar(10) 只有序号
+            length = column_type.length or _TEXT_MAX_LENGTH
+            width = min(_SEQUENCE_DIGITS, length)
+            prefix = f'{token:08x}-'[:length - width]
+            # 同一前缀的序号定宽补零，字符串最大值即序号最大值
+            target = sql_column(name)
+            current = connection.execute(select(func.max(target)).select_from(
+                sql_table(table_name, schema=database)).where(
+                target.between(prefix + '0' * width, prefix + '9' * width),
+                func.length(target) == len(prefix) + width)).scalar()
+            try:
+                start = int(current[len(prefix):]) + 1 if current else 1
+            except ValueError:
+                raise APIException(f'表 {table_name} 的列 {name} 已有值 {current} 与生成的序号格式冲突', 400)
+            return {'name': name, 'type': 'sequence', 'options': {'prefix': prefix, 'width': width, 'start': start}}
+        return MockSchemaService._column_field(column)
+
+    @staticmethod
+    def _column_field(column):
+        name = column['name']
+        column_type = column['type']
+        type_name = type(column_type).__name__.upper()
+
+        if isinstance(column_type, Boolean) or (type_name == 'TINYINT' and getattr(column_type, 'display_width', None) == 1):
+            return {'name': name, 'type': 'boolean'}
+        if isinstance(column_type, Enum):
+            return {'name': name, 'type': 'enum', 'options': {'choices': list(column_type.enums)}}
+        if type_name == 'SET':
+            return {'name': name, 'type': 'enum', 'options': {'choices': list(column_type.values)}}
+        if type_name == 'YEAR':
+            return {'name': name, 'type': 'number', 'options': {'min_value': 1901, 'max_value': 2155}}
+        if isinstance(column_type, Integer):
+            if name.lower() == 'age' or name.lower().endswith('_age'):
+                return {'name': name, 'type': 'age'}
+            bits = _INT_BITS.get(type_name, 32)
+            if getattr(column_type, 'unsigned', False):
+                low, high = 0, min((1 << bits) - 1, (1 << 63) - 1)
+            else:
+                low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+            return {'name': name, 'type': 'number', 'options': {'min_value': low, 'max_value': high}}
+        if isinstance(column_type, Float):
+            return {'name': name, 'type': 'number', 'options': {'min_value': 0, 'max_value': 10000, 'decimals': 2}}
+        if isinstance(column_type, Numeric):
+            precision = column_type.precision or 10
+            scale = column_type.scale or 0
+            high = 10 ** (precision - scale) - 1
+            low = 0 if getattr(column_type, 'unsigned', False) else -high
+            return {'name': name, 'type': 'number', 'options': {'min_value': low, 'max_value': high, 'decimals': scale}}
+        if isinstance(column_type, DateTime):
+            return {'name': name, 'type': 'datetime'}
+        if isinstance(column_type, Date):
+            return {'name': name, 'type': 'date'}
+        if isinstance(column_type, Time):
+            return {'name': name, 'type': 'time'}
+        if isinstance(column_type, JSON):
+            return {'name': name, 'type': 'enum', 'options': {'choices': ['{}']}}
+
+        length = getattr(column_type, 'length', None) or _TEXT_MAX_LENGTH
+        lowered = name.lower()
+        hint = _NAME_HINTS.get(lowered) or _NAME_HINTS.get(lowered.rsplit('_', 1)[-1])
+        if hint:
+            return {'name': name, 'type': hint, 'options': {'max_length': length}}
+        max_length = min(length, _TEXT_MAX_LENGTH)
+        return {'name': name, 'type': 'text', 'options': {'min_length': min(10, max_length), 'max_length': max_length}}
+
+    @staticmethod
+    def _check_distinct(step, steps):
+        """唯一外键组的取值组合数必须不少于行数"""
+        fields = {field_config['name']: field_config for field_config in step.fields}
+        for group in step.distinct:
+            total = 1
+            for name in group:
+                options = fields[name]['options']
+                total *= len(options['values']) if 'values' in options else steps[options['table']].count
+            if total < step.count:
+                raise APIException(f'表 {step.table} 的唯一外键 {", ".join(group)} 只有 {total} 种取值，'
+                    f'少于要生成的 {step.count} 行', 400)
+
+    @staticmethod
+    def _check_sequences(step):
+        """定宽序号的位数必须容纳要生成的行数"""
+        for field_config in step.fields:
+            options = field_config.get('options') or {}
+            if field_config['type'] == 'sequence' and options.get('width'):
+                last = options.get('start', 1) + step.count - 1
+                if len(str(last)) > options['width']:
+                    raise APIException(f'表 {step.table} 的列 {field_config["name"]} 长度只能容纳 {options["width"]} 位序号，'
+                        f'无法再生成 {step.count} 行', 400)
+
+    @staticmethod
+    def _link(connection, step, field_config, steps, generated, database):
+        """外键字段：父表在本次生成时引用新生成的键，否则读取父表已有的键"""
+        options = field_config['options']
+        parent, parent_column = options['table'], options['column']
+        key = (parent, parent_column)
+        if parent in generated and parent in steps:
+            step.references.append((field_config['name'], key))
+            steps[parent].keys[key] = parent_column
+            return
+        rows = connection.execute(select(sql_column(parent_column)).select_from(
+            sql_table(parent, schema=options.get('schema') or database))).scalars().all()
+        values = np.asarray([value for value in rows if value is not None])
+        if not len(values) and not options.get('null_ratio'):
+            raise APIException(f'表 {step.table} 的外键 {field_config["name"]} 引用的表 {parent} 没有数据', 400)
+        options['values'] = values
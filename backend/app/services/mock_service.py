@@ -7,19 +7,80 @@
 @description
 """
 
+import hashlib
 import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
 
+from flask import current_app
 from sqlalchemy.exc import IntegrityError
 
 from ..core.database import db
 from ..core.exceptions import APIException
+from ..core.mock_metrics import mock_metrics
 from ..models.mock_model import Mock
-from ..utils.dynamic_data_util import DynamicDataProcessor
+from ..utils.delay_util import ResponseDelay
+from ..utils.dynamic_data_util import RandomDataGenerator
+from ..utils.faker_registry import faker_registry
+from .mock_proxy import mock_proxy
+from .mock_route_table import mock_route_table, MockRouteTable
+from .mock_variants import VariantIndex
+from .scenario_service import ScenarioService
+
+
+class MockResponse:
+    """
+    Mock 执行结果
+
+    - 静态模板：body 为预先序列化好的 bytes，etag 为其摘要
+    - 动态模板：data 为渲染后的数据，由调用方序列化
+    - 含数组展开指令的模板：stream 为逐块产出 bytes 的迭代器，渲染在响应输出时进行
+    - delay 为本次响应需要等待的秒数，由服务入口决定阻塞等待还是异步等待
+    - lookup_seconds / render_seconds 为路由查找与模板渲染耗时，用于指标统计
+    - 代理模式转发的响应：body 为上游响应体，content_type 为上游的内容类型
+    """
+
+    __slots__ = ('status_code', 'data', 'body', 'stream', 'etag', 'content_type', 'delay', 'mock_id', 'mock_path',
+        'lookup_seconds', 'render_seconds')
+
+    def __init__(self, status_code, data=None, body=None, stream=None, etag=None, delay=0, mock=None,
+            content_type='application/json'):
+        self.status_code = status_code
+        self.data = data
+        self.body = body
+        self.stream = stream
+        self.etag = etag
+        self.content_type = content_type
+        self.delay = delay
+        self.mock_id = mock.id if mock else None
+        self.mock_path = mock.path if mock else None
+        self.lookup_seconds = 0
+        self.render_seconds = 0
+
+    @property
+    def is_static(self):
+        return self.body is not None
 
 
 class MockService:
     """Mock API 服务层"""
 
+    # 种子、语言环境的请求头与查询参数
+    SEED_HEADER = 'X-Mock-Seed'
+    SEED_ARG = '_seed'
+    LOCALE_HEADER = 'X-Mock-Locale'
+    LOCALE_ARG = '_locale'
+
+    # 代理响应在指标中的路径标签
+    PROXY_METRICS_PATH = '<proxy>'
+
+    # (Mock ID, 更新时间, 变体序号, 种子, 语言环境) -> (响应体 bytes, ETag)
+    _rendered_cache = OrderedDict()
+    _rendered_cache_lock = threading.Lock()
+
     @staticmethod
     def get_all_mocks(page=1, per_page=10, name=None, path=None, method=None, project_id=None):
         """获取所有 Mock API（支持分页和搜索）"""
@@ -58,14 +119,23 @@ class MockService:
         if not all(field in data for field in required_fields):
             raise APIException('Missing required fields', 400)
 
+        delay_config = MockService._validate_delay_config(data.get('response_delay', 0), data.get('delay_config'))
+        variants = MockService._validate_variants(data.get('variants'), data['response_status'],
+            data['response_body'])
+        state_config = MockService._validate_state_config(data.get('scenario'), data.get('state_config'))
+        MockService._check_path_template_conflict(data['path'], data['method'].upper())
+
         try:
             mock = Mock(name=data['name'], path=data['path'], project_id=data.get('project_id'),
                 method=data['method'].upper(), response_status=data['response_status'],
                 response_body=data['response_body'], response_delay=data.get('response_delay', 0),
+                delay_config=delay_config, seed=data.get('seed') or None, variants=variants,
+                scenario=data.get('scenario') or None, state_config=state_config,
                 description=data.get('description', ''))
 
             db.session.add(mock)
             db.session.commit()
+            mock_route_table.upsert(mock)
 
             return mock.to_dict()
 
@@ -90,12 +160,90 @@ class MockService:
         mock.response_status = data.get('response_status', mock.response_status)
         mock.response_body = data.get('response_body', mock.response_body)
         mock.response_delay = data.get('response_delay', mock.response_delay)
+        mock.delay_config = MockService._validate_delay_config(mock.response_delay,
+            data.get('delay_config', mock.delay_config))
+        mock.seed = data.get('seed', mock.seed) or None
+        mock.variants = MockService._validate_variants(data.get('variants', mock.variants), mock.response_status,
+            mock.response_body)
+        mock.scenario = data.get('scenario', mock.scenario) or None
+        mock.state_config = MockService._validate_state_config(mock.scenario,
+            data.get('state_config', mock.state_config))
         mock.description = data.get('description', mock.description)
 
+        MockService._check_path_template_conflict(mock.path, mock.method, mock_id)
+
         db.session.commit()
+        mock_route_table.upsert(mock)
 
         return mock.to_dict()
 
+    @staticmethod
+    def _validate_delay_config(response_delay, delay_config):
+        """校验延迟分布配置，返回入库的 JSON 字符串"""
+        if not delay_config:
+            return None
+        if isinstance(delay_config, dict):
+            delay_config = json.dumps(delay_config)
+
+        try:
+            ResponseDelay.parse(response_delay, delay_config)
+            return delay_config
+        except (ValueError, TypeError, KeyError) as e:
+            db.session.rollback()
+            raise APIException('Invalid delay config', 400, {'details': str(e), 'delay_config': delay_config})
+
+    @staticmethod
+    def _validate_variants(variants, response_status, response_body):
+        """校验响应变体配置（规则、JSONPath、正则、延迟），返回入库的 JSON 字符串"""
+        if not variants:
+            return None
+        if not isinstance(variants, str):
+            variants = json.dumps(variants, ensure_ascii=False)
+
+        try:
+            defaults = SimpleNamespace(response_status=response_status, response_body=response_body,
+                delay=ResponseDelay.parse(0))
+            for variant in VariantIndex.compile(variants, defaults).variants:
+                variant.template  # 编译响应体模板，响应体不是合法 JSON 时抛出 JSONDecodeError
+            return variants
+        except (ValueError, TypeError, KeyError) as e:
+            db.session.rollback()
+            raise APIException('Invalid variants', 400, {'details': str(e), 'variants': variants})
+
+    @staticmethod
+    def _validate_state_config(scenario, state_config):
+        """校验场景状态操作配置，返回入库的 JSON 字符串"""
+        if not state_config:
+            return None
+        if isinstance(state_config, dict):
+            state_config = json.dumps(state_config, ensure_ascii=False)
+
+        try:
+            if not scenario:
+                raise ValueError('配置状态操作时必须指定场景名 scenario')
+            ScenarioService.parse_config(state_config)
+            return state_config
+        except (ValueError, TypeError) as e:
+            db.session.rollback()
+            raise APIException('Invalid state config', 400, {'details': str(e), 'state_config': state_config})
+
+    @staticmethod
+    def _check_path_template_conflict(path, method, exclude_id=None):
+        """
+        路径模板的唯一性校验：uq_path_method 只能约束字面量相同的路径，
+        /users/{id} 与 /users/{uid} 形状相同，同一方法下也视为重复
+        """
+        if not MockRouteTable.is_template(path):
+            return
+
+        shape = MockRouteTable.path_shape(path)
+        candidates = Mock.query.filter(Mock.method == method, Mock.path.contains('{')).all()
+        for candidate in candidates:
+            if candidate.id != exclude_id and MockRouteTable.path_shape(candidate.path) == shape:
+                db.session.rollback()
+                raise APIException(f"Path '{path}' with method '{method}' already exists", 409,
+                    {'path': path, 'method': method, 'conflict': candidate.path})
+
     @staticmethod
     def delete_mock(mock_id):
         """删除 Mock API"""
@@ -103,6 +251,7 @@ class MockService:
         mock = Mock.query.get_or_404(mock_id)
         db.session.delete(mock)
         db.session.commit()
+        mock_route_table.remove(mock_id)
 
         return {'message': 'Mock API deleted successfully'}
 
@@ -110,24 +259,157 @@ class MockService:
     def execute_mock(api_path, http_method, request_data):
         """执行 Mock API"""
 
-        # 查找Mock配置
-        mock = Mock.query.filter_by(path=f'/{api_path.lstrip("/")}', method=http_method).first()
+        # 查找Mock配置（进程内路由表，不访问数据库）
+        started = time.perf_counter()
+        mock, path_params = mock_route_table.match(http_method, api_path)
+        lookup_seconds = time.perf_counter() - started
 
         if not mock:
-            raise APIException('Mock API not found', 404, {'path': api_path, 'method': http_method})
-
-        # 解析响应模板
+            # 项目开启代理模式时转发到上游（相同请求命中响应缓存）
+            started = time.perf_counter()
+            proxied = mock_proxy.forward(http_method, api_path, request_data)
+            if proxied is None:
+                mock_metrics.observe_miss(http_method, lookup_seconds)
+                raise APIException('Mock API not found', 404, {'path': api_path, 'method': http_method})
+            result = MockResponse(proxied.status_code, body=proxied.body, etag=proxied.etag,
+                content_type=proxied.content_type)
+            result.mock_path = MockService.PROXY_METRICS_PATH
+            result.lookup_seconds = lookup_seconds
+            result.render_seconds = time.perf_counter() - started
+            return result
+
+        # 选择响应变体（路径参数可参与匹配），再解析并编译响应模板（按 Mock 版本缓存）
+        started = time.perf_counter()
+        request_data['path'] = path_params
+        if mock.scenario:
+            # 有状态 Mock：先执行状态操作（只读写进程内存储），模板通过 {state.xxx} 读取结果
+            request_data['state'] = ScenarioService.apply(mock.scenario, mock.state_config, request_data)
         try:
-            response_data = json.loads(mock.response_body)
-            print(f"Mock API 原始响应: {response_data}")
+            response = mock.select_response(request_data)
+        except ValueError as e:
+            raise APIException('Invalid variants', 500, {'details': str(e), 'variants': mock.variants})
+        try:
+            template = response.template
         except json.JSONDecodeError as e:
-            raise APIException('Invalid JSON template', 500, {'details': str(e), 'template': mock.response_body})
+            raise APIException('Invalid JSON template', 500, {'details': str(e), 'template': response.response_body})
+
+        delay = 0 if response.delay.is_zero else response.delay.sample() / 1000
+        seed = MockService._resolve_seed(request_data, mock)
+        locale = MockService._resolve_locale(request_data)
+
+        if template.is_static:
+            # 静态模板直接返回预先序列化的响应体
+            body, etag = response.get_static_body(MockService._dumps)
+            result = MockResponse(response.response_status, body=body, etag=etag, delay=delay, mock=mock)
+        elif seed is not None and template.is_cacheable:
+            # 相同种子的渲染结果固定，按 (Mock 版本, 变体, 种子, 标记注册表版本) 缓存
+            body, etag = MockService._render_seeded(mock, response, seed, locale)
+            result = MockResponse(response.response_status, body=body, etag=etag, delay=delay, mock=mock)
+        elif template.is_streaming:
+            # 大数组按块流式输出，dumps 在响应迭代时调用，需提前取出不依赖应用上下文的序列化函数
+            stream = template.iter_encoded(request_data, current_app.json.dumps)
+            if seed is not None or locale is not None:
+                stream = MockService._bound_stream(stream, seed, locale)
+            result = MockResponse(response.response_status, stream=stream, delay=delay, mock=mock)
+        else:
+            # 处理模板，路径参数通过 {request.path.xxx} 引用
+            with faker_registry.use(locale), RandomDataGenerator.seeded(seed):
+                processed_data = template.render(request_data)
+            result = MockResponse(response.response_status, data=processed_data, delay=delay, mock=mock)
+
+        result.lookup_seconds = lookup_seconds
+        result.render_seconds = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _resolve_seed(request_data, mock):
+        """种子优先级：请求头 X-Mock-Seed > 查询参数 _seed > Mock 配置"""
+        seed = (request_data.get('headers', {}).get(MockService.SEED_HEADER)
+            or request_data.get('args', {}).get(MockService.SEED_ARG) or mock.seed)
+        return str(seed) if seed else None
+
+    @staticmethod
+    def _resolve_locale(request_data):
+        """
+        Faker 语言环境：请求头 X-Mock-Locale > 查询参数 _locale，未指定时返回 None（使用默认语言环境）
+
+        Raises:
+            APIException: 不支持的语言环境
+        """
+        locale = (request_data.get('headers', {}).get(MockService.LOCALE_HEADER)
+            or request_data.get('args', {}).get(MockService.LOCALE_ARG))
+        try:
+            return faker_registry.normalize(locale)
+        except ValueError as e:
+            raise APIException('Unsupported locale', 400, {'details': str(e), 'locale': locale})
+
+    @staticmethod
+    def _render_seeded(mock, response, seed, locale=None):
+        """
+        种子渲染并缓存序列化结果
+
+        Args:
+            mock: MockRoute
+            response: 选中的响应（MockRoute 本身或 ResponseVariant）
+
+        Returns:
+            tuple: (响应体 bytes, ETag)
+        """
+        key = (mock.id, mock.updated_at, getattr(response, 'index', None), seed, locale,
+            RandomDataGenerator.tags_version)
+        cache = MockService._rendered_cache
+        with MockService._rendered_cache_lock:
+            cached = cache.get(key)
+            if cached is not None:
+                cache.move_to_end(key)
+                return cached
+
+        with faker_registry.use(locale), RandomDataGenerator.seeded(seed):
+            body = MockService._dumps(response.template.render({})).encode('utf-8')
+        cached = body, hashlib.md5(body).hexdigest()
+
+        max_size = current_app.config.get('MOCK_RENDER_CACHE_SIZE', 1024)
+        with MockService._rendered_cache_lock:
+            cache[key] = cached
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+        return cached
+
+    @staticmethod
+    def _bound_stream(stream, seed, locale):
+        """
+        流式响应在输出时才渲染，每块渲染前重新绑定同一个种子随机数生成器与语言环境
+
+        逐块绑定而不是包住整个生成器：各块可能在不同线程/上下文中迭代（见 app.mock_asgi）
+        """
+        rng = random.Random(seed) if seed is not None else None
+        while True:
+            with faker_registry.use(locale), RandomDataGenerator.seeded(rng):
+                chunk = next(stream, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    @staticmethod
+    def _dumps(data):
+        """与 jsonify 一致的序列化方式（使用应用的 JSON provider）"""
+        return f"{current_app.json.dumps(data)}\n"
 
-        # 处理模板
-        processed_data = DynamicDataProcessor.process_template(response_data, request_data)
+    @staticmethod
+    def export_snapshot(project_id=None):
+        """
+        导出 Mock 快照文件，配合 MOCK_SNAPSHOT_ONLY 在无数据库的环境（如 CI）中提供只读 Mock 服务
+
+        Args:
+            project_id: 只导出该项目的 Mock，为空时导出全部
 
-        print(f"Mock API 处理后的响应: {processed_data}")
-        return processed_data, mock.response_status
+        Returns:
+            bytes: 快照文件内容
+        """
+        query = Mock.query
+        if project_id:
+            query = query.filter(Mock.project_id == project_id)
+        return mock_route_table.export_snapshot(query.order_by(Mock.id).all(), project_id)
 
     @staticmethod
     def generate_curl_command(api_path, method, host_url):
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 22:10
+@description  Mock 路由表快照文件 - 冷启动与无数据库只读部署时直接加载
+
+文件格式（小端）：
+    文件头  magic(8) + 格式版本(2) + marshal 版本(2) + Python 版本(2) + 保留(2) + 数据长度(4) + CRC32(4) + 配置版本(8)
+    数据    marshal 序列化的 dict：{'source', 'project_id', 'created_at', 'routes', 'trie'}
+
+marshal 只在相同 Python 版本之间兼容，版本不一致的快照视为无效；快照只由本服务写入本地文件，不接收外部上传。
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from ..core.database import datetime, tz_beijing
+
+MAGIC = b'MOCKSNAP'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sHHH2xIIq')
+_PYTHON_VERSION = sys.version_info[0] * 100 + sys.version_info[1]
+
+
+class MockSnapshot:
+    """快照文件的读写（只处理可 marshal 的基础类型，与路由表结构解耦）"""
+
+    @staticmethod
+    def dumps(routes, trie, version=0, source=None, project_id=None):
+        """
+        序列化快照
+
+        Args:
+            routes: 路由记录列表（MockRoute.to_record）
+            trie: 路径模板前缀树数据（PathTrie.to_data）
+            version: Mock 配置版本
+            source: 数据来源（数据库标识），导出的快照为 None
+            project_id: 只包含该项目的 Mock 时为项目ID
+
+        Returns:
+            bytes: 快照文件内容
+        """
+        payload = marshal.dumps({'source': source, 'project_id': project_id,
+            'created_at': datetime.now(tz_beijing).isoformat(), 'routes': routes, 'trie': trie})
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version, _PYTHON_VERSION, len(payload),
+            zlib.crc32(payload), version)
+        return header + payload
+
+    @staticmethod
+    def dump(path, routes, trie, version=0, source=None):
+        """写入快照文件（先写临时文件再改名，读取方不会读到写了一半的文件）"""
+        data = MockSnapshot.dumps(routes, trie, version, source)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        """
+        内存映射读取快照文件
+
+        Returns:
+            tuple: (配置版本, 快照数据 dict)
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 文件格式、版本或校验和不匹配
+        """
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            version, length, checksum = MockSnapshot._parse_header(mapped)
+            view = memoryview(mapped)
+            try:
+                payload = view[_HEADER.size:_HEADER.size + length]
+                if len(payload) != length or zlib.crc32(payload) != checksum:
+                    raise ValueError('快照文件已损坏')
+                data = marshal.loads(payload)
+            finally:
+                # 释放对映射内存的引用后才能关闭 mmap
+                payload = None
+                view.release()
+        if not isinstance(data, dict) or 'routes' not in data or 'trie' not in data:
+            raise ValueError('快照文件内容无效')
+        return version, data
+
+    @staticmethod
+    def read_version(path):
+        """只读取文件头中的配置版本，文件不存在或无效时返回 None"""
+        try:
+            with open(path, 'rb') as f:
+                return MockSnapshot._parse_header(f.read(_HEADER.size))[0]
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _parse_header(data):
+        if len(data) < _HEADER.size:
+            raise ValueError('快照文件头不完整')
+        magic, format_version, marshal_version, python_version, length, checksum, version = _HEADER.unpack_from(
+            data)
+        if magic != MAGIC:
+            raise ValueError('不是 Mock 快照文件')
+        if (format_version, marshal_version, python_version) != (FORMAT_VERSION, marshal.version, _PYTHON_VERSION):
+            raise ValueError(f'快照版本不兼容: 格式 {format_version}，Python {python_version}')
+        return version, length, checksum
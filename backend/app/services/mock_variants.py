@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 20:10
+@description  Mock 响应变体 - 按请求头、查询参数、表单、JSON 请求体匹配返回不同响应
+"""
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+
+from jsonpath_ng import parse as parse_jsonpath
+
+from ..utils.delay_util import ResponseDelay
+from ..utils.dynamic_data_util import DynamicDataProcessor
+
+# 匹配规则的取值来源：与 execute_mock 的 request_data 键一致，json 来源的 key 为 JSONPath
+RULE_SOURCES = ('headers', 'args', 'form', 'json', 'path')
+
+# 可建立哈希索引的操作符
+INDEXED_OPS = ('eq', 'in')
+RULE_OPS = INDEXED_OPS + ('ne', 'regex', 'contains', 'exists', 'missing')
+
+# 请求中不存在该字段
+_MISSING = object()
+
+
+class CompiledResponse:
+    """一组响应配置：状态码 + 响应体模板 + 延迟，模板首次使用时编译"""
+
+    __slots__ = ('response_status', 'response_body', 'delay', '_template', '_static_body')
+
+    @property
+    def template(self):
+        """
+        首次使用时编译响应模板，之后直接复用
+
+        Raises:
+            json.JSONDecodeError: 响应体不是合法 JSON
+        """
+        if self._template is None or not self._template.is_current:
+            self._template = DynamicDataProcessor.compile_template(json.loads(self.response_body))
+            self._static_body = None
+        return self._template
+
+    def get_static_body(self, dumps):
+        """
+        静态模板（不含任何动态/随机标记）预先序列化的响应体
+
+        Args:
+            dumps: 序列化函数，返回 str
+
+        Returns:
+            tuple: (响应体 bytes, ETag)
+        """
+        if self._static_body is None:
+            body = dumps(self.template.source).encode('utf-8')
+            self._static_body = body, hashlib.md5(body).hexdigest()
+        return self._static_body
+
+
+class MatchRule:
+    """
+    单条匹配规则，如 {"source": "args", "key": "userId", "op": "eq", "value": "0"}
+
+    比较统一使用规范化后的字符串：查询参数 "1" 与 JSON 请求体中的 1 等价
+    """
+
+    __slots__ = ('source', 'key', 'op', 'value', 'dimension', '_pattern')
+
+    def __init__(self, config):
+        if not isinstance(config, dict):
+            raise ValueError('匹配规则必须是对象')
+        self.source = config.get('source')
+        self.key = config.get('key')
+        self.op = config.get('op', 'eq')
+        if self.source not in RULE_SOURCES:
+            raise ValueError(f'不支持的取值来源: {self.source}，可选 {", ".join(RULE_SOURCES)}')
+        if not self.key or not isinstance(self.key, str):
+            raise ValueError('匹配规则缺少 key')
+        if self.op not in RULE_OPS:
+            raise ValueError(f'不支持的操作符: {self.op}，可选 {", ".join(RULE_OPS)}')
+
+        if self.source == 'headers':
+            # 请求头名称不区分大小写，request_data 中统一为首字母大写形式
+            self.key = self.key.title()
+        elif self.source == 'json':
+            _compile_jsonpath(self.key)
+        self.dimension = (self.source, self.key)
+
+        value = config.get('value')
+        self._pattern = None
+        if self.op == 'in':
+            if not isinstance(value, list):
+                raise ValueError('in 操作符的 value 必须是数组')
+            self.value = frozenset(_canonical(item) for item in value)
+        elif self.op == 'regex':
+            try:
+                self._pattern = re.compile(str(value))
+            except re.error as e:
+                raise ValueError(f'正则表达式错误: {value}: {e}')
+            self.value = value
+        elif self.op in ('exists', 'missing'):
+            self.value = None
+        else:
+            self.value = value if self.op == 'contains' else _canonical(value)
+
+    @property
+    def index_keys(self):
+        """可放入哈希索引的取值，不可索引的规则返回 None"""
+        if self.op == 'eq':
+            return (self.value,)
+        if self.op == 'in':
+            return tuple(self.value)
+        return None
+
+    def matches(self, view):
+        actual = view.get(self.dimension)
+        if self.op == 'exists':
+            return actual is not _MISSING
+        if self.op == 'missing':
+            return actual is _MISSING
+        if actual is _MISSING:
+            return self.op == 'ne'
+        if self.op == 'eq':
+            return _canonical(actual) == self.value
+        if self.op == 'in':
+            return _canonical(actual) in self.value
+        if self.op == 'ne':
+            return _canonical(actual) != self.value
+        if self.op == 'regex':
+            return self._pattern.search(_canonical(actual)) is not None
+        # contains：数组包含元素，或字符串包含子串
+        if isinstance(actual, list):
+            expected = _canonical(self.value)
+            return any(_canonical(item) == expected for item in actual)
+        return str(self.value) in _canonical(actual)
+
+
+class ResponseVariant(CompiledResponse):
+    """
+    单个响应变体：全部规则匹配时返回该变体的响应
+
+    未配置的状态码、响应体、延迟沿用 Mock 本身的配置
+    """
+
+    __slots__ = ('index', 'name', 'rules', 'anchor')
+
+    def __init__(self, index, config, defaults):
+        if not isinstance(config, dict):
+            raise ValueError(f'变体 {index} 必须是对象')
+        self.index = index
+        self.name = config.get('name') or f'variant-{index}'
+        rules = config.get('match') or []
+        if not isinstance(rules, list):
+            raise ValueError(f'变体 {self.name} 的 match 必须是数组')
+        self.rules = [MatchRule(rule) for rule in rules]
+        # 第一条可索引的规则作为索引键，命中索引后只需校验其余规则
+        self.anchor = next((rule for rule in self.rules if rule.index_keys is not None), None)
+
+        self.response_status = int(config.get('response_status') or defaults.response_status)
+        body = config.get('response_body', defaults.response_body)
+        self.response_body = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+        if 'response_delay' in config or config.get('delay_config'):
+            self.delay = ResponseDelay.parse(config.get('response_delay', 0), config.get('delay_config'))
+        else:
+            self.delay = defaults.delay
+        self._template = None
+        self._static_body = None
+
+    def matches(self, view, skip=None):
+        return all(rule.matches(view) for rule in self.rules if rule is not skip)
+
+    def __repr__(self):
+        return f'<ResponseVariant {self.index} {self.name}>'
+
+
+class VariantIndex:
+    """
+    变体索引，按配置顺序取第一个匹配的变体
+
+    - 含 eq / in 规则的变体按 (来源, 字段) -> {取值: [变体]} 放入哈希桶，每个字段只从请求中取一次值
+    - 没有可索引规则的变体作为剩余谓词，按顺序逐个校验
+    - 候选变体 = 命中的桶 + 剩余谓词，按配置顺序校验，选择代价与变体总数无关
+    """
+
+    __slots__ = ('variants', '_buckets', '_residual')
+
+    def __init__(self, variants):
+        self.variants = variants
+        self._buckets = {}  # {(来源, 字段): {取值: [变体]}}
+        self._residual = []
+        for variant in variants:
+            if variant.anchor is None:
+                self._residual.append(variant)
+                continue
+            buckets = self._buckets.setdefault(variant.anchor.dimension, {})
+            for value in variant.anchor.index_keys:
+                buckets.setdefault(value, []).append(variant)
+
+    @classmethod
+    def compile(cls, config, defaults):
+        """
+        编译变体配置
+
+        Args:
+            config: 变体数组（JSON 字符串或 list）
+            defaults: 提供默认状态码、响应体、延迟的对象（MockRoute）
+
+        Raises:
+            ValueError: 配置错误
+        """
+        if isinstance(config, str):
+            config = json.loads(config) if config.strip() else []
+        if not isinstance(config, list):
+            raise ValueError('variants 必须是数组')
+        return cls([ResponseVariant(index, item, defaults) for index, item in enumerate(config)])
+
+    def select(self, request_data):
+        """
+        选择第一个匹配的变体
+
+        Returns:
+            ResponseVariant: 未匹配时返回 None
+        """
+        view = _RequestView(request_data)
+        candidates = self._residual
+        merged = False
+        for dimension, buckets in self._buckets.items():
+            actual = view.get(dimension)
+            if actual is _MISSING:
+                continue
+            hit = buckets.get(_canonical(actual))
+            if hit:
+                candidates = candidates + hit if candidates else hit
+                merged = merged or candidates is not hit
+        if merged:
+            candidates = sorted(candidates, key=lambda variant: variant.index)
+
+        for variant in candidates:
+            if variant.matches(view, skip=variant.anchor):
+                return variant
+        return None
+
+    def __len__(self):
+        return len(self.variants)
+
+
+class _RequestView:
+    """请求取值视图，同一字段在一次选择中只解析一次"""
+
+    __slots__ = ('request_data', '_values')
+
+    def __init__(self, request_data):
+        self.request_data = request_data
+        self._values = {}
+
+    def get(self, dimension):
+        value = self._values.get(dimension, self)
+        if value is self:
+            value = self._values[dimension] = self._extract(*dimension)
+        return value
+
+    def _extract(self, source, key):
+        data = self.request_data.get(source)
+        if source == 'json':
+            matches = _compile_jsonpath(key).find(data) if data is not None else []
+            return matches[0].value if matches else _MISSING
+        if not isinstance(data, dict):
+            return _MISSING
+        return data.get(key, _MISSING)
+
+
+@lru_cache(maxsize=1024)
+def _compile_jsonpath(expression):
+    try:
+        return parse_jsonpath(expression)
+    except Exception as e:
+        raise ValueError(f'JSONPath 表达式错误: {expression}: {e}')
+
+
+def _canonical(value):
+    """规范化比较值：字符串原样，其它按 JSON 序列化（1 -> "1"，true -> "true"）"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 18:40
+@description  OpenAPI / Swagger 批量导入 Mock - 按响应 Schema 生成带随机标记的响应模板
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from itertools import chain
+
+import yaml
+from sqlalchemy import insert, update
+
+from ..core.config_versions import config_versions
+from ..core.database import db, datetime, tz_beijing
+from ..core.exceptions import APIException
+from ..models.mock_model import Mock
+from .mock_route_table import mock_route_table, MockRouteTable
+
+# 字符串 format -> 随机标记
+STRING_FORMAT_TAGS = {'email': '${email}', 'uuid': '${uuid}', 'date-time': '${datetime}', 'date': '${date}',
+    'ipv4': '${ipv4}', 'uri': '${image_url}', 'url': '${image_url}', 'hostname': '${word}', 'byte': '${word}'}
+
+# 字符串类型 -> 随机标记
+TYPE_TAGS = {'string': '${word}'}
+
+# 非字符串类型 -> 类型值：随机标记只能出现在字符串中，渲染结果也是字符串（"6989"、"True"），
+# 整数、数字、布尔字段改为生成对应 JSON 类型的值，保证响应与 Schema 的类型一致
+TYPE_VALUES = {'integer': 0, 'number': 0.0, 'boolean': False}
+
+# 模板生成规则版本，参与操作摘要；规则变化后重新导入时更新已导入的 Mock
+TEMPLATE_VERSION = 2
+
+# Mock 执行入口支持的 HTTP 方法
+IMPORT_METHODS = ('get', 'post', 'put', 'delete')
+
+
+class SpecResolver:
+    """
+    单份规范内的 $ref 解析器
+
+    - 同一个 $ref 只生成一次模板，后续直接复用
+    - 操作摘要由 响应 Schema + 其引用的全部定义 计算，只有相关定义变化时摘要才变化
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._templates = {}  # {$ref: 模板}
+        self._definitions = {}  # {$ref: 定义}
+        self._digests = {}  # {$ref: 定义摘要}
+        self._direct_refs = {}  # {$ref: 定义内直接引用的 $ref 列表}
+        self._cuts = 0  # 循环引用被截断的次数
+
+    def resolve(self, ref):
+        """解析 #/definitions/X、#/components/schemas/X 等本地引用"""
+        if ref not in self._definitions:
+            if not ref.startswith('#/'):
+                raise APIException('Unsupported $ref', 400, {'ref': ref})
+            node = self.spec
+            for part in ref[2:].split('/'):
+                part = part.replace('~1', '/').replace('~0', '~')
+                if not isinstance(node, dict) or part not in node:
+                    raise APIException('Unresolved $ref', 400, {'ref': ref})
+                node = node[part]
+            self._definitions[ref] = node
+        return self._definitions[ref]
+
+    def digest(self, schema):
+        """Schema 及其引用闭包的摘要"""
+        refs = set()
+        pending = list(self._collect_refs(schema))
+        while pending:
+            ref = pending.pop()
+            if ref in refs:
+                continue
+            refs.add(ref)
+            if ref not in self._direct_refs:
+                self._direct_refs[ref] = list(self._collect_refs(self.resolve(ref)))
+                self._digests[ref] = _sha1(self.resolve(ref))
+            pending.extend(self._direct_refs[ref])
+        return _sha1([schema, sorted((ref, self._digests[ref]) for ref in refs)])
+
+    @staticmethod
+    def _collect_refs(node):
+        if isinstance(node, dict):
+            ref = node.get('$ref')
+            if isinstance(ref, str):
+                yield ref
+            for key, value in node.items():
+                if key != '$ref':
+                    yield from SpecResolver._collect_refs(value)
+        elif isinstance(node, list):
+            for item in node:
+                yield from SpecResolver._collect_refs(item)
+
+    def template(self, schema, stack=()):
+        """
+        由 Schema 生成响应模板
+
+        Args:
+            schema: Schema 对象
+            stack: 正在展开的 $ref，用于截断循环引用
+        """
+        if not isinstance(schema, dict):
+            return None
+
+        ref = schema.get('$ref')
+        if isinstance(ref, str):
+            if ref in stack:
+                self._cuts += 1
+                return None
+            if ref in self._templates:
+                return self._templates[ref]
+            cuts = self._cuts
+            result = self.template(self.resolve(ref), stack + (ref,))
+            # 展开过程中发生了循环截断的结果依赖展开顺序，不缓存
+            if self._cuts == cuts:
+                self._templates[ref] = result
+            return result
+
+        if 'example' in schema:
+            return schema['example']
+        if schema.get('enum'):
+            return schema['enum'][0]
+
+        if 'allOf' in schema:
+            merged = {}
+            for part in schema['allOf']:
+                value = self.template(part, stack)
+                if isinstance(value, dict):
+                    merged.update(value)
+            return merged
+        for key in ('oneOf', 'anyOf'):
+            if schema.get(key):
+                return self.template(schema[key][0], stack)
+
+        schema_type = schema.get('type')
+        if isinstance(schema_type, list):
+            schema_type = next((t for t in schema_type if t != 'null'), None)
+
+        if schema_type == 'object' or 'properties' in schema:
+            return {key: self.template(value, stack) for key, value in schema.get('properties', {}).items()}
+        if schema_type == 'array':
+            return [self.template(schema.get('items', {}), stack)]
+        if 'default' in schema:
+            return schema['default']
+        if schema_type == 'string':
+            return STRING_FORMAT_TAGS.get(schema.get('format'), TYPE_TAGS['string'])
+        if schema_type in ('integer', 'number') and isinstance(schema.get('minimum'), (int, float)):
+            # 有下限时取下限，保证取值在 Schema 范围内
+            return type(TYPE_VALUES[schema_type])(schema['minimum'])
+        return TYPE_VALUES.get(schema_type)
+
+
+class OpenAPIImportService:
+    """OpenAPI / Swagger 导入服务"""
+
+    # 操作摘要 -> 响应体 JSON，重复导入相同操作时跳过模板生成
+    _template_cache = OrderedDict()
+    _template_cache_size = 10000
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def load_spec(content):
+        """
+        解析 JSON / YAML 格式的规范
+
+        Raises:
+            APIException: 格式错误
+        """
+        if isinstance(content, dict):
+            return content
+        try:
+            spec = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            raise APIException('Invalid OpenAPI spec', 400, {'details': str(e)})
+        if not isinstance(spec, dict) or not isinstance(spec.get('paths'), dict):
+            raise APIException('Invalid OpenAPI spec', 400, {'details': 'paths is required'})
+        return spec
+
+    @staticmethod
+    def import_spec(spec, project_id=None):
+        """
+        批量导入规范中的接口为 Mock
+
+        - 路径 + 方法已存在且操作摘要未变化的接口不做任何修改
+        - 只更新同一项目中由导入生成（source_hash 不为空）的 Mock；手工创建或属于其它项目的同名接口不覆盖，
+          作为冲突返回
+        - 新接口在一个事务内通过 executemany 批量插入，变化的接口批量更新
+
+        Args:
+            spec: 规范内容（dict、JSON 或 YAML 字符串）
+            project_id: 所属项目ID
+
+        Returns:
+            dict: 导入统计
+        """
+        spec = OpenAPIImportService.load_spec(spec)
+        resolver = SpecResolver(spec)
+        operations = OpenAPIImportService._parse_operations(spec)
+
+        existing = {MockRouteTable.normalize(method, path): (mock_id, path, source_hash, mock_project_id)
+            for mock_id, path, method, source_hash, mock_project_id in db.session.query(Mock.id, Mock.path,
+                Mock.method, Mock.source_hash, Mock.project_id)}
+        shapes = {(key[0], MockRouteTable.path_shape(key[1])): key for key in existing if
+            MockRouteTable.is_template(key[1])}
+
+        now = datetime.now(tz_beijing)
+        inserts, updates, skipped, conflicts = [], [], [], []
+        unchanged = 0
+        for operation in operations:
+            path, method = operation['path'], operation['method']
+            key = MockRouteTable.normalize(method, path)
+
+            if len(path) > 200:
+                skipped.append({'path': path, 'method': method, 'reason': 'path too long'})
+                continue
+            shape_key = (key[0], MockRouteTable.path_shape(key[1]))
+            if key not in existing and shapes.get(shape_key, key) != key:
+                skipped.append({'path': path, 'method': method, 'reason': 'path template conflict',
+                    'conflict_with': shapes[shape_key][1]})
+                continue
+
+            source_hash = _sha1([TEMPLATE_VERSION, operation['status'], operation['name'], operation['description'],
+                resolver.digest(operation['schema']), operation['example']])
+            current = existing.get(key)
+            if current is not None and current[0] is not None and (current[2] is None or current[3] != project_id):
+                conflicts.append({'path': path, 'method': method, 'mock_id': current[0],
+                    'reason': 'manual mock' if current[2] is None else 'other project'})
+                continue
+            if current is not None and current[2] == source_hash:
+                unchanged += 1
+                continue
+
+            row = {'name': operation['name'], 'path': path, 'method': method, 'response_status': operation['status'],
+                'response_body': OpenAPIImportService._response_body(resolver, operation, source_hash),
+                'description': operation['description'], 'source_hash': source_hash, 'updated_at': now}
+            if project_id is not None:
+                row['project_id'] = project_id
+
+            if current is None:
+                row['response_delay'] = 0
+                row['created_at'] = now
+                inserts.append(row)
+                existing[key] = (None, path, source_hash, project_id)
+                if MockRouteTable.is_template(path):
+                    shapes[shape_key] = key
+            else:
+                row['id'] = current[0]
+                updates.append(row)
+
+        try:
+            if inserts or updates:
+                # 批量语句不经过会话刷新事件，手动更新配置版本通知其它工作进程，并在行上记录该版本号
+                version = config_versions.bump(db.session, 'mock')['mock']
+                for row in chain(inserts, updates):
+                    row['config_version'] = version
+            if inserts:
+                db.session.execute(insert(Mock), inserts)
+            if updates:
+                db.session.execute(update(Mock), updates)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise APIException('Failed to import OpenAPI spec', 500, {'details': str(e)})
+
+        if inserts or updates:
+            mock_route_table.invalidate()
+
+        return {'total': len(operations), 'created': len(inserts), 'updated': len(updates), 'unchanged': unchanged,
+            'skipped': skipped, 'conflicts': conflicts}
+
+    @staticmethod
+    def _parse_operations(spec):
+        """提取规范中的所有操作及其成功响应"""
+        is_swagger = 'swagger' in spec
+        base_path = (spec.get('basePath') or '').rstrip('/') if is_swagger else ''
+
+        operations = []
+        for path, path_item in spec['paths'].items():
+            if not isinstance(path_item, dict):
+                continue
+            for method in IMPORT_METHODS:
+                details = path_item.get(method)
+                if not isinstance(details, dict):
+                    continue
+
+                status, response = OpenAPIImportService._pick_response(details.get('responses') or {})
+                if is_swagger:
+                    schema = response.get('schema')
+                    example = (response.get('examples') or {}).get('application/json')
+                else:
+                    media = OpenAPIImportService._pick_media(response.get('content') or {})
+                    schema = media.get('schema')
+                    example = media.get('example')
+
+                full_path = base_path + path
+                summary = (details.get('summary') or '').strip()
+                operations.append({'path': full_path, 'method': method.upper(), 'status': status,
+                    'name': (summary or f'{method.upper()} {full_path}')[:100],
+                    'description': (details.get('description') or summary).strip(), 'schema': schema,
+                    'example': example})
+        return operations
+
+    @staticmethod
+    def _pick_response(responses):
+        """优先取状态码最小的 2xx 响应，其次 default"""
+        codes = sorted(code for code in responses if str(code).isdigit() and 200 <= int(code) < 300)
+        with_schema = [code for code in codes if OpenAPIImportService._has_body(responses[code])]
+        if with_schema or codes:
+            code = (with_schema or codes)[0]
+            return int(code), responses[code] or {}
+        if 'default' in responses:
+            return 200, responses['default'] or {}
+        return 200, {}
+
+    @staticmethod
+    def _has_body(response):
+        return isinstance(response, dict) and bool(response.get('schema') or response.get('content'))
+
+    @staticmethod
+    def _pick_media(content):
+        """OpenAPI 3：优先 application/json，其次任意 JSON 类型，最后取第一个"""
+        if 'application/json' in content:
+            return content['application/json'] or {}
+        for media_type, media in content.items():
+            if 'json' in media_type:
+                return media or {}
+        return next(iter(content.values()), None) or {}
+
+    @staticmethod
+    def _response_body(resolver, operation, source_hash):
+        """生成响应体 JSON，相同摘要的操作直接取缓存"""
+        cache = OpenAPIImportService._template_cache
+        with OpenAPIImportService._cache_lock:
+            body = cache.get(source_hash)
+            if body is not None:
+                cache.move_to_end(source_hash)
+                return body
+
+        if operation['example'] is not None:
+            template = operation['example']
+        else:
+            template = resolver.template(operation['schema'])
+        body = json.dumps({} if template is None else template, ensure_ascii=False)
+
+        with OpenAPIImportService._cache_lock:
+            cache[source_hash] = body
+            if len(cache) > OpenAPIImportService._template_cache_size:
+                cache.popitem(last=False)
+        return body
+
+
+def _sha1(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
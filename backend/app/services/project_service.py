@@ -8,8 +8,13 @@
 """
 
 from ..core.database import db
+from ..core.exceptions import APIException
 from ..models.mock_model import Mock
 from ..models.project_model import Project
+from .mock_proxy import mock_proxy, PROXY_RECORD_MODES
+
+# 代理模式相关字段
+PROXY_FIELDS = ('proxy_enabled', 'proxy_base_url', 'proxy_environment_id', 'proxy_prefix', 'proxy_record')
 
 
 class ProjectService:
@@ -41,14 +46,15 @@ class ProjectService:
     @staticmethod
     def create_project(data):
         """创建项目"""
-        from ..core.exceptions import APIException
         # 检查项目名称是否已存在
         if Project.query.filter_by(name=data['name']).first():
             raise APIException('项目名称已存在', 409)
 
         project = Project(name=data['name'], description=data.get('description', ''))
+        ProjectService._apply_proxy_config(project, data)
         db.session.add(project)
         db.session.commit()
+        mock_proxy.invalidate()
 
         return project.to_dict()
 
@@ -57,7 +63,6 @@ class ProjectService:
         """更新项目"""
         project = Project.query.get_or_404(project_id)
 
-        from ..core.exceptions import APIException
         # 检查项目名称是否与其他项目冲突
         if 'name' in data and data['name'] != project.name:
             if Project.query.filter(Project.name == data['name'], Project.id != project_id).first():
@@ -66,16 +71,36 @@ class ProjectService:
 
         if 'description' in data:
             project.description = data['description']
+        ProjectService._apply_proxy_config(project, data)
 
         db.session.commit()
+        # 上游地址等配置变化后，旧的缓存响应不再有效
+        mock_proxy.invalidate(clear_cache=any(field in data for field in PROXY_FIELDS))
         return project.to_dict()
 
+    @staticmethod
+    def _apply_proxy_config(project, data):
+        """设置并校验代理模式配置"""
+        for field in PROXY_FIELDS:
+            if field in data:
+                setattr(project, field, data[field])
+
+        if project.proxy_record and project.proxy_record not in PROXY_RECORD_MODES:
+            db.session.rollback()
+            raise APIException('Invalid proxy config', 400,
+                {'details': f'proxy_record 可选 {", ".join(PROXY_RECORD_MODES)}', 'proxy_record': project.proxy_record})
+        if project.proxy_enabled and not (project.proxy_base_url or project.proxy_environment_id):
+            db.session.rollback()
+            raise APIException('Invalid proxy config', 400,
+                {'details': '开启代理模式时需要配置 proxy_base_url 或 proxy_environment_id'})
+
     @staticmethod
     def delete_project(project_id):
         """删除项目"""
         project = Project.query.get_or_404(project_id)
         db.session.delete(project)
         db.session.commit()
+        mock_proxy.invalidate()
 
     @staticmethod
     def get_project_mock_apis(project_id):
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 20:55
+@description  场景 Mock 服务 - 按 Mock 的状态操作读写场景状态，模板通过 {state.xxx} 引用
+"""
+
+import json
+
+from ..core.exceptions import APIException
+from ..core.scenario_state import scenario_state
+from ..utils.dynamic_data_util import DynamicDataProcessor
+
+# 资源集合操作：create 新增、get 查询单个、list 查询全部、update 合并修改、replace 整体替换、delete 删除
+COLLECTION_ACTIONS = ('create', 'get', 'list', 'update', 'replace', 'delete')
+# 键值操作：set 以请求体为值写入 key、unset 删除 key；reset 清空整个场景
+KEY_ACTIONS = ('set', 'unset')
+STATE_ACTIONS = COLLECTION_ACTIONS + KEY_ACTIONS + ('reset',)
+
+# 资源ID默认取路径参数 id，如 /users/{id}
+DEFAULT_ID_TEMPLATE = '{request.path.id}'
+
+_MISSING = object()
+
+
+class ScenarioView:
+    """
+    模板中 {state.xxx} 的取值
+
+    本次操作的结果（item、items、count、value）优先，其次为场景中的键值，最后为同名集合的资源列表；
+    同一次渲染中重复引用的键只读取一次存储
+    """
+
+    __slots__ = ('scenario', 'result', '_cache')
+
+    def __init__(self, scenario, result=None):
+        self.scenario = scenario
+        self.result = result or {}
+        self._cache = {}
+
+    def get(self, key, default=None):
+        if key in self.result:
+            return self.result[key]
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = scenario_state.get(self.scenario, key, _MISSING)
+            if value is _MISSING:
+                value = scenario_state.list_items(self.scenario, key, _MISSING)
+            self._cache[key] = value
+        return default if value is _MISSING else value
+
+
+class ScenarioService:
+    """场景 Mock 服务"""
+
+    @staticmethod
+    def parse_config(state_config):
+        """
+        解析并校验状态操作配置，如 {"action": "create", "collection": "users"}
+
+        Returns:
+            dict: 配置，未配置时返回 None
+
+        Raises:
+            ValueError: 配置错误
+        """
+        if not state_config:
+            return None
+        if isinstance(state_config, str):
+            state_config = json.loads(state_config)
+        if not isinstance(state_config, dict):
+            raise ValueError('状态操作配置必须是对象')
+
+        action = state_config.get('action')
+        if action not in STATE_ACTIONS:
+            raise ValueError(f'不支持的状态操作: {action}，可选 {", ".join(STATE_ACTIONS)}')
+        if action in COLLECTION_ACTIONS and not state_config.get('collection'):
+            raise ValueError(f'{action} 操作需要配置 collection')
+        if action in KEY_ACTIONS and not state_config.get('key'):
+            raise ValueError(f'{action} 操作需要配置 key')
+        return state_config
+
+    @staticmethod
+    def apply(scenario, state_config, request_data):
+        """
+        执行 Mock 的状态操作
+
+        Args:
+            scenario: 场景名
+            state_config: parse_config 的结果，为 None 时只读
+            request_data: 请求数据
+
+        Returns:
+            ScenarioView: 模板中 {state.xxx} 的取值
+
+        Raises:
+            APIException: 资源不存在
+        """
+        if state_config is None:
+            return ScenarioView(scenario)
+
+        action = state_config['action']
+        if action == 'reset':
+            scenario_state.reset(scenario)
+            return ScenarioView(scenario)
+        if action == 'set':
+            value = scenario_state.set(scenario, state_config['key'], ScenarioService._request_body(request_data))
+            return ScenarioView(scenario, {'value': value})
+        if action == 'unset':
+            return ScenarioView(scenario, {'value': scenario_state.delete(scenario, state_config['key'])})
+
+        collection = state_config['collection']
+        id_field = state_config.get('id_field', 'id')
+        if action == 'list':
+            items = scenario_state.list_items(scenario, collection)
+            return ScenarioView(scenario, {'items': items, 'count': len(items)})
+        if action == 'create':
+            body = ScenarioService._request_body(request_data)
+            item = scenario_state.create_item(scenario, collection, body if isinstance(body, dict) else {},
+                id_field)
+            return ScenarioView(scenario, {'item': item})
+
+        item_id = DynamicDataProcessor.render_string(state_config.get('id', DEFAULT_ID_TEMPLATE), request_data)
+        if action == 'get':
+            item = scenario_state.get_item(scenario, collection, item_id)
+        elif action == 'delete':
+            item = scenario_state.delete_item(scenario, collection, item_id)
+        else:
+            body = ScenarioService._request_body(request_data)
+            item = scenario_state.update_item(scenario, collection, item_id, body if isinstance(body, dict) else {},
+                action == 'replace', id_field)
+        if item is None:
+            raise APIException('Resource not found', 404, {'scenario': scenario, 'collection': collection,
+                'id': item_id})
+        return ScenarioView(scenario, {'item': item})
+
+    @staticmethod
+    def _request_body(request_data):
+        """JSON 请求体优先，其次为表单"""
+        body = request_data.get('json')
+        if body in (None, {}) and request_data.get('form'):
+            return dict(request_data['form'])
+        return body
+
+    @staticmethod
+    def get_state(scenario):
+        """场景当前状态"""
+        return {'scenario': scenario, **scenario_state.snapshot(scenario)}
+
+    @staticmethod
+    def list_scenarios():
+        """有状态的场景"""
+        return {'scenarios': scenario_state.scenarios()}
+
+    @staticmethod
+    def reset(scenario=None):
+        """清空场景状态，scenario 为空时清空所有场景"""
+        return {'scenario': scenario, 'reset': scenario_state.reset(scenario)}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 14:05
+@description  Mock 响应延迟分布
+"""
+
+import json
+import random
+
+
+class ResponseDelay:
+    """
+    响应延迟采样器，单位毫秒
+
+    delay_config 为 JSON 字符串，未配置时使用固定延迟 response_delay：
+        {"type": "fixed", "value": 200}
+        {"type": "uniform", "min": 100, "max": 500}
+        {"type": "normal", "mean": 300, "stddev": 50, "min": 100, "max": 800}
+    """
+
+    DISTRIBUTIONS = ('fixed', 'uniform', 'normal')
+
+    __slots__ = ('distribution', 'value', 'min', 'max', 'mean', 'stddev')
+
+    def __init__(self, distribution='fixed', value=0, min=0, max=None, mean=0, stddev=0):
+        self.distribution = distribution
+        self.value = value
+        self.min = min
+        self.max = max
+        self.mean = mean
+        self.stddev = stddev
+
+    @classmethod
+    def parse(cls, response_delay=0, delay_config=None):
+        """
+        解析 Mock 的延迟配置
+
+        Raises:
+            ValueError: 配置格式错误
+        """
+        if not delay_config:
+            return cls('fixed', value=max(int(response_delay or 0), 0))
+
+        config = json.loads(delay_config) if isinstance(delay_config, str) else dict(delay_config)
+        distribution = config.get('type', 'fixed')
+        if distribution not in cls.DISTRIBUTIONS:
+            raise ValueError(f'不支持的延迟分布: {distribution}')
+
+        if distribution == 'fixed':
+            return cls('fixed', value=max(int(config.get('value', response_delay or 0)), 0))
+
+        min_delay = max(int(config.get('min', 0)), 0)
+        max_delay = int(config['max']) if config.get('max') is not None else None
+        if max_delay is not None and max_delay < min_delay:
+            raise ValueError('延迟上限不能小于下限')
+
+        if distribution == 'uniform':
+            if max_delay is None:
+                raise ValueError('uniform 分布需要配置 max')
+            return cls('uniform', min=min_delay, max=max_delay)
+
+        return cls('normal', min=min_delay, max=max_delay, mean=float(config.get('mean', response_delay or 0)),
+            stddev=max(float(config.get('stddev', 0)), 0))
+
+    @property
+    def is_zero(self):
+        return self.distribution == 'fixed' and self.value == 0
+
+    def sample(self):
+        """采样一次延迟（毫秒）"""
+        if self.distribution == 'fixed':
+            return self.value
+        if self.distribution == 'uniform':
+            return random.uniform(self.min, self.max)
+
+        delay = random.gauss(self.mean, self.stddev)
+        if self.max is not None:
+            delay = min(delay, self.max)
+        return max(delay, self.min)
+
+    def to_dict(self):
+        if self.distribution == 'fixed':
+            return {'type': 'fixed', 'value': self.value}
+        if self.distribution == 'uniform':
+            return {'type': 'uniform', 'min': self.min, 'max': self.max}
+        return {'type': 'normal', 'mean': self.mean, 'stddev': self.stddev, 'min': self.min, 'max': self.max}
@@ -7,6 +7,33 @@
 @description  生成随机数
 """
 
+import contextlib
+import contextvars
+import functools
+import json
+import random
+import string
+from datetime import datetime, timedelta
+import re
+
+import numpy as np
+
+from .faker_registry import faker_registry
+from .value_pool import value_pools
+
+# 单次扫描同时识别随机标记 ${xxx}、动态标记 {request.xxx.yyy} 与场景状态标记 {state.xxx}
+_TAG_PATTERN = re.compile(r'\$\{\s*([^{}\s]+)\s*\}|\{((?:request|state)\.[^{}]+?)\}')
+_RANDOM_TAG_PATTERN = re.compile(r'\$\{\s*([^{}\s]+)\s*\}')
+
+# 数组展开指令：{"items": "${repeat[1000]}", "item": {...}} 输出 {"items": [item x 1000]}
+_REPEAT_PATTERN = re.compile(r'^\$\{\s*repeat\[\s*(\d+)\s*\]\s*\}$')
+REPEAT_ITEM_KEY = 'item'
+REPEAT_LIMIT = 1000000  # 单个指令最多展开的元素数
+STREAM_CHUNK_SIZE = 64 * 1024  # 流式输出时每块的字节数
+
+# 当前请求的种子随机数生成器，未设置时使用全局 random 与共享 Faker
+_seeded_random = contextvars.ContextVar('seeded_random', default=None)
+
 
 class DynamicDataProcessor:
     @staticmethod
@@ -23,10 +50,7 @@ class DynamicDataProcessor:
         """处理单个值"""
         if isinstance(value, str):
             try:
-                # 先处理动态标记
-                value = DynamicDataProcessor._replace_dynamic_tags(value, request_data)
-                # 再处理随机标记
-                value = RandomDataGenerator._replace_random_tags(value)
+                value = DynamicDataProcessor._replace_tags(value, request_data)
             except Exception as e:
                 return f"[PROCESSING_ERROR:{str(e)}]"
         elif isinstance(value, (dict, list)):
@@ -34,43 +58,450 @@ class DynamicDataProcessor:
         return value
 
     @staticmethod
-    def _replace_dynamic_tags(template, request_data):
-        """更安全的动态标记替换方法"""
-        if not isinstance(template, str):
-            return template
+    def render_string(template, request_data):
+        """渲染单个字符串中的标记，结果为字符串"""
+        return DynamicDataProcessor._process_value(template, request_data)
+
+    @staticmethod
+    def _replace_tags(template, request_data):
+        """替换字符串中的动态标记与随机标记"""
+        segments = DynamicDataProcessor._tokenize(template)
+        return ''.join([segment if isinstance(segment, str) else segment(request_data) for segment in segments])
 
-        # 使用更简单的正则表达式
-        def replace_tag(match):
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _tokenize(template):
+        """
+        单次扫描把字符串拆成 字面量 / 求值函数 片段，同一字符串只拆分一次
+
+        Returns:
+            tuple: 片段元组，相邻字面量已合并；求值函数签名为 segment(request_data) -> str
+        """
+        segments = []
+
+        def append_literal(text):
+            if not text:
+                return
+            if segments and isinstance(segments[-1], str):
+                segments[-1] += text
+            else:
+                segments.append(text)
+
+        pos = 0
+        for match in _TAG_PATTERN.finditer(template):
+            append_literal(template[pos:match.start()])
+            pos = match.end()
+            raw = match.group(0)
+            random_expr, request_tag = match.groups()
+
+            if random_expr is not None:
+                # ${request.args.x} 兼容旧的两遍替换行为：保留 $，其后按动态标记处理
+                parsed = DynamicDataProcessor._parse_request_tag(random_expr)
+                if parsed is not None:
+                    append_literal('$')
+                    segments.append(DynamicDataProcessor._request_tag_segment(parsed, raw[1:]))
+                    continue
+                resolved = RandomDataGenerator._parse_tag(random_expr)
+                if resolved is None:
+                    append_literal(raw)
+                else:
+                    segments.append(DynamicDataProcessor._random_tag_segment(resolved, raw))
+            elif request_tag.startswith('state.'):
+                path = request_tag.split('.')[1:]
+                if all(path):
+                    segments.append(DynamicDataProcessor._state_tag_segment(tuple(path)))
+                else:
+                    append_literal(raw)
+            else:
+                parsed = DynamicDataProcessor._parse_request_tag(request_tag)
+                if parsed is None:
+                    append_literal(raw)
+                else:
+                    segments.append(DynamicDataProcessor._request_tag_segment(parsed, raw))
+        append_literal(template[pos:])
+
+        return tuple(segments)
+
+    @staticmethod
+    def _parse_request_tag(full_tag):
+        """解析 request.<source>.<key> 标记，非动态标记返回 None"""
+        if not full_tag.startswith('request.'):
+            return None
+
+        parts = full_tag.split('.')
+        if len(parts) != 3:
+            return None
+
+        source = parts[1]
+        key = parts[2]
+
+        if source in ['headers', 'args', 'json', 'form', 'path']:
+            return source, key
+        return None
+
+    @staticmethod
+    def _request_tag_segment(parsed, raw):
+        source, key = parsed
+
+        def segment(request_data):
             try:
-                full_tag = match.group(1)
-                if not full_tag.startswith('request.'):
-                    return match.group(0)
+                return str(request_data.get(source, {}).get(key, ''))
+            except Exception:
+                return raw
 
-                parts = full_tag.split('.')
-                if len(parts) != 3:
-                    return match.group(0)
+        # 结果取决于请求内容，同一种子下也不能复用渲染结果
+        segment.cacheable = False
+        return segment
 
-                source = parts[1]
-                key = parts[2]
+    @staticmethod
+    def _state_tag_segment(path):
+        """
+        场景状态标记 {state.item}、{state.items}、{state.item.name}，从 request_data['state'] 取值
+
+        字符串中只有这一个标记时输出原始值（对象、数组），否则对象与数组按 JSON 文本拼接
+        """
+
+        def value(request_data):
+            current = request_data.get('state')
+            for part in path:
+                getter = getattr(current, 'get', None)
+                if getter is not None:
+                    current = getter(part)
+                elif isinstance(current, list) and part.isdigit() and int(part) < len(current):
+                    current = current[int(part)]
+                else:
+                    return None
+            return current
+
+        def segment(request_data):
+            current = value(request_data)
+            if current is None:
+                return ''
+            if isinstance(current, (dict, list)):
+                return json.dumps(current, ensure_ascii=False)
+            return str(current)
+
+        segment.cacheable = False
+        segment.value = value
+        return segment
 
-                if source in ['headers', 'args', 'json', 'form']:
-                    return str(request_data.get(source, {}).get(key, ''))
-                return match.group(0)
-            except:
-                return match.group(0)
+    @staticmethod
+    def _random_tag_segment(resolved, raw):
+        generator, args = resolved
+        key = raw[2:-1].strip()
 
-        return re.sub(r'\{(.+?)\}', replace_tag, template)
+        def segment(request_data):
+            try:
+                return str(RandomDataGenerator.generate(key, generator, args))
+            except Exception as e:
+                print(f"Error processing random tag {raw}: {e}")
+                return raw
 
+        segment.cacheable = generator not in RandomDataGenerator._time_dependent
+        return segment
 
-import random
-import string
-from datetime import datetime, timedelta
-import re
-from faker import Faker  # 需要安装：pip install faker
+    @staticmethod
+    def compile_template(template):
+        """
+        预编译响应模板，渲染结果与 process_template 一致
+
+        编译后静态部分直接复用，字符串中的动态/随机标记被拆成 字面量 + 求值函数 片段，
+        渲染时只对动态部分求值
+
+        Args:
+            template: json.loads 后的模板
+
+        Returns:
+            CompiledTemplate: 编译后的模板
+        """
+        if isinstance(template, (dict, list)):
+            stream = None
+            if DynamicDataProcessor._has_repeat(template):
+                stream = DynamicDataProcessor._compile_stream(template)
+            return CompiledTemplate(template, DynamicDataProcessor._compile_value(template), stream,
+                DynamicDataProcessor._is_cacheable(template))
+        return CompiledTemplate(template, None)
+
+    @staticmethod
+    def _is_cacheable(value):
+        """模板是否只依赖种子：不引用请求数据、不含当前时间类标记"""
+        if isinstance(value, str):
+            return all(getattr(segment, 'cacheable', True) for segment in DynamicDataProcessor._tokenize(value))
+        if isinstance(value, dict):
+            return all(DynamicDataProcessor._is_cacheable(v) for v in value.values())
+        if isinstance(value, list):
+            return all(DynamicDataProcessor._is_cacheable(item) for item in value)
+        return True
+
+    @staticmethod
+    def _repeat_directive(value):
+        """
+        识别字典中的数组展开指令
+
+        Returns:
+            tuple: (指令所在的键, 展开数量)，没有指令时返回 None
+        """
+        if REPEAT_ITEM_KEY not in value:
+            return None
+        for k, v in value.items():
+            if isinstance(v, str):
+                matched = _REPEAT_PATTERN.match(v)
+                if matched:
+                    return k, min(int(matched.group(1)), REPEAT_LIMIT)
+        return None
+
+    @staticmethod
+    def _has_repeat(value):
+        """模板中是否包含数组展开指令"""
+        if isinstance(value, dict):
+            return DynamicDataProcessor._repeat_directive(value) is not None or any(
+                DynamicDataProcessor._has_repeat(v) for v in value.values())
+        if isinstance(value, list):
+            return any(DynamicDataProcessor._has_repeat(item) for item in value)
+        return False
+
+    @staticmethod
+    def _compile_value(value):
+        """编译单个值，返回 render(request_data) 函数；完全静态时返回 None"""
+        if isinstance(value, str):
+            return DynamicDataProcessor._compile_string(value)
+
+        if isinstance(value, dict):
+            directive = DynamicDataProcessor._repeat_directive(value)
+            base = value
+            dynamic_items = []
+            if directive is not None:
+                # 展开后不再输出 item 键
+                base = {k: v for k, v in value.items() if k != REPEAT_ITEM_KEY}
+                dynamic_items.append((directive[0], DynamicDataProcessor._compile_repeat(directive[1],
+                    value[REPEAT_ITEM_KEY])))
+            for k, v in base.items():
+                if directive is not None and k == directive[0]:
+                    continue
+                render = DynamicDataProcessor._compile_value(v)
+                if render is not None:
+                    dynamic_items.append((k, render))
+            if not dynamic_items:
+                return None
+
+            def render_dict(request_data):
+                # 浅拷贝保留键顺序，只覆盖动态键；静态子树在多次渲染间共享，调用方不得修改
+                result = base.copy()
+                for k, render in dynamic_items:
+                    result[k] = render(request_data)
+                return result
+
+            return render_dict
+
+        if isinstance(value, list):
+            dynamic_items = []
+            for i, item in enumerate(value):
+                render = DynamicDataProcessor._compile_value(item)
+                if render is not None:
+                    dynamic_items.append((i, render))
+            if not dynamic_items:
+                return None
+
+            def render_list(request_data):
+                result = value.copy()
+                for i, render in dynamic_items:
+                    result[i] = render(request_data)
+                return result
+
+            return render_list
+
+        return None
+
+    @staticmethod
+    def _compile_repeat(count, item):
+        """数组展开指令的一次性渲染：在内存中构建完整数组"""
+        item_render = DynamicDataProcessor._compile_value(item)
+
+        def render_repeat(request_data):
+            if item_render is None:
+                return [item] * count
+            return [item_render(request_data) for _ in range(count)]
+
+        return render_repeat
+
+    @staticmethod
+    def _compile_stream(value):
+        """
+        编译流式输出函数 stream(request_data, dumps)，依次产出 JSON 文本片段
+
+        只有包含展开指令的节点按片段输出，其余子树整体渲染后交给 dumps 序列化，
+        因此内存占用只与单个元素的大小有关
+        """
+        if not DynamicDataProcessor._has_repeat(value):
+            render = DynamicDataProcessor._compile_value(value)
+
+            def stream_value(request_data, dumps):
+                yield dumps(value if render is None else render(request_data))
+
+            return stream_value
+
+        if isinstance(value, list):
+            children = [DynamicDataProcessor._compile_stream(item) for item in value]
+
+            def stream_list(request_data, dumps):
+                yield '['
+                for i, child in enumerate(children):
+                    if i:
+                        yield ','
+                    yield from child(request_data, dumps)
+                yield ']'
+
+            return stream_list
+
+        directive = DynamicDataProcessor._repeat_directive(value)
+        children = []
+        for k, v in value.items():
+            if directive is None:
+                children.append((k, DynamicDataProcessor._compile_stream(v)))
+            elif k == directive[0]:
+                children.append((k, DynamicDataProcessor._compile_repeat_stream(directive[1],
+                    value[REPEAT_ITEM_KEY])))
+            elif k != REPEAT_ITEM_KEY:
+                children.append((k, DynamicDataProcessor._compile_stream(v)))
+
+        def stream_dict(request_data, dumps):
+            yield '{'
+            for i, (k, child) in enumerate(children):
+                yield f'{"," if i else ""}{dumps(k)}:'
+                yield from child(request_data, dumps)
+            yield '}'
+
+        return stream_dict
+
+    @staticmethod
+    def _compile_repeat_stream(count, item):
+        """数组展开指令的流式输出：逐个渲染元素，静态元素只序列化一次"""
+        item_render = DynamicDataProcessor._compile_value(item)
+
+        def stream_repeat(request_data, dumps):
+            yield '['
+            if item_render is None:
+                text = dumps(item)
+                batch = max(STREAM_CHUNK_SIZE // (len(text) + 1), 1)
+                for start in range(0, count, batch):
+                    yield ('' if start == 0 else ',') + ','.join([text] * min(batch, count - start))
+            else:
+                for i in range(count):
+                    if i:
+                        yield ','
+                    yield dumps(item_render(request_data))
+            yield ']'
+
+        return stream_repeat
+
+    @staticmethod
+    def _compile_string(value):
+        """编译字符串；不含任何标记时返回 None"""
+        segments = DynamicDataProcessor._tokenize(value)
+        if not segments or (len(segments) == 1 and isinstance(segments[0], str)):
+            return None
+
+        if len(segments) == 1:
+            segment = getattr(segments[0], 'value', segments[0])
+
+            def render_single(request_data):
+                try:
+                    return segment(request_data)
+                except Exception as e:
+                    return f"[PROCESSING_ERROR:{str(e)}]"
+
+            return render_single
+
+        def render_string(request_data):
+            try:
+                return ''.join([segment if isinstance(segment, str) else segment(request_data) for segment in segments])
+            except Exception as e:
+                return f"[PROCESSING_ERROR:{str(e)}]"
+
+        return render_string
+
+
+class CompiledTemplate:
+    """预编译的响应模板"""
+
+    __slots__ = ('source', 'is_static', 'is_cacheable', 'tags_version', '_render', '_stream')
+
+    def __init__(self, source, render, stream=None, cacheable=True):
+        self.source = source
+        # 编译时的随机标记注册表版本，注册新标记后需重新编译（之前无法识别的标记被编译成了字面量）
+        self.tags_version = RandomDataGenerator.tags_version
+        self.is_static = render is None
+        # 同一种子下渲染结果固定，可按 (Mock 版本, 种子) 缓存
+        self.is_cacheable = cacheable and stream is None
+        self._render = render
+        self._stream = stream
+
+    @property
+    def is_current(self):
+        """编译后没有注册过新的随机标记"""
+        return self.tags_version == RandomDataGenerator.tags_version
+
+    @property
+    def is_streaming(self):
+        """是否包含数组展开指令，需要流式输出"""
+        return self._stream is not None
+
+    def render(self, request_data):
+        """渲染模板；静态模板直接返回原始结构"""
+        if self._render is None:
+            return self.source
+        return self._render(request_data)
+
+    def iter_encoded(self, request_data, dumps, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        流式渲染并序列化，逐块产出 UTF-8 字节
+
+        Args:
+            request_data: 请求数据
+            dumps: 序列化函数，不依赖应用上下文（在响应迭代时调用）
+            chunk_size: 每块的大致字节数
+        """
+        buffer = []
+        size = 0
+        for text in self._stream(request_data, dumps):
+            buffer.append(text)
+            size += len(text)
+            if size >= chunk_size:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+                size = 0
+        buffer.append('\n')
+        yield ''.join(buffer).encode('utf-8')
 
 
 class RandomDataGenerator:
-    _fake = Faker('zh_CN')  # 中文数据生成器
+    @staticmethod
+    def _random():
+        """当前请求的随机数生成器：设置了种子时为独立的 Random，否则为全局 random 模块"""
+        return _seeded_random.get() or random
+
+    @staticmethod
+    def _faker():
+        """当前请求的 Faker：本线程、当前语言环境的实例，设置了种子时绑定种子随机数生成器"""
+        return faker_registry.get(rng=_seeded_random.get())
+
+    @staticmethod
+    @contextlib.contextmanager
+    def seeded(seed):
+        """
+        在上下文内使用种子渲染，相同种子与模板的输出相同；seed 为 None 时不做任何处理
+
+        Args:
+            seed: 种子（字符串或整数），也可以直接传入 random.Random 以延续同一随机序列
+        """
+        if seed is None:
+            yield
+            return
+        token = _seeded_random.set(seed if isinstance(seed, random.Random) else random.Random(seed))
+        try:
+            yield
+        finally:
+            _seeded_random.reset(token)
 
     @staticmethod
     def phone():
@@ -78,23 +509,26 @@ class RandomDataGenerator:
         prefixes = ['130', '131', '132', '133', '134', '135', '136', '137', '138', '139',
                     '150', '151', '152', '153', '155', '156', '157', '158', '159',
                     '180', '181', '182', '183', '184', '185', '186', '187', '188', '189']
-        return random.choice(prefixes) + ''.join(random.choices('0123456789', k=8))
+        rng = RandomDataGenerator._random()
+        return rng.choice(prefixes) + ''.join(rng.choices('0123456789', k=8))
 
     @staticmethod
     def id_card():
         """生成18位身份证号"""
+        rng = RandomDataGenerator._random()
+
         # 1. 生成前6位地区码
-        region_code = random.choice(['110', '120', '130', '140'])  # 简化地区码
-        region_code += ''.join(random.choices('0123456789', k=3))  # 补齐6位
+        region_code = rng.choice(['110', '120', '130', '140'])  # 简化地区码
+        region_code += ''.join(rng.choices('0123456789', k=3))  # 补齐6位
 
         # 2. 生成出生日期(8位)
         start_date = datetime(1950, 1, 1)
         end_date = datetime(2000, 12, 31)
-        random_days = random.randint(0, (end_date - start_date).days)
+        random_days = rng.randint(0, (end_date - start_date).days)
         birth_date = (start_date + timedelta(days=random_days)).strftime('%Y%m%d')
 
         # 3. 生成顺序码(3位)
-        seq_code = ''.join(random.choices('0123456789', k=3))
+        seq_code = ''.join(rng.choices('0123456789', k=3))
 
         # 前17位
         first_17 = region_code + birth_date + seq_code
@@ -119,23 +553,24 @@ class RandomDataGenerator:
     def email():
         """随机邮箱"""
         domains = ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', '163.com', 'qq.com']
-        name = ''.join(random.choices(string.ascii_lowercase + string.digits, k=random.randint(5, 10)))
-        return f"{name}@{random.choice(domains)}"
+        rng = RandomDataGenerator._random()
+        name = ''.join(rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(5, 10)))
+        return f"{name}@{rng.choice(domains)}"
 
     @staticmethod
     def name():
         """随机中文姓名"""
-        return RandomDataGenerator._fake.name()
+        return RandomDataGenerator._faker().name()
 
     @staticmethod
     def address():
         """随机地址"""
-        return RandomDataGenerator._fake.address()
+        return RandomDataGenerator._faker().address()
 
     @staticmethod
     def text(length=10):
         """随机文本"""
-        return RandomDataGenerator._fake.text(max_nb_chars=length)
+        return RandomDataGenerator._faker().text(max_nb_chars=length)
 
     @staticmethod
     def date(start_date="1990-01-01", end_date="today", fmt="%Y-%m-%d"):
@@ -146,7 +581,7 @@ class RandomDataGenerator:
             if isinstance(end_date, str) and end_date != "today":
                 end_date = datetime.strptime(end_date, "%Y-%m-%d")
 
-            random_date = RandomDataGenerator._fake.date_between(
+            random_date = RandomDataGenerator._faker().date_between(
                 start_date=start_date,
                 end_date=end_date
             )
@@ -157,7 +592,8 @@ class RandomDataGenerator:
     @staticmethod
     def datetime(start_date="-30y", end_date="now", fmt="%Y-%m-%d %H:%M:%S"):
         """随机日期时间"""
-        return RandomDataGenerator._fake.date_time_between(start_date=start_date, end_date=end_date).strftime(fmt)
+        fake = RandomDataGenerator._faker()
+        return fake.date_time_between(start_date=start_date, end_date=end_date).strftime(fmt)
 
     @staticmethod
     def now(fmt="%Y-%m-%d %H:%M:%S"):
@@ -166,57 +602,152 @@ class RandomDataGenerator:
     @staticmethod
     def ipv4():
         """随机IPv4地址"""
-        return RandomDataGenerator._fake.ipv4()
+        return RandomDataGenerator._faker().ipv4()
 
     @staticmethod
     def company():
         """随机公司名"""
-        return RandomDataGenerator._fake.company()
+        return RandomDataGenerator._faker().company()
 
     @staticmethod
     def job():
         """随机职位"""
-        return RandomDataGenerator._fake.job()
+        return RandomDataGenerator._faker().job()
 
     @staticmethod
     def word():
         """随机单词"""
-        return RandomDataGenerator._fake.word()
+        return RandomDataGenerator._faker().word()
 
     @staticmethod
     def sentence(nb_words=6):
         """随机句子"""
-        return RandomDataGenerator._fake.sentence(nb_words=nb_words)
+        return RandomDataGenerator._faker().sentence(nb_words=nb_words)
 
     @staticmethod
     def float(min=0, max=10000, decimal=2):
         """随机浮点数"""
-        return round(random.uniform(min, max), decimal)
+        return round(RandomDataGenerator._random().uniform(min, max), decimal)
 
     @staticmethod
     def int(min=0, max=10000):
         """随机整数"""
-        return random.randint(min, max)
+        return RandomDataGenerator._random().randint(min, max)
 
     @staticmethod
     def boolean():
         """随机布尔值"""
-        return random.choice([True, False])
+        return RandomDataGenerator._random().choice([True, False])
 
     @staticmethod
     def uuid():
         """随机UUID"""
-        return str(RandomDataGenerator._fake.uuid4())
+        return str(RandomDataGenerator._faker().uuid4())
 
     @staticmethod
     def color():
         """随机颜色"""
-        return RandomDataGenerator._fake.hex_color()
+        return RandomDataGenerator._faker().hex_color()
 
     @staticmethod
     def image_url(width=200, height=200):
         """随机图片URL"""
-        return RandomDataGenerator._fake.image_url(width=width, height=height)
+        return RandomDataGenerator._faker().image_url(width=width, height=height)
+
+    # 随机标记注册表 {标记名: (生成函数, 参数转换函数元组)}
+    _tags = {}
+    # 结果依赖当前时间的生成函数，渲染结果不可缓存
+    _time_dependent = set()
+    # 从值池取值的生成函数
+    _pooled = set()
+    # 注册表版本，每次注册标记加一，编译后的模板与渲染缓存据此失效
+    tags_version = 0
+
+    @classmethod
+    def register_tag(cls, name, generator, arg_types=(), time_dependent=False, pooled=True, batch=None):
+        """
+        注册随机标记，新增标记类型无需修改解析逻辑
+
+        Args:
+            name: 标记名，模板中写作 ${name} 或 ${name[参数1,参数2]}
+            generator: 生成函数，按位置接收转换后的参数
+            arg_types: 依次作用于方括号内各参数的转换函数，未指定的参数保持字符串
+            time_dependent: 结果是否依赖当前时间（如 now），此类标记的渲染结果不会被缓存
+            pooled: 是否由后台线程预生成到值池（必须取当时值的标记如 now 应为 False）
+            batch: 批量生成函数 batch(rng, n, *参数)，rng 为 numpy.random.Generator
+        """
+        cls._tags[name] = (generator, tuple(arg_types))
+        if time_dependent:
+            cls._time_dependent.add(generator)
+        if pooled:
+            cls._pooled.add(generator)
+        if batch is not None:
+            value_pools.register_batch(generator, batch)
+        # 已解析、已拆分的字符串可能把该标记当作了字面量
+        RandomDataGenerator._parse_tag.cache_clear()
+        DynamicDataProcessor._tokenize.cache_clear()
+        RandomDataGenerator.tags_version += 1
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _parse_tag(expr):
+        """
+        解析随机标记表达式，同一表达式只解析一次
+
+        Returns:
+            tuple: (生成函数, 参数元组)，无法识别时返回 None
+        """
+        name, bracket, rest = expr.partition('[')
+        entry = RandomDataGenerator._tags.get(name)
+        if entry is None or (bracket and not rest.endswith(']')):
+            return None
+
+        generator, arg_types = entry
+        if not bracket:
+            return generator, ()
+
+        try:
+            params = [param.strip().strip('"\'') for param in rest[:-1].split(',')]
+            args = tuple(arg_types[i](param) if i < len(arg_types) else param for i, param in enumerate(params))
+        except (ValueError, TypeError) as e:
+            print(f"Error parsing random tag {expr}: {e}")
+            return None
+        return generator, args
+
+    @staticmethod
+    def generate(key, generator, args):
+        """
+        生成随机标记的值：未设置种子时从值池取，设置了种子时直接生成以保证可复现
+
+        Args:
+            key: 随机标记表达式，如 int[1,100]
+        """
+        if value_pools.enabled and generator in RandomDataGenerator._pooled and _seeded_random.get() is None:
+            # 不同语言环境的值分池存放
+            locale = faker_registry.locale
+            if locale != faker_registry.default_locale:
+                key = f'{locale}:{key}'
+            return value_pools.take(key, generator, args, locale)
+        return generator(*args)
+
+    @staticmethod
+    def _int_batch(rng, n, min=0, max=10000):
+        return rng.integers(min, max, size=n, endpoint=True).tolist()
+
+    @staticmethod
+    def _float_batch(rng, n, min=0, max=10000, decimal=2):
+        return np.round(rng.uniform(min, max, size=n), decimal).tolist()
+
+    @staticmethod
+    def _boolean_batch(rng, n):
+        return rng.integers(0, 2, size=n).astype(bool).tolist()
+
+    @staticmethod
+    def _date_batch(rng, n, fmt='%Y-%m-%d', start='1990-01-01', end='today'):
+        start = np.datetime64(datetime.now().date() if start == 'today' else start, 'D')
+        end = np.datetime64(datetime.now().date() if end == 'today' else end, 'D')
+        days = rng.integers(0, (end - start).astype(int), size=n, endpoint=True)
+        return [day.strftime(fmt) for day in (start + days).astype(object)]
 
     @staticmethod
     def _replace_random_tags(template):
@@ -225,85 +756,45 @@ class RandomDataGenerator:
             return template
 
         def replace_random(match):
-            try:
-                expr = match.group(1).strip()
-
-                # 基本随机标记
-                if expr == 'phone': return RandomDataGenerator.phone()
-                if expr == 'id_card': return RandomDataGenerator.id_card()
-                if expr == 'email': return RandomDataGenerator.email()
-                if expr == 'name': return RandomDataGenerator.name()
-                if expr == 'address': return RandomDataGenerator.address()
-                if expr == 'text': return RandomDataGenerator.text()
-                if expr == 'datetime': return RandomDataGenerator.datetime()
-                if expr == 'now': return RandomDataGenerator.now()
-                if expr == 'ipv4': return RandomDataGenerator.ipv4()
-                if expr == 'company': return RandomDataGenerator.company()
-                if expr == 'job': return RandomDataGenerator.job()
-                if expr == 'word': return RandomDataGenerator.word()
-                if expr == 'sentence': return RandomDataGenerator.sentence()
-                if expr == 'float': return RandomDataGenerator.float()
-                if expr == 'int': return RandomDataGenerator.int()
-                if expr == 'boolean': return str(RandomDataGenerator.boolean())
-                if expr == 'uuid': return RandomDataGenerator.uuid()
-                if expr == 'color': return RandomDataGenerator.color()
-                if expr == 'image_url': return RandomDataGenerator.image_url()
-                if expr.startswith('date['):
-                    # 处理 ${date[%Y-%m-%d,1990-01-01,2000-12-31]} 格式
-                    try:
-                        params = expr[5:-1].split(',')
-                        fmt = params[0].strip().strip('"\'')
-                        start = params[1].strip().strip('"\'') if len(params) > 1 else "1990-01-01"
-                        end = params[2].strip().strip('"\'') if len(params) > 2 else "today"
-                        return RandomDataGenerator.date(start, end, fmt)
-                    except Exception as e:
-                        print(f"Error processing date tag: {e}")
-                        return datetime.now().strftime("%Y-%m-%d")
-
-                # 带参数的随机标记
-                if expr.startswith('int['):
-                    params = expr[4:-1].split(',')
-                    min_val = int(params[0].strip())
-                    max_val = int(params[1].strip())
-                    return str(RandomDataGenerator.int(min_val, max_val))
-
-                if expr.startswith('float['):
-                    params = expr[6:-1].split(',')
-                    min_val = float(params[0].strip())
-                    max_val = float(params[1].strip())
-                    decimal = int(params[2].strip()) if len(params) > 2 else 2
-                    return str(RandomDataGenerator.float(min_val, max_val, decimal))
-
-                if expr.startswith('date['):
-                    params = expr[5:-1].split(',')
-                    fmt = params[0].strip().strip('"\'')
-                    start = params[1].strip().strip('"\'') if len(params) > 1 else "-30y"
-                    end = params[2].strip().strip('"\'') if len(params) > 2 else "today"
-                    return RandomDataGenerator.date(start, end, fmt)
-
-                if expr == 'now' or expr.startswith('now['):
-                    # 处理 ${now} 或 ${now[%Y-%m-%d]} 格式
-                    try:
-                        if expr == 'now':
-                            return RandomDataGenerator.now()
-                        else:
-                            fmt = expr[4:-1].strip().strip('"\'')
-                            return RandomDataGenerator.now(fmt)
-                    except Exception as e:
-                        print(f"Error processing now tag: {e}")
-                        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                if expr.startswith('text['):
-                    length = int(expr[5:-1])
-                    return RandomDataGenerator.text(length)
-
-                return match.group(0)
-            except Exception as e:
-                print(f"Error processing random tag {match.group(0)}: {e}")
-                return match.group(0)
+            return str(RandomDataGenerator._render_random_tag(match.group(1).strip(), match.group(0)))
 
-        return re.sub(r'\$\{\s*([^{}\s]+)\s*\}', replace_random, template)
+        return _RANDOM_TAG_PATTERN.sub(replace_random, template)
 
+    @staticmethod
+    def _render_random_tag(expr, raw):
+        """
+        计算单个随机标记的值
+
+        Args:
+            expr: 标记表达式，如 int[1,100]
+            raw: 原始标记文本，无法识别或出错时原样返回
+        """
+        resolved = RandomDataGenerator._parse_tag(expr)
+        if resolved is None:
+            return raw
+
+        generator, args = resolved
+        try:
+            return RandomDataGenerator.generate(expr, generator, args)
+        except Exception as e:
+            print(f"Error processing random tag {raw}: {e}")
+            return raw
+
+
+# 注册内置随机标记
+for _name in ('phone', 'id_card', 'email', 'name', 'address', 'ipv4', 'company', 'job', 'word', 'sentence', 'uuid',
+        'color', 'image_url'):
+    RandomDataGenerator.register_tag(_name, getattr(RandomDataGenerator, _name))
+del _name
+RandomDataGenerator.register_tag('boolean', RandomDataGenerator.boolean, batch=RandomDataGenerator._boolean_batch)
+RandomDataGenerator.register_tag('datetime', RandomDataGenerator.datetime, time_dependent=True)
+RandomDataGenerator.register_tag('int', RandomDataGenerator.int, (int, int), batch=RandomDataGenerator._int_batch)
+RandomDataGenerator.register_tag('float', RandomDataGenerator.float, (float, float, int),
+    batch=RandomDataGenerator._float_batch)
+RandomDataGenerator.register_tag('text', RandomDataGenerator.text, (int,))
+RandomDataGenerator.register_tag('date', lambda fmt='%Y-%m-%d', start='1990-01-01', end='today':
+    RandomDataGenerator.date(start, end, fmt), time_dependent=True, batch=RandomDataGenerator._date_batch)
+RandomDataGenerator.register_tag('now', RandomDataGenerator.now, time_dependent=True, pooled=False)
 
 if __name__ == '__main__':
     print(RandomDataGenerator.email())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 19:50
+@description  Faker 实例注册表 - 按 (语言环境, 线程) 复用 Faker，请求之间互不影响
+"""
+
+import contextlib
+import contextvars
+import threading
+
+from faker import Faker
+from faker.config import AVAILABLE_LOCALES
+from faker.generator import random as shared_random
+
+DEFAULT_LOCALE = 'zh_CN'
+
+# 当前请求的语言环境，未设置时使用注册表的默认语言环境
+_current_locale = contextvars.ContextVar('faker_locale', default=None)
+
+
+class FakerRegistry:
+    """
+    Faker 实例注册表
+
+    - 每个线程每种语言环境一个 Faker 实例，首次使用时创建（约十毫秒），之后直接复用，无需加锁
+    - 请求通过 use(locale) 选择语言环境，不会影响其它请求
+    - get(rng=...) 把实例的随机数生成器绑定到种子 Random，未传入时恢复为 Faker 的共享随机数生成器
+    """
+
+    def __init__(self, default_locale=DEFAULT_LOCALE):
+        self.default_locale = default_locale
+        self._local = threading.local()
+
+    @staticmethod
+    def normalize(locale):
+        """
+        规范化语言环境，en-US 与 en_US 等价
+
+        Raises:
+            ValueError: Faker 不支持该语言环境
+        """
+        if not locale:
+            return None
+        locale = str(locale).strip().replace('-', '_')
+        if locale not in AVAILABLE_LOCALES:
+            raise ValueError(f'不支持的语言环境: {locale}')
+        return locale
+
+    @property
+    def locale(self):
+        """当前上下文的语言环境"""
+        return _current_locale.get() or self.default_locale
+
+    @contextlib.contextmanager
+    def use(self, locale):
+        """在上下文内使用指定语言环境；locale 为空时沿用当前语言环境"""
+        if not locale:
+            yield
+            return
+        token = _current_locale.set(self.normalize(locale))
+        try:
+            yield
+        finally:
+            _current_locale.reset(token)
+
+    def get(self, locale=None, rng=None):
+        """
+        获取本线程的 Faker 实例
+
+        Args:
+            locale: 语言环境，默认为当前上下文的语言环境
+            rng: 种子 random.Random，为 None 时使用 Faker 的共享随机数生成器
+        """
+        locale = locale or self.locale
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+
+        entry = instances.get(locale)
+        if entry is None:
+            entry = instances[locale] = [Faker(locale), None]
+        fake, bound = entry
+        if bound is not rng:
+            fake.random = shared_random if rng is None else rng
+            entry[1] = rng
+        return fake
+
+
+faker_registry = FakerRegistry()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 19:20
+@description  随机值池 - 后台线程批量预生成随机标记的值，请求线程只从池中取值
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+
+import numpy as np
+
+from .faker_registry import faker_registry
+
+
+class ValuePool:
+    """单个随机标记的值池（环形缓冲区）"""
+
+    __slots__ = ('key', 'generator', 'args', 'locale', 'values', 'pending', 'hits', 'misses', 'refills')
+
+    def __init__(self, key, generator, args, locale, size):
+        self.key = key
+        self.generator = generator
+        self.args = args
+        self.locale = locale  # 后台补充时使用的 Faker 语言环境
+        self.values = deque(maxlen=size)  # append / popleft 在多线程下是原子的
+        self.pending = False  # 已在补充队列中
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+
+
+class ValuePools:
+    """
+    随机值池注册表
+
+    - 每个随机标记表达式（如 name、int[1,100]）一个值池，首次使用时创建
+    - 池中剩余数量低于 low_watermark 时通知后台线程补充到 size
+    - 数值、布尔、日期类标记注册了批量生成函数，使用 NumPy 向量化生成；其它标记在后台线程逐个生成
+    - 池为空时直接调用生成函数并计为一次未命中
+    """
+
+    def __init__(self, size=1000, low_watermark=200, max_pools=1024):
+        self.enabled = True
+        self.size = size
+        self.low_watermark = low_watermark
+        self.max_pools = max_pools
+        self._pools = {}  # {表达式: ValuePool}
+        self._batches = {}  # {生成函数: batch(rng, n, *args) -> list}
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('VALUE_POOL_ENABLED', self.enabled)
+        self.size = app.config.get('VALUE_POOL_SIZE', self.size)
+        self.low_watermark = min(app.config.get('VALUE_POOL_LOW_WATERMARK', self.low_watermark), self.size)
+
+    def register_batch(self, generator, batch):
+        """注册批量生成函数 batch(rng, n, *args)，rng 为 numpy.random.Generator"""
+        self._batches[generator] = batch
+
+    def take(self, key, generator, args, locale=None):
+        """
+        从值池取一个值
+
+        Args:
+            key: 随机标记表达式，用于区分值池
+            generator: 生成函数，池为空时直接调用
+            args: 生成函数参数
+            locale: Faker 语言环境
+        """
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._create(key, generator, args, locale)
+            if pool is None:
+                return generator(*args)
+
+        try:
+            value = pool.values.popleft()
+            pool.hits += 1
+        except IndexError:
+            pool.misses += 1
+            value = generator(*args)
+
+        if not pool.pending and len(pool.values) < self.low_watermark:
+            self._request_refill(pool)
+        return value
+
+    def stats(self):
+        """各值池的命中、未命中、补充次数与剩余数量"""
+        return {key: {'hits': pool.hits, 'misses': pool.misses, 'refills': pool.refills, 'available': len(pool.values)}
+            for key, pool in list(self._pools.items())}
+
+    def _create(self, key, generator, args, locale):
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None and len(self._pools) < self.max_pools:
+                pool = self._pools[key] = ValuePool(key, generator, args, locale, self.size)
+            return pool
+
+    def _request_refill(self, pool):
+        if self._pid != os.getpid():
+            self._start_worker()
+        pool.pending = True
+        self._queue.put(pool)
+
+    def _start_worker(self):
+        # gunicorn fork 之后子进程需要自己的队列和后台线程，池中的值也不再与父进程共享
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for pool in self._pools.values():
+                pool.values = deque(maxlen=self.size)
+                pool.pending = False
+            self._queue = queue.Queue()
+            threading.Thread(target=self._refill_loop, args=(self._queue,), name='value-pool-refill',
+                daemon=True).start()
+            self._pid = os.getpid()
+
+    def _refill_loop(self, refill_queue):
+        rng = np.random.default_rng()
+        while True:
+            pool = refill_queue.get()
+            try:
+                count = self.size - len(pool.values)
+                if count > 0:
+                    with faker_registry.use(pool.locale):
+                        pool.values.extend(self._generate(rng, pool, count))
+                    pool.refills += 1
+                pool.pending = False
+            except Exception as e:
+                # 生成失败的值池不再补充（保持 pending），请求线程直接调用生成函数
+                print(f"随机值池补充失败 {pool.key}: {str(e)}")
+
+    def _generate(self, rng, pool, count):
+        batch = self._batches.get(pool.generator)
+        if batch is not None:
+            return batch(rng, count, *pool.args)
+        return [pool.generator(*pool.args) for _ in range(count)]
+
+
+value_pools = ValuePools()
@@ -0,0 +1,17 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 14:30
+@description  Mock 执行的异步入口（响应延迟不占用工作线程）
+"""
+
+import os
+
+from app.mock_asgi import MockASGIApp
+from app.mock_server import create_mock_app
+
+app = MockASGIApp(create_mock_app(os.getenv('MOCK_SERVE_CONFIG', 'production')))
+
+# 启动: uvicorn asgi:app --host 0.0.0.0 --port 5002 --workers 4
@@ -0,0 +1,8 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 11:20
+@description  性能基准测试，在 backend 目录下执行：python -m benchmarks.<模块名>
+"""
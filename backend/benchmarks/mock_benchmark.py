@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 22:40
+@description  Mock 执行链路基准：模板渲染、随机标记替换、路由匹配与完整 HTTP 请求
+
+基于临时 SQLite 数据库创建轻量 Mock 服务，覆盖：
+    - 模板大小 1KB ~ 10MB × 标记密度 none / sparse / medium / dense
+    - 路由表规模 10 ~ 100k 条 Mock（90% 普通路径 + 10% 路径模板）
+每个用例输出吞吐量、p50 / p99 延迟与单次请求的内存分配峰值（tracemalloc），结果写入 JSON 文件，
+--compare 与另一份结果对比，p50 退化超过阈值时以非 0 退出，可在部署前的流水线中使用。
+
+执行：
+    python -m benchmarks.mock_benchmark                       # 完整用例
+    python -m benchmarks.mock_benchmark --quick               # 跳过 10MB 模板与 100k 路由表
+    python -m benchmarks.mock_benchmark --only route -o a.json
+    python -m benchmarks.mock_benchmark --compare main.json   # 与 main 分支的结果对比
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TEMPLATE_SIZES = {'1KB': 1 << 10, '100KB': 100 << 10, '1MB': 1 << 20, '10MB': 10 << 20}
+QUICK_TEMPLATE_SIZES = ('1KB', '100KB', '1MB')
+
+# 字符串字段中为标记的比例
+TAG_DENSITIES = {'none': 0, 'sparse': 0.01, 'medium': 0.1, 'dense': 1}
+
+TABLE_SIZES = (10, 1000, 10000, 100000)
+QUICK_TABLE_SIZES = (10, 1000, 10000)
+
+# 轮流使用的标记：随机标记 + 请求数据标记
+TAGS = ('${int[1,100]}', '${name}', '{request.args.id}', '${uuid}', '${date}', '${float[0,100,2]}', '${email}')
+
+REQUEST_DATA = {'headers': {'User-Agent': 'bench'}, 'args': {'id': '42'}, 'json': {'name': 'mock'}, 'form': {}}
+
+GROUPS = ('process_template', 'replace_random_tags', 'execute_mock', 'route', 'http')
+
+
+def build_template(size, density):
+    """构造 JSON 序列化后约 size 字节的模板，字符串字段中 density 比例为标记"""
+    every = round(1 / density) if density else 0
+    items = []
+    strings = 0
+    length = 40
+    while length < size:
+        values = []
+        for _ in range(3):
+            strings += 1
+            if every and strings % every == 0:
+                values.append(TAGS[strings % len(TAGS)])
+            else:
+                values.append(f'静态文本 {strings}')
+        item = {'id': len(items), 'title': values[0], 'description': values[1], 'owner': values[2],
+            'price': len(items) * 1.5, 'enabled': True}
+        items.append(item)
+        length += len(json.dumps(item, ensure_ascii=False).encode('utf-8')) + 1
+    return {'code': 0, 'message': 'success', 'data': items}
+
+
+def build_text(size, density):
+    """构造约 size 字节的字符串，单词中 density 比例为随机标记"""
+    every = round(1 / density) if density else 0
+    random_tags = [tag for tag in TAGS if tag.startswith('$')]
+    words = []
+    length = 0
+    while length < size:
+        index = len(words)
+        word = random_tags[index % len(random_tags)] if every and index % every == 0 else f'word{index}'
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def measure(func, budget, min_rounds=3, max_rounds=100000, alloc_rounds=3):
+    """
+    重复执行 func 直到达到时间预算（至少 min_rounds 次），再在 tracemalloc 下执行 alloc_rounds 次统计内存分配
+
+    Returns:
+        dict: 吞吐量、延迟分位数与单次调用的内存分配峰值
+    """
+    func()  # 预热：编译模板、加载路由表
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_rounds and (len(timings) < min_rounds or time.perf_counter() - started < budget):
+        begin = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - begin)
+
+    gc.collect()
+    tracemalloc.start()
+    peaks = []
+    for _ in range(alloc_rounds):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    timings.sort()
+    return {'iterations': len(timings), 'throughput_per_s': round(len(timings) / sum(timings), 2),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 4), 'p99_ms': round(percentile(timings, 0.99) * 1000, 4),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 4), 'alloc_peak_kb': round(max(peaks) / 1024, 2)}
+
+
+class BenchmarkRunner:
+    """在临时 SQLite 数据库上创建 Mock 服务并执行各组用例"""
+
+    def __init__(self, quick=False, budget=1.0):
+        self.quick = quick
+        self.budget = budget
+        self.results = []
+        self.workdir = tempfile.mkdtemp(prefix='mock_benchmark_')
+        # 配置在导入时读取环境变量，必须在导入 app 之前设置
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(self.workdir, 'bench.db')}"
+        os.environ.setdefault('RESPONSE_LOG_SAMPLE_RATE', '0')
+        os.environ.setdefault('MOCK_METRICS_DIR', os.path.join(self.workdir, 'metrics'))
+
+        from app.core.database import db
+        from app.mock_server import create_mock_app
+        from app.models.project_model import Project  # noqa: F401 mocks 表外键依赖 projects 表
+
+        # Faker 加载语言环境时的 DEBUG 日志会淹没结果
+        logging.getLogger('faker').setLevel(logging.WARNING)
+
+        self.db = db
+        self.app = create_mock_app('production')
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+    def close(self):
+        self.context.pop()
+
+    @property
+    def template_sizes(self):
+        return [name for name in TEMPLATE_SIZES if not self.quick or name in QUICK_TEMPLATE_SIZES]
+
+    @property
+    def table_sizes(self):
+        return QUICK_TABLE_SIZES if self.quick else TABLE_SIZES
+
+    def record(self, group, name, params, func, budget=None):
+        result = {'name': f'{group}/{name}', 'group': group, 'params': params,
+            **measure(func, self.budget if budget is None else budget)}
+        self.results.append(result)
+        print(f"{result['name']:<48} {result['throughput_per_s']:>12.1f}/s  p50 {result['p50_ms']:>10.3f} ms  "
+            f"p99 {result['p99_ms']:>10.3f} ms  alloc {result['alloc_peak_kb']:>10.1f} KB", flush=True)
+
+    # ---- 用例 ----
+
+    def bench_process_template(self):
+        from app.utils.dynamic_data_util import DynamicDataProcessor
+
+        for size in self.template_sizes:
+            for density, ratio in TAG_DENSITIES.items():
+                template = build_template(TEMPLATE_SIZES[size], ratio)
+                self.record('process_template', f'{size}/{density}', {'size': size, 'density': density},
+                    lambda: DynamicDataProcessor.process_template(template, REQUEST_DATA))
+
+    def bench_replace_random_tags(self):
+        from app.utils.dynamic_data_util import RandomDataGenerator
+
+        for size in self.template_sizes:
+            for density, ratio in TAG_DENSITIES.items():
+                text = build_text(TEMPLATE_SIZES[size], ratio)
+                self.record('replace_random_tags', f'{size}/{density}', {'size': size, 'density': density},
+                    lambda: RandomDataGenerator._replace_random_tags(text))
+
+    def bench_execute_mock(self):
+        """每种模板一条 Mock，经 MockService.execute_mock 渲染并序列化"""
+        mocks = {}
+        for size in self.template_sizes:
+            for density, ratio in TAG_DENSITIES.items():
+                body = json.dumps(build_template(TEMPLATE_SIZES[size], ratio), ensure_ascii=False)
+                mocks[f'/bench/render/{size}/{density}'] = body
+        self._replace_mocks([self._mock_row(path, body) for path, body in mocks.items()])
+
+        for size in self.template_sizes:
+            for density in TAG_DENSITIES:
+                path = f'/bench/render/{size}/{density}'
+                self.record('execute_mock', f'{size}/{density}', {'size': size, 'density': density},
+                    lambda: self._execute(path))
+
+    def bench_route(self):
+        """不同规模路由表下的查找 + 执行（小响应体，耗时主要在路由匹配）"""
+        for count in self.table_sizes:
+            rows = []
+            for i in range(count):
+                # 每 10 条中 1 条为路径模板
+                path = f'/bench/t{i}/{{id}}/detail' if i % 10 == 0 else f'/bench/s{i}/items'
+                rows.append(self._mock_row(path, json.dumps({'id': i, 'name': 'item'})))
+            self._replace_mocks(rows)
+
+            rng = random.Random(count)
+            targets = [f'/bench/t{i}/{rng.randint(1, 9999)}/detail' if i % 10 == 0 else f'/bench/s{i}/items'
+                for i in (rng.randrange(count) for _ in range(1000))]
+            cursor = itertools.cycle(targets)
+            self.record('route', f'{count}', {'mocks': count}, lambda: self._execute(next(cursor)))
+
+            misses = itertools.cycle([f'/bench/missing/{i}' for i in range(1000)])
+            self.record('route', f'{count}/miss', {'mocks': count}, lambda: self._execute(next(misses)))
+
+    def bench_http(self):
+        """经 Flask 测试客户端的完整请求：请求解析、执行、序列化与日志钩子"""
+        rows = [self._mock_row(f'/bench/http/s{i}', json.dumps({'id': i, 'name': 'item'})) for i in range(1000)]
+        rows.append(self._mock_row('/bench/http/users/{id}', json.dumps(build_template(1 << 10, 0.1))))
+        rows.append(self._mock_row('/bench/http/static', json.dumps(build_template(100 << 10, 0))))
+        self._replace_mocks(rows)
+
+        client = self.app.test_client()
+        for name, url in (('static_100KB', '/api/mock/execute/bench/http/static'),
+                ('template_1KB', '/api/mock/execute/bench/http/users/42?id=42'),
+                ('small', '/api/mock/execute/bench/http/s500')):
+            self.record('http', name, {'url': url}, lambda: client.get(url).get_data())
+
+    # ---- 工具 ----
+
+    @staticmethod
+    def _mock_row(path, body):
+        return {'name': path[-100:], 'path': path, 'method': 'GET', 'response_status': 200, 'response_body': body,
+            'response_delay': 0}
+
+    def _replace_mocks(self, rows):
+        from sqlalchemy import delete, insert
+
+        from app.core.database import datetime, tz_beijing
+        from app.models.mock_model import Mock
+        from app.services.mock_route_table import mock_route_table
+
+        now = datetime.now(tz_beijing)
+        self.db.session.execute(delete(Mock))
+        for start in range(0, len(rows), 5000):
+            self.db.session.execute(insert(Mock), [dict(row, created_at=now, updated_at=now)
+                for row in rows[start:start + 5000]])
+        self.db.session.commit()
+        # 下一次执行（measure 的预热调用）时整体重新加载
+        mock_route_table.invalidate()
+
+    def _execute(self, path):
+        from flask import current_app
+
+        from app.core.exceptions import APIException
+        from app.services.mock_service import MockService
+
+        try:
+            result = MockService.execute_mock(path, 'GET', REQUEST_DATA)
+        except APIException:
+            return None
+        if result.stream is not None:
+            return b''.join(result.stream)
+        if not result.is_static:
+            return current_app.json.dumps(result.data)
+        return result.body
+
+    def run(self, groups):
+        for group in groups:
+            print(f'--- {group}', flush=True)
+            getattr(self, f'bench_{group}')()
+        return self.results
+
+
+def metadata(quick, budget):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+        branch = subprocess.run(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = branch = None
+    return {'commit': commit, 'branch': branch, 'python': platform.python_version(), 'platform': platform.platform(),
+        'cpu_count': os.cpu_count(), 'quick': quick, 'budget_s': budget,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def compare(results, baseline_path, threshold):
+    """
+    与基线结果对比 p50 延迟
+
+    Returns:
+        list: 退化超过阈值的用例名
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {item['name']: item for item in json.load(f)['results']}
+
+    regressions = []
+    print(f'--- 对比 {baseline_path}（阈值 {threshold:.0%}）')
+    for item in results:
+        base = baseline.get(item['name'])
+        if base is None or not base['p50_ms']:
+            continue
+        change = item['p50_ms'] / base['p50_ms'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  <-- 退化'
+            regressions.append(item['name'])
+        print(f"{item['name']:<48} p50 {base['p50_ms']:>10.3f} -> {item['p50_ms']:>10.3f} ms  {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mock 执行链路基准')
+    parser.add_argument('--quick', action='store_true', help='跳过 10MB 模板与 100k 路由表')
+    parser.add_argument('--only', action='append', choices=GROUPS, help='只执行指定用例组，可重复')
+    parser.add_argument('--budget', type=float, default=1.0, help='每个用例的计时预算（秒）')
+    parser.add_argument('-o', '--output', default='mock_benchmark.json', help='结果 JSON 文件')
+    parser.add_argument('--compare', help='对比的基线结果 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50 退化阈值，默认 0.2（20%%）')
+    args = parser.parse_args(argv)
+
+    runner = BenchmarkRunner(quick=args.quick, budget=args.budget)
+    try:
+        results = runner.run(args.only or GROUPS)
+    finally:
+        runner.close()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': metadata(args.quick, args.budget), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f'结果已写入 {args.output}')
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} 个用例退化超过 {args.threshold:.0%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 23:20
+@description  模拟数据生成基准：逐行逐字段调用 Faker（改造前的实现）对比列式引擎
+
+执行：python -m benchmarks.mock_data_benchmark [行数] [进程数列表，如 1,2,4,8]
+"""
+
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Union
+
+from faker import Faker
+
+from app.services.mock_data_service import MockDataService
+from app.services.mock_data_shards import shard_pool
+
+# 覆盖改造前支持的字段类型（改造前的实现对 decimals > 0 的 number 会报错，这里只用整数）
+FIELDS = [{'name': field_type, 'type': field_type} for field_type in MockDataService.FIELD_TYPES
+    if field_type not in ('time', 'enum', 'sequence', 'reference')]
+FIELDS += [{'name': 'birthday', 'type': 'date', 'options': {'start_date': '1970-01-01', 'end_date': '2005-12-31'}},
+    {'name': 'score', 'type': 'number', 'options': {'min_value': 0, 'max_value': 1000}}]
+
+_fake = Faker('zh_CN')
+
+
+class LegacyMockDataService:
+    """改造前的逐行逐字段实现（每个值重建生成函数字典并单独调用 Faker），仅用于对比"""
+
+    @classmethod
+    def _generate_rows(cls, fields: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+        result = []
+
+        for _ in range(count):
+            item = {}
+            for field_config in fields:
+                field_name = field_config.get('name')
+                field_type = field_config.get('type')
+                options = field_config.get('options', {})
+
+                if field_name and field_type:
+                    value = cls._generate_field_value(field_type, options)
+                    item[field_name] = value
+
+            result.append(item)
+
+        return result
+
+    @classmethod
+    def _generate_field_value(cls, field_type: str, options: Dict[str, Any] = None) -> Any:
+        """根据字段类型生成对应的值"""
+        options = options or {}
+
+        # 使用字典映射替代if-else链，提高可读性和可维护性
+        field_generators = {'name': lambda: _fake.name(), 'id_card': lambda: _fake.ssn(),  # Faker中的ssn方法生成身份证号
+            'phone': lambda: _fake.phone_number(), 'email': lambda: _fake.email(),
+            'address': lambda: _fake.address(), 'date': lambda: cls._generate_date(options),
+            'datetime': lambda: cls._generate_datetime(options), 'text': lambda: cls._generate_text(options),
+            'number': lambda: cls._generate_number(options), 'boolean': lambda: _fake.boolean(),
+            'company': lambda: _fake.company(), 'bank_card': lambda: _fake.credit_card_number(),
+            'age': lambda: cls._generate_age(options), 'province': lambda: _fake.province(),
+            'city': lambda: _fake.city(), 'postcode': lambda: _fake.postcode(), 'job': lambda: _fake.job(),
+            'ssn': lambda: _fake.ssn(), 'license_plate': lambda: _fake.license_plate()}
+
+        generator = field_generators.get(field_type)
+        if generator:
+            try:
+                return generator()
+            except AttributeError:
+                # 部分语言环境没有对应的 Faker provider，如 en_US 没有 province
+                return f"当前语言环境不支持: {field_type}"
+        else:
+            return f"未知类型: {field_type}"
+
+    @staticmethod
+    def _generate_date(options: Dict[str, Any]) -> str:
+        """生成日期"""
+        start_date = options.get('start_date', '2000-01-01')
+        end_date = options.get('end_date', '2023-12-31')
+
+        try:
+            # 使用Faker的date_between方法
+            fake_instance = _fake
+            return fake_instance.date_between(start_date=start_date, end_date=end_date).strftime('%Y-%m-%d')
+        except Exception:
+            # 备用方案
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+            random_date = start + timedelta(days=random.randint(0, (end - start).days))
+            return random_date.strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _generate_datetime(options: Dict[str, Any]) -> str:
+        """生成日期时间"""
+        start_date = options.get('start_date', '2000-01-01')
+        end_date = options.get('end_date', '2023-12-31')
+
+        try:
+            # 使用Faker的date_time_between方法
+            fake_instance = _fake
+            return fake_instance.date_time_between(start_date=start_date, end_date=end_date).strftime(
+                '%Y-%m-%d %H:%M:%S')
+        except Exception:
+            # 备用方案
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+            random_datetime = start + timedelta(days=random.randint(0, (end - start).days), hours=random.randint(0, 23),
+                minutes=random.randint(0, 59), seconds=random.randint(0, 59))
+            return random_datetime.strftime('%Y-%m-%d %H:%M:%S')
+
+    @classmethod
+    def _generate_text(cls, options: Dict[str, Any]) -> str:
+        """生成文本"""
+        min_length = options.get('min_length', 10)
+        max_length = options.get('max_length', 50)
+
+        # 使用Faker的text方法生成更真实的文本
+        text = _fake.text(max_nb_chars=max_length)
+        if len(text) < min_length:
+            # 如果生成的文本太短，使用多个句子组合
+            sentences = []
+            while len(''.join(sentences)) < min_length:
+                sentences.append(_fake.sentence())
+            text = ' '.join(sentences)
+
+        return text[:max_length]
+
+    @classmethod
+    def _generate_number(cls, options: Dict[str, Any]) -> Union[int, float]:
+        """生成数字"""
+        min_value = options.get('min_value', 0)
+        max_value = options.get('max_value', 100)
+        decimals = options.get('decimals', 0)
+
+        if decimals == 0:
+            # 整数
+            return _fake.random_int(min=min_value, max=max_value)
+        else:
+            # 浮点数
+            number = _fake.pyfloat(left_digits=len(str(max_value)) - decimals, right_digits=decimals, positive=True,
+                min_value=min_value, max_value=max_value)
+            return round(number, decimals)
+
+    @staticmethod
+    def _generate_age(options: Dict[str, Any]) -> int:
+        """生成年龄"""
+        min_age = options.get('min_age', 18)
+        max_age = options.get('max_age', 60)
+        fake_instance = _fake
+        return fake_instance.random_int(min=min_age, max=max_age)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(rows=20000):
+    # 首次调用会生成文本值池，单独计时
+    warm_up, _ = timed(lambda: MockDataService.generate_mock_data(FIELDS, 1, seed=1))
+
+    before, _ = timed(lambda: LegacyMockDataService._generate_rows(FIELDS, rows))
+    columns_time, _ = timed(lambda: MockDataService.generate_columns(FIELDS, rows, seed=1))
+    rows_time, data = timed(lambda: MockDataService.generate_mock_data(FIELDS, rows, seed=1))
+    assert len(data) == rows and set(data[0]) == {field['name'] for field in FIELDS}
+
+    print(f"字段数: {len(FIELDS)}, 行数: {rows}, 值池预热: {warm_up:.2f} s（每个进程、每种文本字段一次）")
+    print(f"逐行逐字段（改造前）: {before:.3f} s, {rows / before:,.0f} 行/s")
+    print(f"列式引擎（只生成列）: {columns_time:.3f} s, {rows / columns_time:,.0f} 行/s, 加速比 {before / columns_time:.1f}x")
+    print(f"列式引擎（组装为行）: {rows_time:.3f} s, {rows / rows_time:,.0f} 行/s, 加速比 {before / rows_time:.1f}x")
+
+
+def shard_scaling(rows, process_counts):
+    """流式输出 NDJSON 在不同进程数下的吞吐，并校验输出与单进程完全相同"""
+    baseline = None
+    for processes in process_counts:
+        shard_pool.start(processes)
+        # 预热：启动进程池，各工作进程构建文本值池
+        b''.join(MockDataService.stream_mock_data(FIELDS, MockDataService.STREAM_CHUNK_ROWS * processes * 2, 'ndjson',
+            seed=1))
+        elapsed, digest = timed(lambda: hashlib.md5(b''.join(
+            MockDataService.stream_mock_data(FIELDS, rows, 'ndjson', seed=1))).hexdigest())
+        if baseline is None:
+            baseline = (elapsed, digest)
+        same = '一致' if digest == baseline[1] else '不一致'
+        print(f"进程数 {processes}: {elapsed:.3f} s, {rows / elapsed:,.0f} 行/s, "
+              f"加速比 {baseline[0] / elapsed:.2f}x, 输出与首个进程数{same}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
+    counts = [int(value) for value in sys.argv[2].split(',')] if len(sys.argv) > 2 else sorted({1, 2, os.cpu_count()})
+    print()
+    shard_scaling(int(sys.argv[1]) * 10 if len(sys.argv) > 1 else 200000, counts)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/19 03:30
+@description  Mock 代理模式检查：本地启动上游服务（ThreadingHTTPServer），经 Mock 服务转发并核对结果
+
+基于临时 SQLite 数据库创建轻量 Mock 服务与两个开启代理的项目（/up 只缓存、/rec 录制为 Mock），覆盖：
+    - 转发：方法、路径、查询参数、请求头与原始请求体（JSON、XML、二进制、[] 等）原样到达上游
+    - 缓存：查询参数顺序、JSON 键顺序不同的相同请求只访问一次上游；请求体不同的请求不共用缓存
+    - 录制：proxy_record=mock 的响应保存为 Mock，清空代理缓存后仍由路由表命中，不再访问上游
+    - 连接复用：多次未命中缓存的请求复用同一条上游 keep-alive 连接
+    - ASGI 入口：原始请求体同样转发
+全部通过时以 0 退出，否则打印失败项并以 1 退出。
+
+执行：python -m benchmarks.mock_proxy_check
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """回显请求的上游：记录每个请求（含客户端端口，用于判断连接复用），返回 JSON"""
+
+    # keep-alive 需要 HTTP/1.1
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = urlsplit(self.path)
+        seen = {'method': self.command, 'path': url.path, 'query': url.query,
+            'content_type': self.headers.get('Content-Type'), 'body': body, 'port': self.client_address[1]}
+        self.server.requests.append(seen)
+
+        payload = json.dumps({'method': self.command, 'path': url.path, 'hits': len(self.server.requests)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProxyCheck:
+    """在临时 SQLite 数据库上创建 Mock 服务与本地上游，逐项检查代理行为"""
+
+    def __init__(self):
+        self.failures = []
+        self.workdir = tempfile.mkdtemp(prefix='mock_proxy_check_')
+        # 配置在导入时读取环境变量，必须在导入 app 之前设置
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(self.workdir, 'check.db')}"
+        os.environ.setdefault('RESPONSE_LOG_SAMPLE_RATE', '0')
+        os.environ.setdefault('MOCK_METRICS_DIR', os.path.join(self.workdir, 'metrics'))
+
+        from app.core.database import db
+        from app.mock_asgi import MockASGIApp
+        from app.mock_server import create_mock_app
+        from app.models.environment_model import Environment  # noqa: F401 projects 表外键依赖 environments 表
+        from app.models.mock_model import Mock
+        from app.models.project_model import Project
+        from app.services.mock_proxy import mock_proxy
+
+        logging.getLogger('faker').setLevel(logging.WARNING)
+
+        self.upstream = ThreadingHTTPServer(('127.0.0.1', 0), UpstreamHandler)
+        self.upstream.requests = []
+        self.upstream.daemon_threads = True
+        threading.Thread(target=self.upstream.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{self.upstream.server_address[1]}'
+
+        self.db = db
+        self.Mock = Mock
+        self.mock_proxy = mock_proxy
+        self.app = create_mock_app('production')
+        self.asgi = MockASGIApp(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        db.session.add_all([
+            Project(name='proxy-cache', proxy_enabled=True, proxy_prefix='/up', proxy_base_url=base_url,
+                proxy_record='cache'),
+            Project(name='proxy-record', proxy_enabled=True, proxy_prefix='/rec', proxy_base_url=base_url,
+                proxy_record='mock')])
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def close(self):
+        self.context.pop()
+        self.upstream.shutdown()
+        self.upstream.server_close()
+
+    @property
+    def requests(self):
+        return self.upstream.requests
+
+    def check(self, name, condition, detail=''):
+        print(f"{'PASS' if condition else 'FAIL'}  {name}{f'  ({detail})' if detail and not condition else ''}")
+        if not condition:
+            self.failures.append(name)
+
+    def execute(self, method, path, **kwargs):
+        return self.client.open(f'/api/mock/execute{path}', method=method, **kwargs)
+
+    # ---- 检查项 ----
+
+    def check_forwarding(self):
+        xml = b'<?xml version="1.0"?><order><id>1</id></order>'
+        response = self.execute('POST', '/up/orders?source=check', data=xml,
+            headers={'Content-Type': 'application/xml', 'X-Trace': 'abc'})
+        seen = self.requests[-1]
+        self.check('转发：响应来自上游', response.status_code == 200 and response.get_json()['path'] == '/orders',
+            f'{response.status_code} {response.data[:200]!r}')
+        self.check('转发：方法、去掉前缀后的路径与查询参数',
+            (seen['method'], seen['path'], seen['query']) == ('POST', '/orders', 'source=check'), str(seen))
+        self.check('转发：XML 请求体与 Content-Type 原样到达上游',
+            seen['body'] == xml and seen['content_type'] == 'application/xml', str(seen))
+
+        binary = bytes(range(256))
+        self.execute('PUT', '/up/files/1', data=binary, headers={'Content-Type': 'application/octet-stream'})
+        self.check('转发：二进制请求体原样到达上游', self.requests[-1]['body'] == binary)
+
+        for raw in (b'[]', b'{}', b'0'):
+            self.execute('POST', '/up/falsy', data=raw, headers={'Content-Type': 'application/json'})
+            self.check(f'转发：JSON 请求体 {raw.decode()} 不丢失', self.requests[-1]['body'] == raw,
+                repr(self.requests[-1]['body']))
+
+        self.execute('POST', '/up/form', data={'b': '2', 'a': '1'})
+        seen = self.requests[-1]
+        self.check('转发：表单请求体原样到达上游',
+            seen['body'] == b'b=2&a=1' and seen['content_type'].startswith('application/x-www-form-urlencoded'),
+            str(seen))
+
+    def check_cache(self):
+        before = len(self.requests)
+        first = self.execute('GET', '/up/items?a=1&b=2')
+        second = self.execute('GET', '/up/items?b=2&a=1')
+        self.check('缓存：查询参数顺序不同命中同一缓存',
+            len(self.requests) - before == 1 and first.data == second.data, f'上游请求 {len(self.requests) - before} 次')
+
+        before = len(self.requests)
+        self.execute('POST', '/up/search', data='{"x": 1, "y": [1, 2]}', headers={'Content-Type': 'application/json'})
+        self.execute('POST', '/up/search', data='{"y":[1,2],"x":1}', headers={'Content-Type': 'application/json'})
+        self.check('缓存：JSON 键顺序不同命中同一缓存', len(self.requests) - before == 1,
+            f'上游请求 {len(self.requests) - before} 次')
+
+        before = len(self.requests)
+        self.execute('POST', '/up/search', data='{"x": 2, "y": [1, 2]}', headers={'Content-Type': 'application/json'})
+        self.execute('POST', '/up/search', data='[]', headers={'Content-Type': 'application/json'})
+        self.check('缓存：JSON 请求体不同（含 []）不共用缓存', len(self.requests) - before == 2,
+            f'上游请求 {len(self.requests) - before} 次')
+
+        before = len(self.requests)
+        for xml in (b'<q>1</q>', b'<q>2</q>', b'<q>1</q>'):
+            self.execute('POST', '/up/soap', data=xml, headers={'Content-Type': 'text/xml'})
+        self.check('缓存：原始请求体按内容区分，相同内容命中缓存', len(self.requests) - before == 2,
+            f'上游请求 {len(self.requests) - before} 次')
+
+    def check_record(self):
+        before = len(self.requests)
+        first = self.execute('GET', '/rec/users')
+        recorded = self.Mock.query.filter_by(path='/rec/users', method='GET').first()
+        self.check('录制：响应保存为 Mock', recorded is not None and json.loads(recorded.response_body) ==
+            first.get_json(), str(recorded and recorded.response_body))
+
+        # 清空代理缓存后由路由表中录制的 Mock 响应，不再访问上游
+        self.mock_proxy.invalidate(clear_cache=True)
+        second = self.execute('GET', '/rec/users')
+        self.check('录制：之后的请求由 Mock 响应', len(self.requests) - before == 1 and
+            second.get_json() == first.get_json(), f'上游请求 {len(self.requests) - before} 次')
+
+    def check_connection_reuse(self):
+        before = len(self.requests)
+        for index in range(20):
+            self.execute('GET', f'/up/reuse/{index}')
+        ports = {seen['port'] for seen in self.requests[before:]}
+        self.check('连接复用：20 个未命中缓存的请求使用同一条上游连接',
+            len(self.requests) - before == 20 and len(ports) == 1, f'{len(ports)} 条连接')
+
+    def check_asgi(self):
+        xml = b'<ping>asgi</ping>'
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': xml, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/api/mock/execute/up/asgi', 'query_string': b'',
+            'headers': [(b'content-type', b'application/xml'), (b'content-length', str(len(xml)).encode())]}
+        asyncio.run(self.asgi(scope, receive, send))
+        status = next((message['status'] for message in messages if message['type'] == 'http.response.start'), None)
+        seen = self.requests[-1]
+        self.check('ASGI 入口：原始请求体原样转发', status == 200 and seen['path'] == '/asgi' and seen['body'] == xml,
+            f'{status} {seen}')
+
+    def run(self):
+        self.check_forwarding()
+        self.check_cache()
+        self.check_record()
+        self.check_connection_reuse()
+        self.check_asgi()
+        return self.failures
+
+
+def main():
+    checker = ProxyCheck()
+    try:
+        failures = checker.run()
+    finally:
+        checker.close()
+    if failures:
+        print(f'{len(failures)} 项检查失败')
+        return 1
+    print('全部检查通过')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
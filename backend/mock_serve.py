@@ -0,0 +1,19 @@
+# !/usr/bin/env python
+# -*- coding:utf-8 -*-
+
+"""
+@author       weimenghua
+@time         2026/10/18 15:10
+@description  轻量级 Mock 执行服务入口（只提供 /api/mock/execute，与管理端分开部署）
+"""
+
+import os
+
+from app.mock_server import create_mock_app
+
+app = create_mock_app(os.getenv('MOCK_SERVE_CONFIG', 'production'))
+
+if __name__ == '__main__':
+    # 生产环境: gunicorn -w 16 -b 0.0.0.0:5002 mock_serve:app
+    # 场景状态默认保存在数据库中由各工作进程共享；SCENARIO_STATE_BACKEND=memory 时只能 -w 1（可加 --threads）
+    app.run(host='0.0.0.0', port=5002, debug=False)